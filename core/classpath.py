@@ -0,0 +1,188 @@
+import os
+import re
+from pathlib import Path
+
+from core.verify import VersionVerifier, rules_allow
+
+# Флаги JVM, значение которых идет следующим аргументом
+JVM_PAIR_FLAGS = {
+    "-cp": "-cp",
+    "-classpath": "-cp",
+    "--class-path": "-cp",
+    "-p": "-p",
+    "--module-path": "-p",
+    "--add-modules": "--add-modules",
+    "--add-opens": "--add-opens",
+    "--add-exports": "--add-exports",
+    "--add-reads": "--add-reads",
+}
+
+# Флаги, для которых JVM использует последнее значение
+JVM_LAST_WINS_PREFIXES = ("-Xmx", "-Xms", "-Xss", "-Xmn")
+
+
+def split_library_name(name):
+    """Разбирает group:artifact:version[:classifier] на (ключ, версия)"""
+    parts = name.split("@")[0].split(":")
+    if len(parts) < 3:
+        return None, None
+    key = f"{parts[0]}:{parts[1]}"
+    if len(parts) > 3:
+        key += f":{parts[3]}"
+    return key, parts[2]
+
+
+def version_sort_key(version):
+    """Ключ сравнения версий библиотек: 3.2.10 > 3.2.9, числа раньше строк"""
+    key = []
+    for part in re.split(r"[.\-_+]", version):
+        key.append((0, int(part), "") if part.isdigit() else (1, 0, part))
+    return key
+
+
+class ClasspathResolver:
+    """Сжатие команды запуска перед стартом игры.
+
+    Библиотеки всей цепочки inheritsFrom сводятся к одной версии на
+    group:artifact(:classifier): побеждает версия из самого дочернего
+    JSON (ее требует загрузчик), среди равных - старшая. Повторы флагов
+    JVM удаляются, для -D, -XX и -Xmx остается последнее значение,
+    как его и применила бы JVM. Все удаленное попадает в отчет.
+    """
+
+    def __init__(self, minecraft_dir):
+        self.minecraft_dir = Path(minecraft_dir)
+        self.libraries_dir = str(self.minecraft_dir / "libraries")
+
+    def resolve_libraries(self, version_id):
+        """Возвращает {ключ: версия} - какая версия каждой библиотеки должна остаться"""
+        chain = VersionVerifier(self.minecraft_dir).load_version_chain(version_id)
+        resolved = {}
+        for data in chain:
+            level = {}
+            for lib in data.get("libraries", []):
+                if not lib.get("name") or not rules_allow(lib.get("rules")):
+                    continue
+                key, version = split_library_name(lib["name"])
+                if key and (key not in level or version_sort_key(version) > version_sort_key(level[key])):
+                    level[key] = version
+            for key, version in level.items():
+                # Более дочерний JSON уже задал версию
+                resolved.setdefault(key, version)
+        return resolved
+
+    def parse_library_path(self, path):
+        """Определяет (ключ, версия) по пути jar в папке libraries"""
+        if not path.startswith(self.libraries_dir + os.sep):
+            return None, None
+        parts = path[len(self.libraries_dir) + 1:].replace(os.sep, "/").split("/")
+        if len(parts) < 4:
+            return None, None
+        group = ".".join(parts[:-3])
+        artifact, version, filename = parts[-3:]
+        key = f"{group}:{artifact}"
+        base = f"{artifact}-{version}"
+        stem = os.path.splitext(filename)[0]
+        if stem.startswith(base + "-"):
+            key += ":" + stem[len(base) + 1:]
+        return key, version
+
+    def compact_classpath(self, classpath, resolved, report):
+        entries = [entry for entry in classpath.split(os.pathsep) if entry]
+        winners = {}
+        for entry in entries:
+            key, version = self.parse_library_path(os.path.normpath(entry))
+            if not key:
+                continue
+            current = winners.get(key)
+            if current is None:
+                winners[key] = (entry, version)
+                continue
+            wanted = resolved.get(key)
+            if wanted == current[1]:
+                continue
+            if version == wanted or version_sort_key(version) > version_sort_key(current[1]):
+                winners[key] = (entry, version)
+
+        result = []
+        placed = set()
+        for entry in entries:
+            key, _ = self.parse_library_path(os.path.normpath(entry))
+            kept = winners[key][0] if key else entry
+            # Библиотека остается на месте своего первого упоминания
+            if entry != kept or entry in placed:
+                report["libraries"].append(entry)
+            if (key or entry) in placed:
+                continue
+            placed.update((key or entry, kept))
+            result.append(kept)
+        return os.pathsep.join(result)
+
+    def split_jvm_args(self, command):
+        """Делит команду на (java, [(флаг, значение)], остаток с главным классом)"""
+        tokens = []
+        i = 1
+        while i < len(command):
+            arg = command[i]
+            if arg in JVM_PAIR_FLAGS and i + 1 < len(command):
+                tokens.append((arg, command[i + 1]))
+                i += 2
+                continue
+            if not arg.startswith("-") and "${" not in arg:
+                break
+            tokens.append((arg, None))
+            i += 1
+        return command[0], tokens, command[i:]
+
+    def jvm_arg_key(self, flag, value):
+        """Ключ повтора: одинаковый ключ - один и тот же параметр JVM"""
+        if value is not None:
+            kind = JVM_PAIR_FLAGS[flag]
+            return kind if kind in ("-cp", "-p") else (kind, value)
+        if flag.startswith("-D"):
+            return flag.split("=", 1)[0]
+        if flag.startswith("-XX:"):
+            return flag[4:].split("=", 1)[0].lstrip("+-")
+        if flag.startswith(JVM_LAST_WINS_PREFIXES):
+            return flag[:4]
+        if "=" in flag and flag.split("=", 1)[0] in JVM_PAIR_FLAGS:
+            name, value = flag.split("=", 1)
+            return self.jvm_arg_key(name, value)
+        return flag
+
+    def compact_jvm_args(self, tokens, resolved, report):
+        # Аргументы из JSON без подстановки (${...}) - копии уже подставленных
+        usable = []
+        for flag, value in tokens:
+            if "${" in flag or (value and "${" in value):
+                report["jvm"].append(flag if value is None else f"{flag} {value}")
+            else:
+                usable.append((flag, value))
+
+        last_index = {}
+        for index, (flag, value) in enumerate(usable):
+            key = self.jvm_arg_key(flag, value)
+            last_wins = key in ("-cp", "-p") or flag.startswith(("-D", "-XX:") + JVM_LAST_WINS_PREFIXES)
+            if last_wins or key not in last_index:
+                last_index[key] = index
+
+        result = []
+        for index, (flag, value) in enumerate(usable):
+            if last_index[self.jvm_arg_key(flag, value)] != index:
+                report["jvm"].append(flag if value is None else f"{flag} {value}")
+                continue
+            if value is None:
+                result.append(flag)
+            else:
+                if JVM_PAIR_FLAGS[flag] == "-cp":
+                    value = self.compact_classpath(value, resolved, report)
+                result.extend([flag, value])
+        return result
+
+    def compact_command(self, version_id, command):
+        """Возвращает (сжатая команда, отчет об удаленном)"""
+        report = {"libraries": [], "jvm": []}
+        resolved = self.resolve_libraries(version_id)
+        java, tokens, rest = self.split_jvm_args(command)
+        compacted = [java] + self.compact_jvm_args(tokens, resolved, report) + rest
+        return compacted, report
@@ -0,0 +1,331 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from core.config import CACHE_DIR, JAVA_RUNTIME_COMPONENTS, ensure_dir_exists
+from core.java_requirements import get_java_requirement
+from core.java_runtime import get_component_for_java
+from core.transaction import STAGING_DIR_NAME
+from core.utils import maven_to_path
+
+GRAPH_CACHE_PATH = CACHE_DIR / "reference_graph.json"
+
+# Файлы, созданные процессорами Forge/NeoForge: на них нет ссылок
+# в JSON версии, но они нужны при запуске, поэтому никогда не удаляются
+PROTECTED_LIBRARY_PREFIXES = (
+    "net/minecraftforge/",
+    "net/neoforged/",
+    "net/minecraft/client/",
+    "net/minecraft/server/",
+    "de/oceanlabs/mcp/",
+)
+
+# Недавно измененные файлы могут принадлежать идущей установке
+RECENT_SECONDS = 10 * 60
+
+CATEGORIES = ("versions", "libraries", "assets", "runtime")
+
+
+def scan_files(root):
+    """Рекурсивно обходит папку через os.scandir, возвращает (путь, размер, mtime)"""
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            st = entry.stat(follow_symlinks=False)
+                            yield entry.path, st.st_size, st.st_mtime
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def get_dir_size(root):
+    return sum(size for _, size, _ in scan_files(root))
+
+
+class StorageCollector:
+    """Сборщик мусора для папки игры (mark-and-sweep).
+
+    Помечается все, на что ссылаются оставляемые версии по цепочке
+    inheritsFrom: папки версий, библиотеки, индексы ассетов и их объекты,
+    компоненты Java runtime. Все остальное в versions/, libraries/,
+    assets/ и runtime/ можно удалить. Ссылки из JSON версий и индексов
+    ассетов кешируются по времени изменения файла.
+    """
+
+    def __init__(self, minecraft_dir, graph_path=GRAPH_CACHE_PATH, keep_paths=None):
+        self.minecraft_dir = Path(minecraft_dir)
+        self.graph_path = Path(graph_path)
+        # Дополнительные пути, которые нельзя удалять (например, выбранная вручную Java)
+        self.keep_paths = [str(Path(path)) for path in (keep_paths or []) if path]
+        self.graph = self.load_graph()
+        self._graph_changed = False
+
+    def load_graph(self):
+        try:
+            with open(self.graph_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_graph(self):
+        if not self._graph_changed:
+            return
+        try:
+            ensure_dir_exists(self.graph_path.parent)
+            tmp_path = self.graph_path.with_name(self.graph_path.name + ".part")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.graph, f, separators=(",", ":"))
+            os.replace(tmp_path, self.graph_path)
+            self._graph_changed = False
+        except OSError as e:
+            print(f"Ошибка сохранения графа ссылок: {e}")
+
+    def cached_refs(self, path, parse):
+        """Возвращает ссылки файла из кеша или разбирает файл заново"""
+        path = str(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        entry = self.graph.get(path)
+        if entry and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return entry["refs"]
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                refs = parse(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Не удалось разобрать {path}: {e}")
+            return None
+        self.graph[path] = {"mtime": st.st_mtime_ns, "size": st.st_size, "refs": refs}
+        self._graph_changed = True
+        return refs
+
+    def parse_version_json(self, data):
+        """Извлекает из JSON версии все ссылки на файлы"""
+        libraries = []
+        for lib in data.get("libraries", []):
+            downloads = lib.get("downloads", {})
+            if downloads.get("artifact", {}).get("path"):
+                libraries.append(downloads["artifact"]["path"])
+            elif lib.get("name"):
+                path = maven_to_path(lib["name"])
+                if path:
+                    libraries.append(path)
+            # natives всех ОС: JSON общий, удалять чужие natives незачем
+            for classifier in downloads.get("classifiers", {}).values():
+                if classifier.get("path"):
+                    libraries.append(classifier["path"])
+
+        java_version = data.get("javaVersion") or {}
+        component = java_version.get("component")
+        if not component and java_version.get("majorVersion"):
+            component = get_component_for_java(int(java_version["majorVersion"]))
+
+        return {
+            "inherits": data.get("inheritsFrom"),
+            "jar": data.get("jar"),
+            "libraries": libraries,
+            "asset_index": (data.get("assetIndex") or {}).get("id") or data.get("assets"),
+            "logging": ((data.get("logging") or {}).get("client") or {}).get("file", {}).get("id"),
+            "component": component,
+        }
+
+    def parse_asset_index(self, data):
+        return [info["hash"] for info in data.get("objects", {}).values()]
+
+    def list_versions(self):
+        versions_dir = self.minecraft_dir / "versions"
+        try:
+            with os.scandir(versions_dir) as it:
+                return sorted(entry.name for entry in it if entry.is_dir() and entry.name != STAGING_DIR_NAME)
+        except OSError:
+            return []
+
+    def mark(self, keep_versions):
+        """Помечает все, на что ссылаются оставляемые версии"""
+        marked = {"versions": set(), "libraries": set(), "assets": set(), "runtime": set()}
+        pending = list(keep_versions)
+
+        # Старые версии не указывают javaVersion - компонент определяется по правилам
+        for version_id in keep_versions:
+            marked["runtime"].add(get_java_requirement(version_id, self.minecraft_dir)[0])
+
+        while pending:
+            version_id = pending.pop()
+            if version_id in marked["versions"]:
+                continue
+            marked["versions"].add(version_id)
+
+            json_path = self.minecraft_dir / "versions" / version_id / f"{version_id}.json"
+            refs = self.cached_refs(json_path, self.parse_version_json)
+            if not refs:
+                continue
+
+            for key in ("inherits", "jar"):
+                if refs.get(key):
+                    pending.append(refs[key])
+            marked["libraries"].update(refs["libraries"])
+            if refs.get("component"):
+                marked["runtime"].add(refs["component"])
+            if refs.get("logging"):
+                marked["assets"].add(f"log_configs/{refs['logging']}")
+
+            asset_index = refs.get("asset_index")
+            if asset_index:
+                index_rel = f"indexes/{asset_index}.json"
+                marked["assets"].add(index_rel)
+                objects = self.cached_refs(self.minecraft_dir / "assets" / index_rel, self.parse_asset_index) or []
+                marked["assets"].update(f"objects/{sha1[:2]}/{sha1}" for sha1 in objects)
+
+        self.save_graph()
+        return marked
+
+    def is_kept_path(self, path):
+        return any(keep == path or keep.startswith(path + os.sep) for keep in self.keep_paths)
+
+    def plan(self, keep_versions=None):
+        """Пробный проход: что будет удалено и сколько места освободится.
+
+        keep_versions - оставляемые версии, по умолчанию все установленные.
+        """
+        started = time.time()
+        installed = self.list_versions()
+        if keep_versions is None:
+            # Папки без JSON - остатки неудачных установок, их не оставляем
+            keep_versions = [
+                name for name in installed
+                if (self.minecraft_dir / "versions" / name / f"{name}.json").exists()
+            ]
+        marked = self.mark(keep_versions)
+        recent = time.time() - RECENT_SECONDS
+        report = {category: {"paths": [], "bytes": 0} for category in CATEGORIES}
+
+        def add(category, path, size):
+            report[category]["paths"].append(path)
+            report[category]["bytes"] += size
+
+        # Версии: папки, на которые нет ссылок (в том числе без JSON)
+        for name in installed:
+            if name not in marked["versions"]:
+                path = str(self.minecraft_dir / "versions" / name)
+                add("versions", path, get_dir_size(path))
+
+        # Библиотеки
+        libraries_dir = self.minecraft_dir / "libraries"
+        prefix_len = len(str(libraries_dir)) + 1
+        for path, size, mtime in scan_files(libraries_dir):
+            rel_path = path[prefix_len:].replace(os.sep, "/")
+            if rel_path in marked["libraries"] or rel_path.startswith(PROTECTED_LIBRARY_PREFIXES) or mtime > recent:
+                continue
+            add("libraries", path, size)
+
+        # Ассеты: только объекты, индексы и конфигурации логов
+        assets_dir = self.minecraft_dir / "assets"
+        prefix_len = len(str(assets_dir)) + 1
+        for sub in ("objects", "indexes", "log_configs"):
+            for path, size, mtime in scan_files(assets_dir / sub):
+                rel_path = path[prefix_len:].replace(os.sep, "/")
+                if rel_path in marked["assets"] or mtime > recent:
+                    continue
+                add("assets", path, size)
+
+        # Java runtime: компоненты Mojang, не нужные ни одной версии
+        runtime_dir = self.minecraft_dir / "runtime"
+        for component in JAVA_RUNTIME_COMPONENTS:
+            path = str(runtime_dir / component)
+            if component in marked["runtime"] or not os.path.isdir(path) or self.is_kept_path(path):
+                continue
+            add("runtime", path, get_dir_size(path))
+
+        report["total_bytes"] = sum(report[category]["bytes"] for category in CATEGORIES)
+        report["keep_versions"] = sorted(marked["versions"])
+        report["installed"] = installed
+        report["elapsed"] = time.time() - started
+        print(f"Анализ места: можно освободить {report['total_bytes'] / 1024 / 1024:.1f} МБ за {report['elapsed']:.1f} сек")
+        return report
+
+    def is_garbage(self, category, path, marked, recent):
+        """Можно ли удалить путь из отчета сейчас: ссылки и mtime проверяются заново"""
+        try:
+            if os.lstat(path).st_mtime > recent:
+                return False
+        except OSError:
+            return False
+        if category == "versions":
+            return os.path.basename(path) not in marked["versions"]
+        if category == "runtime":
+            return os.path.basename(path) not in marked["runtime"] and not self.is_kept_path(path)
+        base_dir = self.minecraft_dir / category
+        rel_path = os.path.relpath(path, base_dir).replace(os.sep, "/")
+        if category == "libraries" and rel_path.startswith(PROTECTED_LIBRARY_PREFIXES):
+            return False
+        return rel_path not in marked[category]
+
+    def sweep(self, report, progress_callback=None, cancel=None):
+        """Удаляет то, что найдено в plan(). Возвращает освобожденные байты.
+
+        Между plan() и sweep() могла пройти установка, поэтому пометка
+        повторяется: для версий из отчета и появившихся после него. Каждый
+        путь перед удалением сверяется с новой пометкой и RECENT_SECONDS.
+        При отмене через cancel удаление останавливается между файлами.
+        """
+        installed = set(report.get("installed", []))
+        keep_versions = set(report["keep_versions"])
+        keep_versions.update(name for name in self.list_versions() if name not in installed)
+        marked = self.mark(sorted(keep_versions))
+        recent = time.time() - RECENT_SECONDS
+
+        paths = [(category, path) for category in CATEGORIES for path in report[category]["paths"]]
+        freed = 0
+        skipped = 0
+        total = len(paths)
+
+        for done, (category, path) in enumerate(paths, 1):
+            if cancel is not None and cancel.is_cancelled:
+                print("Очистка отменена")
+                break
+            if not self.is_garbage(category, path, marked, recent):
+                skipped += 1
+            else:
+                try:
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        size = get_dir_size(path)
+                        shutil.rmtree(path)
+                    else:
+                        size = os.lstat(path).st_size
+                        os.remove(path)
+                    freed += size
+                except OSError as e:
+                    print(f"Не удалось удалить {path}: {e}")
+            if progress_callback and (done % 200 == 0 or done == total):
+                progress_callback(int(done / total * 100))
+
+        for root in (self.minecraft_dir / "libraries", self.minecraft_dir / "assets" / "objects"):
+            self.remove_empty_dirs(root)
+
+        if skipped:
+            print(f"Очистка: пропущено {skipped} путей, которые понадобились после анализа")
+        print(f"Очистка завершена: освобождено {freed / 1024 / 1024:.1f} МБ")
+        return freed
+
+    def remove_empty_dirs(self, root):
+        """Удаляет пустые папки снизу вверх"""
+        for current, _, _ in os.walk(root, topdown=False):
+            if current != str(root):
+                try:
+                    # rmdir удаляет только пустую папку
+                    os.rmdir(current)
+                except OSError:
+                    pass
+
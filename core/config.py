@@ -12,29 +12,44 @@ REQUIRED_JAVA_VERSION = 21
 # Типы версий для фильтрации
 VERSION_TYPES = ["release", "snapshot", "old_beta", "old_alpha"]
 
-# Словарь соответствия версий Minecraft и рекомендуемых версий Java
-JAVA_VERSION_REQUIREMENTS = {
-    "1.21.4": 21,
-    "1.21": 21,
-    "1.20.6": 21,
-    "1.20.4": 21,
-    "1.20.1": 21,
-    "1.19.4": 21,
-    "1.19.2": 17,
-    "1.18.2": 17,
-    "1.17.1": 17,
-    "1.16.5": 11,
-    "1.15.2": 11,
-    "1.14.4": 11,
-    "1.13.2": 11,
-    "1.12.2": 8,
-    "1.11.2": 8,
-    "1.10.2": 8,
-    "1.9.4": 8,
-    "1.8.9": 8,
-    "1.7.10": 8,
+# Правила выбора Java по номеру версии Minecraft (от новых к старым)
+JAVA_VERSION_RULES = [
+    ((1, 20, 5), 21),
+    ((1, 18), 17),
+    ((1, 17), 16),
+    ((0,), 8),
+]
+
+# Правила для снапшотов вида 24w14a: (год, неделя) -> Java
+JAVA_SNAPSHOT_RULES = [
+    ((24, 14), 21),
+    ((21, 46), 17),
+    ((21, 19), 16),
+    ((0, 0), 8),
+]
+
+# Правила по дате выхода версии из манифеста Mojang
+JAVA_RELEASE_TIME_RULES = [
+    ("2024-04-03", 21),
+    ("2021-11-16", 17),
+    ("2021-05-12", 16),
+    ("", 8),
+]
+
+# Компоненты Java runtime Mojang и их мажорные версии Java
+JAVA_RUNTIME_COMPONENTS = {
+    "jre-legacy": 8,
+    "java-runtime-alpha": 16,
+    "java-runtime-gamma": 17,
+    "java-runtime-delta": 21,
 }
 
+# URL манифеста версий Minecraft
+VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest_v2.json"
+
+# URL манифеста Java runtime Mojang
+JAVA_RUNTIME_MANIFEST_URL = "https://launchermeta.mojang.com/v1/products/java-runtime/2ec0cc96c44e5a76b9c8b7c39df7210883d12871/all.json"
+
 # Словарь соответствия версий Minecraft и Forge
 FORGE_VERSIONS = {
     "1.7.10": "10.13.4.1614-1.7.10",
@@ -102,6 +117,10 @@ def get_asset_path(filename):
 
 ASSETS_DIR = PROJECT_DIR / "assets"
 
+# Папка данных лаунчера (реестры, кеши, плагины)
+LAUNCHER_DATA_DIR = Path.home() / ".pylauncher"
+CACHE_DIR = LAUNCHER_DATA_DIR / "cache"
+
 # Путь к директории Minecraft по умолчанию
 if os.name == 'nt':
     DEFAULT_MINECRAFT_DIR = Path(os.getenv('APPDATA')) / ".minecraft"
@@ -115,12 +134,24 @@ def ensure_dir_exists(path):
 
 def get_recommended_java_version(mc_version):
     """Возвращает рекомендуемую версию Java для указанной версии Minecraft"""
-    return JAVA_VERSION_REQUIREMENTS.get(mc_version, 21)
+    from core.java_requirements import get_java_requirement
+    return get_java_requirement(mc_version)[1]
 
 def get_recommended_forge_version(mc_version):
-    """Возвращает рекомендуемую версию Forge для указанной версии Minecraft"""
-    return FORGE_VERSIONS.get(mc_version, FORGE_VERSION)
+    """Возвращает рекомендуемую версию Forge для указанной версии Minecraft.
+    
+    Закрепленная в FORGE_VERSIONS сборка важнее каталога: каталог
+    нужен только для версий, которых нет в таблице"""
+    if mc_version in FORGE_VERSIONS:
+        return FORGE_VERSIONS[mc_version]
+    from core.loader_catalog import get_loader_catalog
+    return get_loader_catalog().get_forge_version(mc_version) or FORGE_VERSION
 
 def get_recommended_fabric_version(mc_version):
-    """Возвращает рекомендуемую версию Fabric для указанной версии Minecraft"""
-    return FABRIC_VERSIONS.get(mc_version, FABRIC_LOADER_VERSION)
\ No newline at end of file
+    """Возвращает рекомендуемую версию Fabric для указанной версии Minecraft.
+    
+    Закрепленная в FABRIC_VERSIONS версия важнее каталога"""
+    if mc_version in FABRIC_VERSIONS:
+        return FABRIC_VERSIONS[mc_version]
+    from core.loader_catalog import get_loader_catalog
+    return get_loader_catalog().get_fabric_loader(mc_version) or FABRIC_LOADER_VERSION
\ No newline at end of file
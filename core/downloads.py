@@ -0,0 +1,172 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+
+from core.metrics import get_metrics
+from core.tasks import Cancelled
+
+USER_AGENT = "WONDERFULAND/1.0"
+DOWNLOAD_WORKERS = 16
+CHUNK_SIZE = 256 * 1024
+RETRIES = 3
+
+_session_local = threading.local()
+
+
+class DownloadError(Exception):
+    """Ошибка скачивания или проверки файла"""
+    pass
+
+
+def get_session():
+    """Возвращает HTTP-сессию текущего потока (переиспользует соединения)"""
+    session = getattr(_session_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_WORKERS)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session_local.session = session
+    return session
+
+
+def file_sha1(path, chunk_size=CHUNK_SIZE):
+    """Считает sha1 файла"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_file_valid(path, sha1=None, size=None):
+    """Проверяет, что файл существует и совпадает по размеру и sha1"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if size is not None and st.st_size != size:
+        return False
+    if sha1 and file_sha1(path) != sha1:
+        return False
+    return True
+
+
+def download_file(url, dest, sha1=None, size=None, on_bytes=None, cancel=None):
+    """Скачивает файл с проверкой хеша.
+
+    Файл пишется во временный *.part и атомарно переименовывается,
+    поэтому на диске никогда не остается недокачанный файл.
+    cancel - CancellationToken: отмена проверяется после каждого блока,
+    а зависшее чтение прерывается закрытием ответа.
+    Возвращает количество скачанных байт.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(dest.name + ".part")
+    last_error = None
+    metrics = get_metrics()
+    host = urlsplit(url).hostname or ""
+
+    for attempt in range(RETRIES):
+        digest = hashlib.sha1()
+        downloaded = 0
+        close_response = None
+        try:
+            if cancel is not None:
+                cancel.check()
+            with get_session().get(url, stream=True, timeout=30) as response:
+                if cancel is not None:
+                    close_response = cancel.on_cancel(response.close)
+                if response.status_code != 200:
+                    raise DownloadError(f"HTTP {response.status_code}: {url}")
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if cancel is not None:
+                            cancel.check()
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        digest.update(chunk)
+                        downloaded += len(chunk)
+                        metrics.download_bytes.inc(len(chunk), host=host)
+                        if on_bytes:
+                            on_bytes(len(chunk))
+
+            if size is not None and downloaded != size:
+                raise DownloadError(f"Неверный размер {url}: {downloaded} != {size}")
+            if sha1 and digest.hexdigest() != sha1:
+                raise DownloadError(f"Неверный sha1 {url}")
+
+            os.replace(tmp_path, dest)
+            metrics.downloads.inc(host=host, result="ok")
+            return downloaded
+        except Exception as e:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            # Закрытый при отмене ответ падает с произвольной ошибкой чтения
+            if cancel is not None and cancel.is_cancelled:
+                raise Cancelled(f"Скачивание отменено: {url}") from e
+            if not isinstance(e, (requests.RequestException, DownloadError, OSError)):
+                raise
+            last_error = e
+            if isinstance(e, DownloadError) and str(e).startswith("HTTP 404"):
+                break
+        finally:
+            if close_response is not None:
+                cancel.remove(close_response)
+
+    metrics.downloads.inc(host=host, result="failed")
+    raise DownloadError(f"Не удалось скачать {url}: {last_error}")
+
+
+def download_many(jobs, max_workers=DOWNLOAD_WORKERS, on_file=None, on_bytes=None, cancel=None):
+    """Параллельно скачивает список файлов.
+
+    jobs - список словарей {"url", "path", "sha1", "size"}.
+    Уже скачанные файлы с правильным размером и хешем пропускаются.
+    on_file(done, total) вызывается после каждого файла.
+    При отмене через cancel еще не начатые файлы не скачиваются,
+    а после остановки начатых поднимается Cancelled.
+    Возвращает список (job, ошибка) для неудачных файлов.
+    """
+    jobs = list(jobs)
+    total = len(jobs)
+    failed = []
+    done = 0
+
+    def run_job(job):
+        if cancel is not None:
+            cancel.check()
+        if is_file_valid(job["path"], job.get("sha1"), job.get("size")):
+            get_metrics().cache_requests.inc(cache="files", result="hit")
+            return
+        get_metrics().cache_requests.inc(cache="files", result="miss")
+        download_file(job["url"], job["path"], job.get("sha1"), job.get("size"),
+                      on_bytes=on_bytes, cancel=cancel)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            if cancel is not None and cancel.is_cancelled:
+                executor.shutdown(wait=True, cancel_futures=True)
+                break
+            try:
+                future.result()
+            except Exception as e:
+                failed.append((futures[future], e))
+            done += 1
+            if on_file:
+                on_file(done, total)
+
+    if cancel is not None:
+        cancel.check()
+    return failed
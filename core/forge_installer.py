@@ -0,0 +1,325 @@
+import os
+import subprocess
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+from core.downloads import download_many, file_sha1
+from core.forge_processors import ForgeProcessorPlan, get_library_path
+from core.metrics import get_metrics
+from core.tasks import CancellationToken, Cancelled
+from core.transaction import InstallTransaction
+from core.utils import extract_zip_entry, get_process_group_kwargs, kill_process_tree
+
+# Сколько процессоров может выполняться одновременно
+PROCESSOR_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class ForgeInstallError(Exception):
+    """Ошибка установки Forge без внешнего установщика"""
+    pass
+
+
+class ForgeInstallCancelled(ForgeInstallError, Cancelled):
+    pass
+
+
+def get_jar_main_class(jar_path):
+    """Читает Main-Class из META-INF/MANIFEST.MF"""
+    with zipfile.ZipFile(jar_path, 'r') as zip_ref:
+        manifest = zip_ref.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+    for line in manifest.splitlines():
+        if line.startswith("Main-Class:"):
+            return line.split(":", 1)[1].strip()
+    return None
+
+
+class ForgeInstaller:
+    """Установка Forge 1.13+ по install_profile.json без запуска установщика.
+
+    Библиотеки скачиваются общим параллельным загрузчиком с проверкой
+    sha1 (или берутся из maven/ внутри установщика), а отдельными
+    процессами java запускаются только процессоры. Независимые процессоры
+    выполняются одновременно, результаты берутся из кеша процессоров.
+    """
+
+    def __init__(self, minecraft_dir, installer_path, mc_version, java_path, log_file=None,
+                 status_callback=None, progress_callback=None, bytes_callback=None):
+        self.minecraft_dir = Path(minecraft_dir).absolute()
+        self.libraries_dir = self.minecraft_dir / "libraries"
+        self.installer_path = Path(installer_path).absolute()
+        self.mc_version = mc_version
+        self.java_path = java_path
+        self.log_file = log_file
+        self.status_callback = status_callback
+        self.progress_callback = progress_callback
+        self.bytes_callback = bytes_callback
+
+        self.token = CancellationToken()
+        self._processes = set()
+        # Ошибка процессора останавливает соседние, но не отменяет установку:
+        # token отменяет только пользователь, и журнал тогда сохраняется
+        self._failed = threading.Event()
+        self._lock = threading.Lock()
+        self._log = None
+
+    def set_status(self, text):
+        if self.status_callback:
+            self.status_callback(text)
+
+    def set_progress(self, fraction):
+        if self.progress_callback:
+            self.progress_callback(fraction)
+
+    def log(self, text):
+        with self._lock:
+            if self._log:
+                self._log.write(text if text.endswith("\n") else text + "\n")
+
+    def cancel(self):
+        """Останавливает установку и завершает запущенные процессоры"""
+        self.token.cancel()
+        self.stop_processors()
+
+    def stop_processors(self):
+        """Завершает запущенные процессоры"""
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            kill_process_tree(process)
+
+    def check_cancelled(self):
+        if self.token.is_cancelled:
+            raise ForgeInstallCancelled("Установка Forge отменена")
+
+    def check_failed(self):
+        if self._failed.is_set():
+            raise ForgeInstallError("Процессор остановлен после ошибки другого процессора")
+
+    def install(self):
+        """Устанавливает Forge, возвращает id версии.
+
+        JSON версии собирается в промежуточной папке InstallTransaction и
+        публикуется только после библиотек и всех процессоров с проверенными
+        sha1 выходов: до этого версия не видна как установленная.
+        """
+        log = open(self.log_file, 'w', encoding='utf-8') if self.log_file else None
+        self._log = log
+        transaction = None
+        try:
+            with tempfile.TemporaryDirectory(prefix="forge_data_", dir=str(self.minecraft_dir)) as data_dir:
+                plan = ForgeProcessorPlan(self.minecraft_dir, self.installer_path, self.mc_version, data_dir=data_dir)
+                if "processors" not in plan.install_profile or not plan.version_json.get("id"):
+                    raise ForgeInstallError("Неподдерживаемый формат install_profile.json")
+
+                version_id = plan.version_json["id"]
+                transaction = InstallTransaction(self.minecraft_dir, version_id)
+                transaction.begin("forge")
+                with zipfile.ZipFile(self.installer_path, 'r') as zip_ref:
+                    self.write_version_json(plan, transaction)
+                    self.install_libraries(plan, zip_ref)
+                    transaction.mark_done("libraries")
+                    self.check_cancelled()
+                    self.extract_data(zip_ref, Path(data_dir))
+
+                self.run_processors(plan)
+                self.check_cancelled()
+                transaction.mark_done("processors")
+                transaction.publish()
+                self.set_progress(1.0)
+                self.log(f"Forge {version_id} установлен")
+                return version_id
+        except Exception:
+            # Отмененная установка продолжится по журналу, после ошибки
+            # версию ставит внешний установщик, и журнал ему не нужен
+            if transaction is not None and not self.token.is_cancelled:
+                transaction.abort()
+            raise
+        finally:
+            self._log = None
+            if log:
+                log.close()
+
+    def write_version_json(self, plan, transaction):
+        version_id = plan.version_json["id"]
+        transaction.write_json(f"{version_id}.json", plan.version_json)
+        transaction.mark_done("profile")
+        self.log(f"Записан профиль версии {transaction.staged_path(f'{version_id}.json')}")
+        return version_id
+
+    def install_libraries(self, plan, zip_ref):
+        """Скачивает библиотеки профиля и версии, встроенные берет из maven/ установщика"""
+        names = set(zip_ref.namelist())
+        jobs = []
+        seen = set()
+
+        for library in plan.install_profile.get("libraries", []) + plan.version_json.get("libraries", []):
+            if not library.get("name"):
+                continue
+            rel_path = get_library_path(library)
+            if rel_path in seen:
+                continue
+            seen.add(rel_path)
+
+            artifact = library.get("downloads", {}).get("artifact", {})
+            dest = self.libraries_dir / rel_path
+            if f"maven/{rel_path}" in names:
+                extract_zip_entry(zip_ref, zip_ref.getinfo(f"maven/{rel_path}"), dest)
+            elif artifact.get("url"):
+                jobs.append({
+                    "url": artifact["url"],
+                    "path": dest,
+                    "sha1": artifact.get("sha1"),
+                    "size": artifact.get("size"),
+                })
+            # Без url и не в установщике - файл создадут процессоры
+
+        self.set_status(f"Forge: скачивание библиотек ({len(jobs)})...")
+
+        def on_file(done, total):
+            self.set_progress(done / total * 0.4)
+
+        try:
+            failed = download_many(jobs, on_file=on_file, on_bytes=self.bytes_callback, cancel=self.token)
+        except Cancelled:
+            raise ForgeInstallCancelled("Установка Forge отменена")
+        for job, error in failed:
+            self.log(f"Ошибка скачивания {job['url']}: {error}")
+        if failed:
+            raise ForgeInstallError(f"Не удалось скачать {len(failed)} библиотек Forge: {failed[0][1]}")
+        self.log(f"Библиотеки Forge: {len(seen)}, скачано {len(jobs)}")
+
+    def extract_data(self, zip_ref, data_dir):
+        for info in zip_ref.infolist():
+            if info.filename.startswith("data/") and not info.is_dir():
+                extract_zip_entry(zip_ref, info, data_dir / info.filename)
+
+    def outputs_valid(self, processor):
+        for path, sha1 in processor["outputs"].items():
+            try:
+                if file_sha1(path) != sha1:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def build_dependencies(self, plan):
+        """Для каждого процессора - индексы процессоров, которые должны выполниться раньше.
+
+        Файлы, которых нет среди библиотек, data/ и jar Minecraft, считаются
+        результатами процессоров: процессор, читающий или пишущий такой файл,
+        ждет все предыдущие процессоры, которые его касаются.
+        """
+        root = str(self.minecraft_dir)
+        predefined = set(plan.known_hashes) - {path for p in plan.processors for path in p["outputs"]}
+        predefined.add(str(plan.get_minecraft_jar()))
+        predefined.add(str(self.installer_path))
+
+        touched = []
+        for processor in plan.processors:
+            paths = {arg for arg in processor["args"] if root in arg} | set(processor["outputs"])
+            touched.append(paths - predefined)
+
+        dependencies = []
+        for i, paths in enumerate(touched):
+            dependencies.append({j for j in range(i) if touched[j] & paths})
+        return dependencies
+
+    def run_processors(self, plan):
+        processors = plan.processors
+        if not processors:
+            return
+
+        hits = plan.restore_cached()
+        cacheable = sum(1 for processor in processors if processor["key"])
+        metrics = get_metrics()
+        metrics.cache_requests.inc(hits, cache="forge_processors", result="hit")
+        metrics.cache_requests.inc(cacheable - hits, cache="forge_processors", result="miss")
+        if hits:
+            self.log(f"Из кеша взято процессоров: {hits}/{len(processors)}")
+
+        dependencies = self.build_dependencies(plan)
+        pending = set(range(len(processors)))
+        done = set()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=PROCESSOR_WORKERS) as executor:
+            while pending or running:
+                self.check_cancelled()
+                for i in sorted(pending):
+                    if dependencies[i] <= done:
+                        pending.discard(i)
+                        running[executor.submit(self.run_processor, plan, processors[i])] = i
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception:
+                        self._failed.set()
+                        self.stop_processors()
+                        raise
+                    done.add(i)
+                    self.set_status(f"Forge: процессор {len(done)}/{len(processors)}")
+                    self.set_progress(0.4 + len(done) / len(processors) * 0.6)
+
+    def run_processor(self, plan, processor):
+        self.check_cancelled()
+        self.check_failed()
+        name = f"[{processor['index']}] {processor['jar']}"
+
+        # Выходы из кеша сверяются по sha1 так же, как уже лежащие на диске
+        if processor["outputs"] and self.outputs_valid(processor):
+            self.log(f"{name}: Cache Hit")
+            return
+
+        main_class = get_jar_main_class(processor["jar_path"])
+        if not main_class:
+            raise ForgeInstallError(f"Нет Main-Class в {processor['jar_path']}")
+
+        for path in processor["outputs"]:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        classpath = os.pathsep.join(str(path) for path in [processor["jar_path"]] + processor["classpath"])
+        cmd = [self.java_path, "-cp", classpath, main_class] + processor["args"]
+        self.log(f"{name}: {' '.join(cmd)}")
+
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            cwd=str(self.minecraft_dir),
+            **get_process_group_kwargs()
+        )
+        with self._lock:
+            self._processes.add(process)
+        try:
+            if self.token.is_cancelled or self._failed.is_set():
+                kill_process_tree(process)
+            for line in process.stdout:
+                self.log(f"{name}: {line.rstrip()}")
+            returncode = process.wait()
+        finally:
+            process.stdout.close()
+            with self._lock:
+                self._processes.discard(process)
+
+        self.check_cancelled()
+        self.check_failed()
+        if returncode != 0:
+            raise ForgeInstallError(f"Процессор {processor['jar']} завершился с кодом {returncode}")
+        if processor["outputs"] and not self.outputs_valid(processor):
+            raise ForgeInstallError(f"Процессор {processor['jar']} создал файлы с неверным sha1")
+
+        if processor["key"]:
+            try:
+                plan.cache.store(processor["key"], processor["outputs"])
+            except OSError as e:
+                self.log(f"{name}: не удалось сохранить в кеш: {e}")
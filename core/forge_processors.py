@@ -0,0 +1,315 @@
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+from pathlib import Path
+
+from core.config import CACHE_DIR, ensure_dir_exists
+from core.downloads import file_sha1
+from core.utils import maven_to_path
+
+PROCESSOR_CACHE_DIR = CACHE_DIR / "forge_processors"
+
+
+def read_installer_profile(installer_path):
+    """Читает install_profile.json и version.json из установщика Forge"""
+    with zipfile.ZipFile(installer_path, 'r') as zip_ref:
+        install_profile = json.loads(zip_ref.read("install_profile.json"))
+        version_name = install_profile.get("json", "/version.json").lstrip("/")
+        version_json = {}
+        if version_name in zip_ref.namelist():
+            version_json = json.loads(zip_ref.read(version_name))
+    return install_profile, version_json
+
+
+def get_library_path(library):
+    """Относительный путь библиотеки в папке libraries"""
+    artifact = library.get("downloads", {}).get("artifact", {})
+    return artifact.get("path") or maven_to_path(library["name"])
+
+
+def is_processor_for_side(processor, side):
+    return side in processor.get("sides", [side])
+
+
+class ProcessorCache:
+    """Кеш результатов процессоров установщика Forge.
+
+    entries/<ключ>.json - запись о том, что процессор с таким ключом
+    уже выполнялся, objects/<sha1[:2]>/<sha1> - содержимое его выходных
+    файлов. Объекты раскладываются в .minecraft копиями, а не ссылками:
+    процессоры и внешний установщик перезаписывают файлы на месте и
+    испортили бы общий объект. При копировании sha1 сверяется заново.
+    """
+
+    def __init__(self, cache_dir=PROCESSOR_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.entries_dir = self.cache_dir / "entries"
+        self.objects_dir = self.cache_dir / "objects"
+
+    def object_path(self, sha1):
+        return self.objects_dir / sha1[:2] / sha1
+
+    def entry_path(self, key):
+        return self.entries_dir / f"{key}.json"
+
+    def load_entry(self, key):
+        try:
+            with open(self.entry_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def materialize(self, key, outputs):
+        """Раскладывает выходные файлы процессора из кеша.
+
+        outputs - {путь: sha1}. Возвращает True, если все файлы на месте.
+        """
+        entry = self.load_entry(key)
+        if not entry:
+            return False
+
+        sizes = entry.get("sizes", {})
+        for sha1 in outputs.values():
+            try:
+                if self.object_path(sha1).stat().st_size != sizes.get(sha1):
+                    return False
+            except OSError:
+                return False
+
+        for path, sha1 in outputs.items():
+            path = Path(path)
+            try:
+                # Ссылку на объект (от прежних версий лаунчера) заменяем копией
+                if (not os.path.samefile(self.object_path(sha1), path)
+                        and path.stat().st_size == sizes[sha1] and file_sha1(path) == sha1):
+                    continue
+            except OSError:
+                pass
+            if not self.copy_object(sha1, path):
+                return False
+        return True
+
+    def copy_object(self, sha1, path):
+        """Копирует объект в path, сверяя sha1 по ходу копирования.
+
+        Испорченный объект удаляется из кеша, процессор выполнится заново.
+        """
+        source = self.object_path(sha1)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".part")
+        digest = hashlib.sha1()
+        try:
+            with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+                for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                    digest.update(chunk)
+                    dst.write(chunk)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        if digest.hexdigest() != sha1:
+            print(f"Объект кеша процессоров {sha1} поврежден, удаляется")
+            for bad_path in (tmp_path, source):
+                try:
+                    os.remove(bad_path)
+                except OSError:
+                    pass
+            return False
+        os.replace(tmp_path, path)
+        return True
+
+    def store(self, key, outputs):
+        """Сохраняет выходные файлы выполненного процессора в кеш"""
+        sizes = {}
+        for path, sha1 in outputs.items():
+            try:
+                if file_sha1(path) != sha1:
+                    return False
+            except OSError:
+                return False
+
+            target = self.object_path(sha1)
+            if not target.exists():
+                ensure_dir_exists(target.parent)
+                # Копия, а не ссылка: процессоры перезаписывают файлы на месте
+                tmp_path = target.with_name(target.name + ".part")
+                shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, target)
+            sizes[sha1] = target.stat().st_size
+
+        ensure_dir_exists(self.entries_dir)
+        entry_path = self.entry_path(key)
+        tmp_path = entry_path.with_name(entry_path.name + ".part")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"outputs": sorted(outputs.values()), "sizes": sizes}, f)
+        os.replace(tmp_path, entry_path)
+        return True
+
+
+class ForgeProcessorPlan:
+    """Процессоры из install_profile.json с подставленными аргументами.
+
+    Для каждого процессора с объявленными выходами считается ключ:
+    координаты jar и classpath, аргументы (пути заменены на sha1 входных
+    файлов) и ожидаемые sha1 выходов. Хеши входов берутся из профиля
+    (библиотеки, выходы предыдущих процессоров, файлы data/ установщика),
+    поэтому ключ известен еще до установки.
+    """
+
+    def __init__(self, minecraft_dir, installer_path, mc_version, side="client", data_dir=None, cache=None):
+        self.minecraft_dir = Path(minecraft_dir).absolute()
+        self.libraries_dir = self.minecraft_dir / "libraries"
+        self.installer_path = Path(installer_path).absolute()
+        self.mc_version = mc_version
+        self.side = side
+        # Сюда распаковываются файлы data/ установщика, если процессоры запускает лаунчер
+        self.data_dir = Path(data_dir) if data_dir else self.minecraft_dir / ".forge_data"
+        self.cache = cache or ProcessorCache()
+
+        self.install_profile, self.version_json = read_installer_profile(self.installer_path)
+        self.known_hashes = {}
+        self.collect_known_hashes()
+        self.data = self.build_data()
+        self.processors = self.build_processors()
+
+    def collect_known_hashes(self):
+        """Заполняет известные sha1 файлов без чтения их с диска"""
+        for library in self.install_profile.get("libraries", []) + self.version_json.get("libraries", []):
+            artifact = library.get("downloads", {}).get("artifact", {})
+            if artifact.get("sha1") and library.get("name"):
+                self.known_hashes[str(self.libraries_dir / get_library_path(library))] = artifact["sha1"]
+
+        try:
+            vanilla_json = self.minecraft_dir / "versions" / self.mc_version / f"{self.mc_version}.json"
+            with open(vanilla_json, 'r', encoding='utf-8') as f:
+                client_sha1 = json.load(f).get("downloads", {}).get(self.side, {}).get("sha1")
+            if client_sha1:
+                self.known_hashes[str(self.get_minecraft_jar())] = client_sha1
+        except (OSError, ValueError):
+            pass
+
+        with zipfile.ZipFile(self.installer_path, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                if info.filename.startswith("data/") and not info.is_dir():
+                    digest = hashlib.sha1()
+                    with zip_ref.open(info) as f:
+                        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                            digest.update(chunk)
+                    self.known_hashes[str(self.data_dir / info.filename)] = digest.hexdigest()
+
+    def get_minecraft_jar(self):
+        return self.minecraft_dir / "versions" / self.mc_version / f"{self.mc_version}.jar"
+
+    def resolve_value(self, value):
+        """Возвращает (строка, является ли путем к файлу) для значения из профиля"""
+        if value.startswith("[") and value.endswith("]"):
+            return str(self.libraries_dir / maven_to_path(value[1:-1])), True
+        if value.startswith("'") and value.endswith("'"):
+            return value[1:-1], False
+        if value.startswith("/"):
+            return str(self.data_dir / value.lstrip("/")), True
+        return value, False
+
+    def build_data(self):
+        data = {
+            "SIDE": (self.side, False),
+            "MINECRAFT_JAR": (str(self.get_minecraft_jar()), True),
+            "MINECRAFT_VERSION": (self.mc_version, False),
+            "ROOT": (str(self.minecraft_dir), False),
+            "INSTALLER": (str(self.installer_path), True),
+            "LIBRARY_DIR": (str(self.libraries_dir), False),
+        }
+        for key, values in self.install_profile.get("data", {}).items():
+            if self.side in values:
+                data[key] = self.resolve_value(values[self.side])
+        return data
+
+    def resolve_arg(self, arg):
+        """Подставляет {KEY} и [артефакт] в аргумент процессора"""
+        if arg.startswith("{") and arg.endswith("}") and arg[1:-1] in self.data:
+            return self.data[arg[1:-1]]
+        if arg.startswith("[") and arg.endswith("]"):
+            return self.resolve_value(arg)
+        if arg.startswith("'") and arg.endswith("'"):
+            return arg[1:-1], False
+        for key, (value, _) in self.data.items():
+            arg = arg.replace("{" + key + "}", value)
+        return arg, False
+
+    def build_processors(self):
+        processors = []
+        for index, processor in enumerate(self.install_profile.get("processors", [])):
+            if not is_processor_for_side(processor, self.side):
+                continue
+
+            args = [self.resolve_arg(arg) for arg in processor.get("args", [])]
+            outputs = {}
+            for key, value in processor.get("outputs", {}).items():
+                output_path, _ = self.resolve_arg(key)
+                outputs[output_path] = self.resolve_arg(value)[0].lower()
+
+            item = {
+                "index": index,
+                "jar": processor["jar"],
+                "jar_path": self.libraries_dir / maven_to_path(processor["jar"]),
+                "classpath": [self.libraries_dir / maven_to_path(name) for name in processor.get("classpath", [])],
+                "args": [value for value, _ in args],
+                "inputs": [value for value, is_path in args if is_path and value not in outputs],
+                "outputs": outputs,
+            }
+            item["key"] = self.compute_key(processor, args, outputs) if outputs else None
+            processors.append(item)
+
+            # Выходы процессора - входы следующих, их sha1 объявлены в профиле
+            self.known_hashes.update(outputs)
+        return processors
+
+    def input_hash(self, path):
+        known = self.known_hashes.get(path)
+        if known:
+            return known
+        try:
+            sha1 = file_sha1(path)
+        except OSError:
+            return None
+        self.known_hashes[path] = sha1
+        return sha1
+
+    def compute_key(self, processor, args, outputs):
+        """Ключ кеша процессора или None, если хеш какого-то входа неизвестен"""
+        identity = [processor["jar"], sorted(processor.get("classpath", []))]
+        root = str(self.minecraft_dir)
+        for value, is_path in args:
+            if is_path and value in outputs:
+                identity.append("out:" + outputs[value])
+            elif is_path:
+                sha1 = self.input_hash(value)
+                if not sha1:
+                    return None
+                identity.append("in:" + sha1)
+            else:
+                identity.append(value.replace(root, "{ROOT}"))
+        identity.append(sorted(outputs.values()))
+        return hashlib.sha1(json.dumps(identity).encode("utf-8")).hexdigest()
+
+    def restore_cached(self):
+        """Раскладывает выходы процессоров из кеша, возвращает число попаданий"""
+        hits = 0
+        for processor in self.processors:
+            if processor["key"] and self.cache.materialize(processor["key"], processor["outputs"]):
+                processor["cached"] = True
+                hits += 1
+        return hits
+
+    def store_outputs(self):
+        """Сохраняет в кеш выходы процессоров после установки"""
+        stored = 0
+        for processor in self.processors:
+            if processor["key"] and not processor.get("cached"):
+                if self.cache.store(processor["key"], processor["outputs"]):
+                    stored += 1
+        return stored
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from core.config import CACHE_DIR, ensure_dir_exists
+from core.downloads import DownloadError, download_file, file_sha1, get_session
+from core.metrics import get_metrics
+
+INSTALLER_CACHE_DIR = CACHE_DIR / "forge_installers"
+
+# Предельный размер кеша установщиков, старые по времени использования удаляются
+INSTALLER_CACHE_MAX_SIZE = 512 * 1024 * 1024
+
+# Файлы меньше этого размера - страницы ошибок, а не установщики
+MIN_INSTALLER_SIZE = 100000
+
+
+def fetch_maven_sha1(url):
+    """Получает опубликованный в Maven sha1 файла (url + .sha1) или None"""
+    try:
+        response = get_session().get(url + ".sha1", timeout=15)
+        if response.status_code != 200:
+            return None
+        sha1 = response.text.strip().split()[0].lower()
+        return sha1 if len(sha1) == 40 else None
+    except (requests.RequestException, IndexError):
+        return None
+
+
+class InstallerCache:
+    """Кеш установщиков Forge, ключ - id артефакта в Maven (1.20.1-47.1.3).
+
+    Каждый файл проверяется по sha1 из Maven при скачивании и по
+    сохраненному sha1 при выдаче из кеша. Размер кеша ограничен,
+    вытесняются давно не использованные установщики.
+    """
+
+    def __init__(self, cache_dir=INSTALLER_CACHE_DIR, max_size=INSTALLER_CACHE_MAX_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / "index.json"
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self.index = self.load_index()
+
+    def load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        try:
+            ensure_dir_exists(self.cache_dir)
+            tmp_path = self.index_path.with_name(self.index_path.name + ".part")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Ошибка сохранения индекса установщиков: {e}")
+
+    def get_path(self, maven_id):
+        return self.cache_dir / f"forge-{maven_id}-installer.jar"
+
+    def get(self, maven_id):
+        """Возвращает путь к проверенному установщику из кеша или None"""
+        with self._lock:
+            entry = self.index.get(maven_id)
+            if not entry:
+                get_metrics().cache_requests.inc(cache="forge_installer", result="miss")
+                return None
+            path = self.get_path(maven_id)
+            try:
+                valid = path.stat().st_size == entry["size"] and file_sha1(path) == entry["sha1"]
+            except OSError:
+                valid = False
+
+            if not valid:
+                print(f"Установщик Forge {maven_id} в кеше поврежден, удаляем")
+                self.index.pop(maven_id, None)
+                path.unlink(missing_ok=True)
+                self.save_index()
+                get_metrics().cache_requests.inc(cache="forge_installer", result="miss")
+                return None
+
+            get_metrics().cache_requests.inc(cache="forge_installer", result="hit")
+            entry["last_used"] = time.time()
+            self.save_index()
+            return path
+
+    def download(self, maven_id, url, on_bytes=None, cancel=None):
+        """Скачивает установщик в кеш с проверкой по sha1 из Maven"""
+        path = self.get_path(maven_id)
+        sha1 = fetch_maven_sha1(url)
+        if not sha1:
+            print(f"sha1 для {url} не опубликован, проверяем только размер")
+
+        download_file(url, path, sha1=sha1, on_bytes=on_bytes, cancel=cancel)
+        size = path.stat().st_size
+        if size < MIN_INSTALLER_SIZE:
+            path.unlink(missing_ok=True)
+            raise DownloadError(f"Скачанный файл слишком маленький: {size}")
+
+        with self._lock:
+            self.index[maven_id] = {
+                "sha1": sha1 or file_sha1(path),
+                "size": size,
+                "url": url,
+                "last_used": time.time(),
+            }
+            self.prune(keep=maven_id)
+            self.save_index()
+        return path
+
+    def prune(self, keep=None):
+        """Удаляет давно не использованные установщики сверх предельного размера"""
+        total = sum(entry["size"] for entry in self.index.values())
+        for maven_id, entry in sorted(self.index.items(), key=lambda item: item[1].get("last_used", 0)):
+            if total <= self.max_size:
+                break
+            if maven_id == keep:
+                continue
+            self.get_path(maven_id).unlink(missing_ok=True)
+            del self.index[maven_id]
+            total -= entry["size"]
+            print(f"Установщик Forge {maven_id} удален из кеша")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_installer_cache():
+    """Возвращает общий экземпляр InstallerCache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = InstallerCache()
+        return _cache
@@ -0,0 +1,206 @@
+import glob
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from core.config import LAUNCHER_DATA_DIR, JAVA_RUNTIME_COMPONENTS, ensure_dir_exists
+from core.java_requirements import get_java_requirement
+from core.java_runtime import JavaRuntimeInstaller, get_platform_string
+from core.tracing import traced
+from core.utils import get_java_major_version
+
+REGISTRY_PATH = LAUNCHER_DATA_DIR / "java_runtimes.json"
+
+# Возможные расположения java внутри папки runtime
+RUNTIME_JAVA_PATHS = [
+    "bin/java.exe",
+    "bin/java",
+    "jre.bundle/Contents/Home/bin/java",
+]
+
+
+def get_system_java_patterns():
+    """Шаблоны путей к системным установкам Java"""
+    if os.name == 'nt':
+        return [
+            "C:/Program Files/Java/*/bin/java.exe",
+            "C:/Program Files (x86)/Java/*/bin/java.exe",
+            "C:/Program Files/Eclipse Adoptium/*/bin/java.exe",
+            "C:/Program Files/Zulu/*/bin/java.exe",
+            str(Path.home() / ".jdks" / "*" / "bin" / "java.exe"),
+        ]
+    return [
+        "/usr/lib/jvm/*/bin/java",
+        "/usr/java/*/bin/java",
+        "/opt/java/*/bin/java",
+        "/Library/Java/JavaVirtualMachines/*/Contents/Home/bin/java",
+        str(Path.home() / ".jdks" / "*" / "bin" / "java"),
+    ]
+
+
+class JavaRuntimeManager:
+    """Реестр установленных Java и выбор нужной Java для версии Minecraft.
+
+    Мажорная версия каждой Java определяется один раз и кешируется
+    вместе с размером и временем изменения файла, поэтому повторные
+    запуски не вызывают `java -version`.
+    """
+
+    def __init__(self, registry_path=REGISTRY_PATH):
+        self.registry_path = Path(registry_path)
+        self._lock = threading.RLock()
+        self.runtimes = self.load_registry()
+
+    def load_registry(self):
+        try:
+            with open(self.registry_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get("runtimes", {})
+        except (OSError, ValueError):
+            return {}
+
+    def save_registry(self):
+        with self._lock:
+            try:
+                ensure_dir_exists(self.registry_path.parent)
+                tmp_path = self.registry_path.with_name(self.registry_path.name + ".part")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"runtimes": self.runtimes}, f, indent=2)
+                os.replace(tmp_path, self.registry_path)
+            except OSError as e:
+                print(f"Ошибка сохранения реестра Java: {e}")
+
+    @traced("java.probe")
+    def probe(self, java_path, component=None):
+        """Возвращает мажорную версию Java, используя кеш реестра"""
+        java_path = str(java_path)
+        try:
+            st = os.stat(java_path)
+        except OSError:
+            with self._lock:
+                if self.runtimes.pop(java_path, None) is not None:
+                    self.save_registry()
+            return 0
+
+        with self._lock:
+            entry = self.runtimes.get(java_path)
+            if entry and entry.get("mtime") == st.st_mtime and entry.get("size") == st.st_size:
+                return entry.get("major", 0)
+
+        major = get_java_major_version(java_path)
+        if major:
+            with self._lock:
+                self.runtimes[java_path] = {
+                    "major": major,
+                    "mtime": st.st_mtime,
+                    "size": st.st_size,
+                    "component": component or (entry or {}).get("component"),
+                }
+                self.save_registry()
+        return major
+
+    def register(self, java_path, component=None):
+        """Добавляет Java в реестр (например, после установки)"""
+        return self.probe(java_path, component)
+
+    def discover(self, minecraft_dir):
+        """Находит Java в папке runtime и в стандартных системных путях"""
+        runtime_dir = Path(minecraft_dir) / "runtime"
+        platform = get_platform_string()
+        found = []
+
+        for component in JAVA_RUNTIME_COMPONENTS:
+            root = runtime_dir / component / platform / component
+            for rel_path in RUNTIME_JAVA_PATHS:
+                candidate = root / rel_path
+                if candidate.is_file():
+                    found.append((str(candidate), component))
+                    break
+
+        system_paths = []
+        for pattern in get_system_java_patterns():
+            system_paths.extend(glob.glob(pattern))
+        java_home = os.environ.get("JAVA_HOME")
+        if java_home:
+            system_paths.append(os.path.join(java_home, "bin", "java.exe" if os.name == 'nt' else "java"))
+        on_path = shutil.which("java")
+        if on_path:
+            system_paths.append(os.path.realpath(on_path))
+        found.extend((path, None) for path in system_paths if os.path.isfile(path))
+
+        for path, component in found:
+            self.probe(path, component)
+
+        return self.list_runtimes()
+
+    def list_runtimes(self):
+        """Возвращает список (путь, мажорная версия, компонент) из реестра"""
+        with self._lock:
+            return [
+                (path, entry.get("major", 0), entry.get("component"))
+                for path, entry in self.runtimes.items()
+                if os.path.exists(path)
+            ]
+
+    def get_requirement(self, minecraft_dir, version_id, mc_version=None):
+        """Возвращает (компонент, мажорная версия Java) для версии"""
+        component, major = get_java_requirement(version_id, minecraft_dir)
+        if mc_version and mc_version != version_id and not (Path(minecraft_dir) / "versions" / version_id).exists():
+            component, major = get_java_requirement(mc_version, minecraft_dir)
+        return component, major
+
+    def find_installed(self, major, component=None, preferred_path=None):
+        """Ищет подходящую Java среди зарегистрированных"""
+        if preferred_path and self.probe(preferred_path) == major:
+            return preferred_path
+
+        runtimes = self.list_runtimes()
+        if component:
+            for path, runtime_major, runtime_component in runtimes:
+                if runtime_component == component and runtime_major == major:
+                    return path
+        for path, runtime_major, runtime_component in runtimes:
+            if runtime_major == major:
+                return path
+        return None
+
+    @traced("java.select")
+    def select_java(self, minecraft_dir, version_id, mc_version=None, preferred_path=None,
+                    install_missing=True, status_callback=None, progress_callback=None,
+                    bytes_callback=None, size_callback=None, cancel=None):
+        """Выбирает (и при необходимости устанавливает) Java для версии.
+
+        Возвращает (путь к java, мажорная версия) или (None, 0).
+        bytes_callback и size_callback получают скачанные байты и объем
+        скачивания runtime. Токен cancel прерывает установку runtime
+        (поднимается Cancelled).
+        """
+        component, major = self.get_requirement(minecraft_dir, version_id, mc_version)
+
+        java_path = self.find_installed(major, component, preferred_path)
+        if not java_path:
+            self.discover(minecraft_dir)
+            java_path = self.find_installed(major, component, preferred_path)
+        if java_path:
+            return java_path, major
+
+        # Для неизвестной Mojang версии Java (component None) ставить нечего
+        if install_missing and component:
+            if status_callback:
+                status_callback(f"Установка Java {major}...")
+            installer = JavaRuntimeInstaller(minecraft_dir, status_callback, progress_callback, cancel=cancel,
+                                             bytes_callback=bytes_callback, size_callback=size_callback)
+            java_path = installer.install(component)
+            return java_path, self.register(java_path, component)
+
+        # Без установки берем ближайшую более новую Java
+        newer = sorted(
+            (runtime_major, path)
+            for path, runtime_major, _ in self.list_runtimes()
+            if runtime_major > major
+        )
+        if newer:
+            return newer[0][1], newer[0][0]
+        return None, 0
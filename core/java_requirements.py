@@ -0,0 +1,191 @@
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+from core.config import CACHE_DIR, JAVA_VERSION_RULES, JAVA_SNAPSHOT_RULES, JAVA_RELEASE_TIME_RULES, ensure_dir_exists
+from core.java_runtime import get_component_for_java
+
+MEMO_PATH = CACHE_DIR / "java_requirements.json"
+
+# Источники в порядке надежности: JSON версии надежнее правил
+SOURCE_JSON = "json"
+SOURCE_RELEASE_TIME = "release_time"
+
+RELEASE_RE = re.compile(r'(?<![\w.])1\.(\d+)(?:\.(\d+))?')
+SNAPSHOT_RE = re.compile(r'(?<!\w)(\d{2})w(\d{2})[a-z~]')
+
+
+def parse_release_version(version_id):
+    """Извлекает (1, major, minor) из id версии, в том числе из id Forge/Fabric"""
+    match = RELEASE_RE.search(version_id)
+    if not match:
+        return None
+    return (1, int(match.group(1)), int(match.group(2) or 0))
+
+
+def parse_snapshot_version(version_id):
+    """Извлекает (год, неделя) из id снапшота вида 24w14a"""
+    match = SNAPSHOT_RE.search(version_id)
+    if not match:
+        return None
+    return (int(match.group(1)), int(match.group(2)))
+
+
+def get_base_version(version_id):
+    """Возвращает id ванильной версии внутри id профиля загрузчика"""
+    match = RELEASE_RE.search(version_id) or SNAPSHOT_RE.search(version_id)
+    return match.group(0) if match else None
+
+
+def get_java_by_rules(version_id):
+    """Определяет мажорную версию Java по диапазонам версий"""
+    release = parse_release_version(version_id)
+    if release:
+        for min_version, java in JAVA_VERSION_RULES:
+            if release >= min_version:
+                return java
+
+    snapshot = parse_snapshot_version(version_id)
+    if snapshot:
+        for min_week, java in JAVA_SNAPSHOT_RULES:
+            if snapshot >= min_week:
+                return java
+
+    # Неизвестный формат (alpha, beta, classic) - это старые версии
+    if version_id[:1] in ("a", "b", "c") or version_id.startswith(("rd-", "inf-")):
+        return 8
+    return JAVA_VERSION_RULES[0][1]
+
+
+def get_java_by_release_time(release_time):
+    """Определяет мажорную версию Java по дате выхода версии"""
+    release_time = str(release_time)
+    for min_time, java in JAVA_RELEASE_TIME_RULES:
+        if release_time >= min_time:
+            return java
+    return 8
+
+
+class JavaRequirementResolver:
+    """Определяет требуемую Java для версии Minecraft.
+
+    Порядок: javaVersion из JSON версии (с учетом inheritsFrom),
+    затем дата выхода версии из манифеста, затем правила по номеру.
+    Результаты хранятся в небольшой таблице на диске.
+    """
+
+    def __init__(self, memo_path=MEMO_PATH):
+        self.memo_path = Path(memo_path)
+        self._lock = threading.Lock()
+        self.memo = self.load_memo()
+
+    def load_memo(self):
+        try:
+            with open(self.memo_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_memo(self):
+        try:
+            ensure_dir_exists(self.memo_path.parent)
+            tmp_path = self.memo_path.with_name(self.memo_path.name + ".part")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.memo, f, separators=(",", ":"))
+            os.replace(tmp_path, self.memo_path)
+        except OSError as e:
+            print(f"Ошибка сохранения таблицы требований Java: {e}")
+
+    def read_version_json(self, minecraft_dir, version_id):
+        """Ищет javaVersion в JSON версии и ее родителях"""
+        versions_dir = Path(minecraft_dir) / "versions"
+        current = version_id
+        visited = set()
+
+        while current and current not in visited:
+            visited.add(current)
+            try:
+                with open(versions_dir / current / f"{current}.json", 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return None
+
+            java_version = data.get("javaVersion")
+            if java_version and java_version.get("majorVersion"):
+                major = int(java_version["majorVersion"])
+                return java_version.get("component") or get_component_for_java(major), major
+
+            current = data.get("inheritsFrom")
+        return None
+
+    def remember(self, version_id, component, major, source):
+        with self._lock:
+            entry = {"component": component, "major": major, "source": source}
+            if self.memo.get(version_id) != entry:
+                self.memo[version_id] = entry
+                self.save_memo()
+
+    def resolve(self, version_id, minecraft_dir=None):
+        """Возвращает (компонент, мажорная версия Java)"""
+        entry = self.memo.get(version_id)
+        if entry and entry.get("source") == SOURCE_JSON:
+            return entry["component"], entry["major"]
+
+        if minecraft_dir:
+            found = self.read_version_json(minecraft_dir, version_id)
+            if found:
+                self.remember(version_id, found[0], found[1], SOURCE_JSON)
+                return found
+
+        if entry:
+            return entry["component"], entry["major"]
+
+        # Профили загрузчиков наследуют требования ванильной версии
+        base_version = get_base_version(version_id)
+        if base_version and base_version != version_id:
+            base_entry = self.memo.get(base_version)
+            if base_entry:
+                return base_entry["component"], base_entry["major"]
+
+        major = get_java_by_rules(version_id)
+        return get_component_for_java(major), major
+
+    def update_release_times(self, versions):
+        """Заполняет таблицу по списку версий из манифеста (id, releaseTime)"""
+        changed = False
+        with self._lock:
+            for version in versions:
+                version_id = version.get("id")
+                release_time = version.get("releaseTime")
+                if not version_id or not release_time:
+                    continue
+                entry = self.memo.get(version_id)
+                if entry and entry.get("source") == SOURCE_JSON:
+                    continue
+                major = get_java_by_release_time(release_time)
+                new_entry = {"component": get_component_for_java(major), "major": major, "source": SOURCE_RELEASE_TIME}
+                if entry != new_entry:
+                    self.memo[version_id] = new_entry
+                    changed = True
+            if changed:
+                self.save_memo()
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """Возвращает общий экземпляр JavaRequirementResolver"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = JavaRequirementResolver()
+        return _resolver
+
+
+def get_java_requirement(version_id, minecraft_dir=None):
+    """Возвращает (компонент, мажорная версия Java) для версии"""
+    return get_resolver().resolve(version_id, minecraft_dir)
@@ -0,0 +1,363 @@
+import json
+import lzma
+import hashlib
+import os
+import platform
+import shutil
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from core.config import JAVA_RUNTIME_COMPONENTS, JAVA_RUNTIME_MANIFEST_URL
+from core.downloads import DownloadError, download_file, file_sha1, get_session, DOWNLOAD_WORKERS
+from core.workers import get_worker_pool
+
+SHARED_INDEX_NAME = ".shared_index.json"
+
+
+def get_platform_string():
+    """Возвращает имя платформы в терминах манифеста Mojang"""
+    system = platform.system()
+    is_32bit = platform.architecture()[0] == "32bit"
+    machine = platform.machine().lower()
+
+    if system == "Windows":
+        if machine in ("arm64", "aarch64"):
+            return "windows-arm64"
+        return "windows-x86" if is_32bit else "windows-x64"
+    if system == "Linux":
+        return "linux-i386" if is_32bit else "linux"
+    if system == "Darwin":
+        return "mac-os-arm64" if machine == "arm64" else "mac-os"
+    return "gamecore"
+
+
+def get_component_for_java(java_version):
+    """Возвращает компонент runtime Mojang для нужной мажорной версии Java.
+
+    Для Java новее всех известных компонентов возвращает None: старый
+    runtime такую версию игры не запустит.
+    """
+    for component, major in sorted(JAVA_RUNTIME_COMPONENTS.items(), key=lambda item: item[1]):
+        if major >= java_version:
+            return component
+    return None
+
+
+def find_java_in_manifest(files):
+    """Находит путь к исполняемому файлу java по списку файлов манифеста"""
+    names = ("bin/java.exe", "bin/java") if os.name == 'nt' else ("bin/java",)
+    candidates = [
+        path for path, info in files.items()
+        if info.get("type") == "file" and path.endswith(names)
+    ]
+    if not candidates:
+        return None
+    # jre.bundle/Contents/Home/bin/java на Mac, bin/java на остальных
+    return min(candidates, key=lambda p: (not p.endswith(names[0]), len(p)))
+
+
+def _decompress_lzma(src, dest, sha1):
+    """Распаковывает LZMA файл с проверкой sha1 (выполняется в процессе-воркере)"""
+    tmp_path = dest + ".part"
+    digest = hashlib.sha1()
+    try:
+        with lzma.open(src, "rb") as fin, open(tmp_path, "wb") as fout:
+            for chunk in iter(lambda: fin.read(1024 * 1024), b""):
+                fout.write(chunk)
+                digest.update(chunk)
+        if digest.hexdigest() != sha1:
+            os.remove(tmp_path)
+            return f"Неверный sha1 после распаковки: {dest}"
+        os.replace(tmp_path, dest)
+        return None
+    except Exception as e:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return f"Ошибка распаковки {dest}: {e}"
+    finally:
+        try:
+            os.remove(src)
+        except OSError:
+            pass
+
+
+class JavaRuntimeInstaller:
+    """Установщик Java runtime из манифеста Mojang.
+
+    Файлы скачиваются параллельно (предпочитаются LZMA-варианты,
+    распаковка идет в пуле процессов), каждый файл проверяется по sha1,
+    а одинаковые файлы разных runtime связываются жесткими ссылками.
+    После отмены токена cancel новые файлы не скачиваются, а install()
+    поднимает Cancelled. Объем скачивания по манифесту сообщается в
+    size_callback до начала, скачанные байты - в bytes_callback.
+    """
+
+    def __init__(self, minecraft_dir, status_callback=None, progress_callback=None, cancel=None,
+                 bytes_callback=None, size_callback=None):
+        self.minecraft_dir = Path(minecraft_dir)
+        self.runtime_dir = self.minecraft_dir / "runtime"
+        self.platform = get_platform_string()
+        self.status_callback = status_callback
+        self.progress_callback = progress_callback
+        self.cancel = cancel
+        self.bytes_callback = bytes_callback
+        self.size_callback = size_callback
+
+    def check_cancelled(self):
+        if self.cancel is not None:
+            self.cancel.check()
+
+    def set_status(self, text):
+        if self.status_callback:
+            self.status_callback(text)
+
+    def set_progress(self, value):
+        if self.progress_callback:
+            self.progress_callback(value)
+
+    def get_runtime_root(self, component):
+        return self.runtime_dir / component / self.platform / component
+
+    def fetch_manifest(self, component):
+        """Возвращает (запись о версии, манифест файлов) для компонента"""
+        response = get_session().get(JAVA_RUNTIME_MANIFEST_URL, timeout=30)
+        response.raise_for_status()
+        entries = response.json().get(self.platform, {}).get(component)
+        if not entries:
+            raise DownloadError(f"Runtime {component} недоступен для платформы {self.platform}")
+
+        entry = entries[0]
+        response = get_session().get(entry["manifest"]["url"], timeout=30)
+        response.raise_for_status()
+        return entry, response.json()
+
+    def load_shared_index(self):
+        try:
+            with open(self.runtime_dir / SHARED_INDEX_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_shared_index(self, index):
+        index_path = self.runtime_dir / SHARED_INDEX_NAME
+        tmp_path = index_path.with_name(index_path.name + ".part")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            print(f"Не удалось сохранить индекс runtime: {e}")
+
+    def link_or_copy(self, src, dest):
+        """Создает жесткую ссылку, при неудаче копирует файл"""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            dest.unlink()
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copy2(src, dest)
+
+    def find_shared_file(self, index, sha1, size, verify=True):
+        """Ищет уже установленный файл с таким же содержимым.
+
+        Перед ссылкой sha1 файла сверяется с манифестом, иначе испорченный
+        файл того же размера разошелся бы по всем компонентам; verify=False
+        только для оценки объема скачивания.
+        """
+        rel_path = index.get(sha1)
+        if not rel_path:
+            return None
+        path = self.runtime_dir / rel_path
+        try:
+            if path.stat().st_size == size and (not verify or file_sha1(path) == sha1):
+                return path
+        except OSError:
+            pass
+        return None
+
+    def get_download_size(self, root, to_download, shared_index):
+        """Сколько байт придется скачать: файлы без нужного размера на месте и без копии в других runtime"""
+        size = 0
+        for rel_path, info in to_download:
+            raw = info["downloads"]["raw"]
+            try:
+                if (root / rel_path).stat().st_size == raw["size"]:
+                    continue
+            except OSError:
+                pass
+            if self.find_shared_file(shared_index, raw["sha1"], raw["size"], verify=False):
+                continue
+            size += (info["downloads"].get("lzma") or raw)["size"]
+        return size
+
+    def install(self, component):
+        """Устанавливает компонент runtime и возвращает точный путь к java"""
+        self.check_cancelled()
+        self.set_status(f"Получение манифеста {component}...")
+        entry, manifest = self.fetch_manifest(component)
+        self.check_cancelled()
+        files = manifest.get("files", {})
+
+        java_rel_path = find_java_in_manifest(files)
+        if not java_rel_path:
+            raise DownloadError(f"В манифесте {component} нет исполняемого файла java")
+
+        root = self.get_runtime_root(component)
+        root.mkdir(parents=True, exist_ok=True)
+        shared_index = self.load_shared_index()
+
+        # Сначала создаем директории, затем раскладываем файлы
+        for rel_path, info in files.items():
+            if info.get("type") == "directory":
+                (root / rel_path).mkdir(parents=True, exist_ok=True)
+
+        to_download = []
+        duplicates = []
+        seen = {}
+        for rel_path, info in files.items():
+            if info.get("type") != "file":
+                continue
+            raw = info["downloads"]["raw"]
+            if raw["sha1"] in seen:
+                duplicates.append((rel_path, seen[raw["sha1"]]))
+                continue
+            seen[raw["sha1"]] = rel_path
+            to_download.append((rel_path, info))
+
+        total = len(to_download) + len(duplicates)
+        done = 0
+        errors = []
+        self.set_status(f"Скачивание Java ({len(to_download)} файлов)...")
+        if self.size_callback:
+            self.size_callback(self.get_download_size(root, to_download, shared_index))
+
+        def install_file(rel_path, info):
+            """Возвращает None, путь к .lzma для распаковки или бросает ошибку"""
+            self.check_cancelled()
+            raw = info["downloads"]["raw"]
+            dest = root / rel_path
+
+            try:
+                if dest.stat().st_size == raw["size"] and file_sha1(dest) == raw["sha1"]:
+                    return None
+            except OSError:
+                pass
+
+            shared = self.find_shared_file(shared_index, raw["sha1"], raw["size"])
+            if shared and shared != dest:
+                self.link_or_copy(shared, dest)
+                return None
+
+            compressed = info["downloads"].get("lzma")
+            if compressed:
+                lzma_path = dest.with_name(dest.name + ".lzma")
+                download_file(compressed["url"], lzma_path, compressed.get("sha1"), compressed.get("size"),
+                              on_bytes=self.bytes_callback, cancel=self.cancel)
+                return str(lzma_path)
+
+            download_file(raw["url"], dest, raw["sha1"], raw["size"],
+                          on_bytes=self.bytes_callback, cancel=self.cancel)
+            return None
+
+        unpack_pool = get_worker_pool()
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as download_pool:
+            download_futures = {
+                download_pool.submit(install_file, rel_path, info): rel_path
+                for rel_path, info in to_download
+            }
+            unpack_futures = {}
+
+            for future in as_completed(download_futures):
+                if self.cancel is not None and self.cancel.is_cancelled:
+                    download_pool.shutdown(wait=True, cancel_futures=True)
+                    break
+                rel_path = download_futures[future]
+                try:
+                    lzma_path = future.result()
+                except Exception as e:
+                    errors.append(f"{rel_path}: {e}")
+                    continue
+
+                if lzma_path:
+                    raw_sha1 = files[rel_path]["downloads"]["raw"]["sha1"]
+                    unpack_futures[unpack_pool.submit(_decompress_lzma, lzma_path, str(root / rel_path), raw_sha1)] = rel_path
+                else:
+                    done += 1
+                    self.set_progress(int(done / total * 100))
+
+            for future in as_completed(unpack_futures):
+                error = future.result()
+                if error:
+                    errors.append(error)
+                else:
+                    done += 1
+                    self.set_progress(int(done / total * 100))
+
+        # Ошибки после отмены - ее следствие (прерванные скачивания)
+        self.check_cancelled()
+        if errors:
+            raise DownloadError(f"Не удалось установить {len(errors)} файлов Java: {errors[0]}")
+
+        for rel_path, source_rel_path in duplicates:
+            self.link_or_copy(root / source_rel_path, root / rel_path)
+            done += 1
+            self.set_progress(int(done / total * 100))
+
+        for rel_path, info in files.items():
+            path = root / rel_path
+            if info.get("type") == "file" and info.get("executable") and os.name != 'nt':
+                path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+            elif info.get("type") == "link" and not os.path.lexists(path):
+                try:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    os.symlink(info["target"], path)
+                except OSError:
+                    pass
+
+        self.write_metadata(component, entry, files, root, shared_index)
+
+        java_path = root / java_rel_path
+        print(f"Java runtime {component} установлен: {java_path}")
+        return str(java_path)
+
+    def write_metadata(self, component, entry, files, root, shared_index):
+        """Записывает .version, .sha1 и обновляет общий индекс файлов"""
+        platform_dir = root.parent
+        try:
+            with open(platform_dir / ".version", 'w', encoding='utf-8') as f:
+                f.write(entry["version"]["name"])
+
+            # Формат официального лаунчера: {path} /#// {sha1} {ctime_ns}
+            with open(platform_dir / f"{component}.sha1", 'w', encoding='utf-8') as f:
+                for rel_path, info in files.items():
+                    if info.get("type") != "file":
+                        continue
+                    ctime = (root / rel_path).stat().st_ctime_ns
+                    f.write(f"{rel_path} /#// {info['downloads']['raw']['sha1']} {ctime}\n")
+        except OSError as e:
+            print(f"Ошибка записи метаданных runtime: {e}")
+
+        for rel_path, info in files.items():
+            if info.get("type") == "file":
+                shared_index.setdefault(
+                    info["downloads"]["raw"]["sha1"],
+                    (root / rel_path).relative_to(self.runtime_dir).as_posix()
+                )
+        self.save_shared_index(shared_index)
+
+
+def install_java_runtime(minecraft_dir, java_version, status_callback=None, progress_callback=None, cancel=None):
+    """Устанавливает runtime Mojang для мажорной версии Java, возвращает путь к java"""
+    started = time.time()
+    component = get_component_for_java(java_version)
+    if component is None:
+        raise DownloadError(f"Нет runtime Mojang для Java {java_version}")
+    installer = JavaRuntimeInstaller(minecraft_dir, status_callback, progress_callback, cancel=cancel)
+    java_path = installer.install(component)
+    print(f"Установка Java {java_version} заняла {time.time() - started:.1f} сек")
+    return java_path
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from core.config import LAUNCHER_DATA_DIR, ensure_dir_exists
+
+LAUNCH_HISTORY_PATH = LAUNCHER_DATA_DIR / "launch_history.db"
+
+# Сколько первых строк отчета о падении просматривать в поисках причины
+CRASH_REPORT_MAX_LINES = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS launches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    minecraft_dir TEXT,
+    version TEXT,
+    mc_version TEXT,
+    loader TEXT,
+    java_path TEXT,
+    java_version INTEGER,
+    jvm_flags TEXT,
+    mods_hash TEXT,
+    stages TEXT,
+    total_seconds REAL,
+    warmup INTEGER,
+    staging INTEGER,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS launch_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    launch_id INTEGER NOT NULL REFERENCES launches(id),
+    time REAL NOT NULL,
+    kind TEXT NOT NULL,
+    value REAL,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS launches_version ON launches(version, started);
+CREATE INDEX IF NOT EXISTS launch_events_launch ON launch_events(launch_id, kind);
+"""
+
+# События запуска, которые становятся известны позже самого запуска.
+# Лаунчер закрывается вскоре после запуска игры, поэтому код выхода
+# известен только для игры, завершившейся в первые секунды (early_exit),
+# а падения позже находятся по отчетам при следующем запуске (crash)
+EVENT_TIME_TO_MENU = "time_to_menu"
+EVENT_EARLY_EXIT = "early_exit"
+EVENT_CRASH = "crash"
+EVENT_CLOSED = "closed"
+
+
+def percentile(values, q):
+    """Перцентиль q (0-100) с линейной интерполяцией, None для пустого списка"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def get_mods_hash(minecraft_dir):
+    """Отпечаток папки mods: имена, размеры и время изменения jar"""
+    mods_dir = Path(minecraft_dir) / "mods"
+    if not mods_dir.is_dir():
+        return None
+    digest = hashlib.sha1()
+    for path in sorted(mods_dir.glob("*.jar")):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        digest.update(f"{path.name}:{st.st_size}:{st.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def find_crash_signature(minecraft_dir, since):
+    """Причина падения игры после момента since: из crash-reports или hs_err_pid*.log JVM"""
+    minecraft_dir = Path(minecraft_dir)
+    candidates = list((minecraft_dir / "crash-reports").glob("crash-*.txt")) + list(minecraft_dir.glob("hs_err_pid*.log"))
+    recent = []
+    for path in candidates:
+        try:
+            if path.stat().st_mtime >= since:
+                recent.append(path)
+        except OSError:
+            continue
+    if not recent:
+        return None
+
+    path = max(recent, key=lambda item: item.stat().st_mtime)
+    description = None
+    cause = None
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for i, line in enumerate(f):
+                if i >= CRASH_REPORT_MAX_LINES:
+                    break
+                line = line.strip()
+                if line.startswith("Description:"):
+                    description = line[len("Description:"):].strip()
+                elif line.startswith("# Problematic frame:"):
+                    description = "JVM crash"
+                elif description and not cause and line and not line.startswith("#"):
+                    # Первая строка после описания - исключение или проблемный фрейм
+                    cause = line
+    except OSError:
+        return None
+    return " | ".join(part for part in (description, cause) if part) or path.name
+
+
+class LaunchHistory:
+    """История запусков в SQLite (режим WAL, только добавление строк).
+
+    Строка в launches пишется при запуске; то, что становится известно
+    позже (время до меню, код выхода, падение), добавляется событиями
+    в launch_events, сами строки запусков не изменяются.
+    """
+
+    def __init__(self, path=LAUNCH_HISTORY_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def connect(self):
+        if self._conn is None:
+            ensure_dir_exists(self.path.parent)
+            conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def record_launch(self, minecraft_dir, version, mc_version=None, loader=None, java_path=None,
+                      java_version=None, jvm_flags=None, stages=None, total_seconds=None,
+                      warmup=False, staging=False, status="ok", started=None):
+        """Добавляет запуск, возвращает его id"""
+        with self._lock:
+            conn = self.connect()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO launches (started, minecraft_dir, version, mc_version, loader, java_path, "
+                    "java_version, jvm_flags, mods_hash, stages, total_seconds, warmup, staging, status) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        started or time.time(), str(minecraft_dir), version, mc_version, loader, java_path,
+                        java_version, json.dumps(jvm_flags or []), get_mods_hash(minecraft_dir),
+                        json.dumps(stages or {}), total_seconds, int(bool(warmup)), int(bool(staging)), status,
+                    ),
+                )
+            return cursor.lastrowid
+
+    def add_event(self, launch_id, kind, value=None, text=None):
+        with self._lock:
+            conn = self.connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO launch_events (launch_id, time, kind, value, text) VALUES (?, ?, ?, ?, ?)",
+                    (launch_id, time.time(), kind, value, text),
+                )
+
+    def last_open_launch(self, minecraft_dir):
+        """Последний успешный запуск папки игры, для которого еще нет события closed"""
+        with self._lock:
+            row = self.connect().execute(
+                "SELECT * FROM launches WHERE minecraft_dir = ? AND status = 'ok' "
+                "AND id NOT IN (SELECT launch_id FROM launch_events WHERE kind = ?) "
+                "ORDER BY id DESC LIMIT 1",
+                (str(minecraft_dir), EVENT_CLOSED),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def finish_previous(self, minecraft_dir, time_to_menu=None):
+        """Дописывает итоги прошлого запуска: время до меню и причину падения.
+
+        Лаунчер закрывается вскоре после запуска игры, поэтому это
+        делается при следующем запуске. Возвращает запуск с найденной
+        причиной падения в ключе crash или None.
+        """
+        launch = self.last_open_launch(minecraft_dir)
+        if not launch:
+            return None
+        if time_to_menu is not None:
+            self.add_event(launch["id"], EVENT_TIME_TO_MENU, value=time_to_menu)
+        launch[EVENT_CRASH] = find_crash_signature(minecraft_dir, launch["started"])
+        if launch[EVENT_CRASH]:
+            self.add_event(launch["id"], EVENT_CRASH, text=launch[EVENT_CRASH])
+        self.add_event(launch["id"], EVENT_CLOSED)
+        return launch
+
+    def metric_values(self, version, metric=EVENT_TIME_TO_MENU, days=30, minecraft_dir=None):
+        """Значения метрики за последние days дней: событие или total_seconds"""
+        since = time.time() - days * 86400
+        params = [version, since]
+        dir_filter = ""
+        if minecraft_dir is not None:
+            dir_filter = " AND l.minecraft_dir = ?"
+            params.append(str(minecraft_dir))
+        if metric == "total":
+            query = ("SELECT l.total_seconds FROM launches l WHERE l.version = ? AND l.started >= ? "
+                     "AND l.status = 'ok' AND l.total_seconds IS NOT NULL" + dir_filter)
+        else:
+            query = ("SELECT e.value FROM launch_events e JOIN launches l ON l.id = e.launch_id "
+                     "WHERE l.version = ? AND l.started >= ?" + dir_filter + " AND e.kind = ? AND e.value IS NOT NULL")
+            params.append(metric)
+        with self._lock:
+            return [row[0] for row in self.connect().execute(query, params)]
+
+    def percentiles(self, version, metric=EVENT_TIME_TO_MENU, days=30, minecraft_dir=None, quantiles=(50, 95)):
+        """{"count", "p50", "p95"} метрики версии за последние days дней"""
+        values = self.metric_values(version, metric, days, minecraft_dir)
+        result = {"count": len(values)}
+        for q in quantiles:
+            result[f"p{q}"] = percentile(values, q)
+        return result
+
+    def recent(self, limit=50):
+        """Последние запуски вместе с их событиями"""
+        with self._lock:
+            conn = self.connect()
+            launches = [dict(row) for row in conn.execute("SELECT * FROM launches ORDER BY id DESC LIMIT ?", (limit,))]
+            for launch in launches:
+                launch["stages"] = json.loads(launch["stages"] or "{}")
+                launch["jvm_flags"] = json.loads(launch["jvm_flags"] or "[]")
+                for row in conn.execute("SELECT kind, value, text FROM launch_events WHERE launch_id = ? ORDER BY id",
+                                        (launch["id"],)):
+                    launch[row["kind"]] = row["text"] if row["value"] is None else row["value"]
+        return launches
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_launch_history():
+    """Возвращает общий экземпляр LaunchHistory"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = LaunchHistory()
+        return _history
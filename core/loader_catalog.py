@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import requests
+
+from core.config import CACHE_DIR, ensure_dir_exists
+from core.downloads import get_session
+
+FORGE_MAVEN_METADATA_URL = "https://maven.minecraftforge.net/net/minecraftforge/forge/maven-metadata.xml"
+FORGE_PROMOTIONS_URL = "https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json"
+FABRIC_META_URL = "https://meta.fabricmc.net/v2"
+
+CATALOG_PATH = CACHE_DIR / "loader_catalog.json"
+FABRIC_PROFILES_DIR = CACHE_DIR / "fabric_profiles"
+
+# Через сколько секунд данные считаются устаревшими и перепроверяются
+CATALOG_TTL = 24 * 60 * 60
+
+
+def build_forge_index(maven_versions, promos):
+    """Строит индекс Forge: версия Minecraft -> {recommended, latest, versions}.
+
+    Версии Forge хранятся без префикса версии Minecraft
+    (1.20.1-47.1.3 -> 47.1.3, 1.7.10-10.13.4.1614-1.7.10 -> 10.13.4.1614-1.7.10),
+    как в FORGE_VERSIONS.
+    """
+    index = {}
+    for maven_version in maven_versions:
+        mc_version, sep, forge_version = maven_version.partition("-")
+        if not sep:
+            continue
+        entry = index.setdefault(mc_version, {"versions": [], "maven": {}})
+        entry["versions"].append(forge_version)
+        entry["maven"][forge_version.split("-")[0]] = maven_version
+
+    for key, forge_version in promos.items():
+        mc_version, sep, kind = key.rpartition("-")
+        if not sep or kind not in ("recommended", "latest"):
+            continue
+        entry = index.setdefault(mc_version, {"versions": [], "maven": {}})
+        maven_version = entry["maven"].get(forge_version)
+        entry[kind] = maven_version.partition("-")[2] if maven_version else forge_version
+
+    for entry in index.values():
+        if entry["versions"] and "latest" not in entry:
+            # maven-metadata.xml перечисляет версии от старых к новым
+            entry["latest"] = entry["versions"][-1]
+
+    return index
+
+
+class LoaderCatalog:
+    """Локальный кеш каталогов версий Forge и Fabric.
+
+    Каталоги скачиваются один раз, хранятся на диске и перепроверяются
+    условными запросами (ETag/Last-Modified) после истечения CATALOG_TTL.
+    Ответы на запросы берутся из индекса в памяти и работают без сети.
+    """
+
+    def __init__(self, catalog_path=CATALOG_PATH, profiles_dir=FABRIC_PROFILES_DIR):
+        self.catalog_path = Path(catalog_path)
+        self.profiles_dir = Path(profiles_dir)
+        self._lock = threading.RLock()
+        self.data = self.load()
+
+    def load(self):
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault("forge", {})
+        data.setdefault("fabric", {})
+        return data
+
+    def save(self):
+        with self._lock:
+            try:
+                ensure_dir_exists(self.catalog_path.parent)
+                tmp_path = self.catalog_path.with_name(self.catalog_path.name + ".part")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, separators=(",", ":"))
+                os.replace(tmp_path, self.catalog_path)
+            except OSError as e:
+                print(f"Ошибка сохранения каталога загрузчиков: {e}")
+
+    def is_stale(self, entry):
+        return not entry or time.time() - entry.get("checked", 0) > CATALOG_TTL
+
+    def conditional_get(self, url, validators):
+        """GET с If-None-Match/If-Modified-Since. Возвращает (response, изменилось ли)"""
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = get_session().get(url, headers=headers, timeout=15)
+        if response.status_code == 304:
+            return response, False
+        response.raise_for_status()
+        validators["etag"] = response.headers.get("ETag")
+        validators["last_modified"] = response.headers.get("Last-Modified")
+        return response, True
+
+    # ===== Forge =====
+
+    def refresh_forge(self, force=False):
+        """Обновляет каталог Forge (maven-metadata.xml и promotions)"""
+        with self._lock:
+            forge = self.data["forge"]
+            if not force and not self.is_stale(forge):
+                return True
+
+        try:
+            validators = dict(forge.get("validators", {}))
+            metadata_validators = validators.setdefault("metadata", {})
+            promos_validators = validators.setdefault("promos", {})
+
+            response, changed_metadata = self.conditional_get(FORGE_MAVEN_METADATA_URL, metadata_validators)
+            maven_versions = forge.get("maven_versions", [])
+            if changed_metadata:
+                root = ET.fromstring(response.content)
+                maven_versions = [node.text for node in root.iter("version") if node.text]
+
+            response, changed_promos = self.conditional_get(FORGE_PROMOTIONS_URL, promos_validators)
+            promos = forge.get("promos", {})
+            if changed_promos:
+                promos = response.json().get("promos", {})
+
+            with self._lock:
+                if changed_metadata or changed_promos or "index" not in forge:
+                    forge["maven_versions"] = maven_versions
+                    forge["promos"] = promos
+                    forge["index"] = build_forge_index(maven_versions, promos)
+                forge["validators"] = validators
+                forge["checked"] = time.time()
+                self.save()
+            return True
+        except (requests.RequestException, ET.ParseError, ValueError) as e:
+            print(f"Не удалось обновить каталог Forge: {e}")
+            return False
+
+    def get_forge_version(self, mc_version, kind="recommended"):
+        """Возвращает версию Forge для Minecraft из кеша (без сети)"""
+        entry = self.data["forge"].get("index", {}).get(mc_version)
+        if not entry:
+            return None
+        if kind == "recommended":
+            return entry.get("recommended") or entry.get("latest")
+        return entry.get("latest")
+
+    def get_forge_versions(self, mc_version):
+        """Возвращает все известные версии Forge для Minecraft"""
+        entry = self.data["forge"].get("index", {}).get(mc_version)
+        return list(entry["versions"]) if entry else []
+
+    def get_forge_maven_version(self, mc_version, forge_version):
+        """Возвращает полный id артефакта в Maven (например 1.12.2-14.23.5.2860)"""
+        entry = self.data["forge"].get("index", {}).get(mc_version)
+        if not entry:
+            return None
+        return entry["maven"].get(forge_version.split("-")[0])
+
+    # ===== Fabric =====
+
+    def refresh_fabric(self, mc_version, force=False):
+        """Обновляет список загрузчиков Fabric для версии Minecraft"""
+        with self._lock:
+            entry = self.data["fabric"].get(mc_version, {})
+            if not force and not self.is_stale(entry):
+                return True
+
+        try:
+            validators = dict(entry.get("validators", {}))
+            response, changed = self.conditional_get(f"{FABRIC_META_URL}/versions/loader/{mc_version}", validators)
+            with self._lock:
+                new_entry = dict(entry)
+                if changed:
+                    new_entry["loaders"] = [
+                        {"version": item["loader"]["version"], "stable": item["loader"].get("stable", False)}
+                        for item in response.json()
+                    ]
+                new_entry["validators"] = validators
+                new_entry["checked"] = time.time()
+                self.data["fabric"][mc_version] = new_entry
+                self.save()
+            return True
+        except (requests.RequestException, ValueError, KeyError) as e:
+            print(f"Не удалось обновить каталог Fabric для {mc_version}: {e}")
+            return False
+
+    def get_fabric_loader(self, mc_version, kind="recommended"):
+        """Возвращает версию Fabric Loader для Minecraft из кеша (без сети)"""
+        loaders = self.data["fabric"].get(mc_version, {}).get("loaders")
+        if not loaders:
+            return None
+        if kind == "recommended":
+            for loader in loaders:
+                if loader["stable"]:
+                    return loader["version"]
+        # Fabric meta отдает загрузчики от новых к старым
+        return loaders[0]["version"]
+
+    def get_fabric_profile(self, mc_version, loader_version):
+        """Возвращает полный профиль Fabric (JSON версии со всеми библиотеками).
+
+        Профиль загрузчика неизменен, поэтому скачивается один раз.
+        """
+        profile_path = self.profiles_dir / f"{mc_version}-{loader_version}.json"
+        try:
+            with open(profile_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        try:
+            url = f"{FABRIC_META_URL}/versions/loader/{mc_version}/{loader_version}/profile/json"
+            response = get_session().get(url, timeout=15)
+            response.raise_for_status()
+            profile = response.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"Не удалось получить профиль Fabric {loader_version} для {mc_version}: {e}")
+            return None
+
+        try:
+            ensure_dir_exists(self.profiles_dir)
+            tmp_path = profile_path.with_name(profile_path.name + ".part")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(profile, f, indent=2)
+            os.replace(tmp_path, profile_path)
+        except OSError as e:
+            print(f"Ошибка сохранения профиля Fabric: {e}")
+        return profile
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_loader_catalog():
+    """Возвращает общий экземпляр LoaderCatalog"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = LoaderCatalog()
+        return _catalog
@@ -0,0 +1,242 @@
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from core.config import LAUNCHER_DATA_DIR, ensure_dir_exists
+
+MEMORY_DIR = LAUNCHER_DATA_DIR / "memory"
+
+# Переменная окружения, включающая учет памяти без флага --memory
+MEMORY_ENV_VAR = "PYLAUNCHER_MEMORY"
+
+# Сколько кадров стека хранить для каждого выделения (1 - дешевле всего, хватает для строк)
+TRACE_FRAMES = 1
+
+# Сколько строк показывать в отчете о разнице снимков
+REPORT_TOP_LINES = 15
+
+# Подсистемы с меньшей памятью или изменением в отчет не попадают
+REPORT_MIN_SIZE = 10 * 1024
+
+# Бюджеты памяти Python, МБ: насколько пик tracemalloc во время сценария
+# превысил память, занятую до него. Сценарии идут по очереди и оставляют
+# объекты живыми (окно startup), но чужая память в бюджет не входит.
+# --memory-check завершается с ошибкой, если сценарий вышел за бюджет
+MEMORY_CEILINGS_MB = {
+    "startup": 40,
+    "version_selector": 60,
+    "install": 150,
+}
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+# Папки лаунчера - подсистемы; остальное делится по пакетам site-packages
+PACKAGE_SUBSYSTEMS = ("core", "gui", "dialogs", "threads")
+
+
+def memory_tracking_requested(argv):
+    """Нужно ли включить учет памяти: --memory, --memory-check или PYLAUNCHER_MEMORY"""
+    if os.environ.get(MEMORY_ENV_VAR, "") not in ("", "0"):
+        return True
+    return any(arg == "--memory" or arg.startswith("--memory-check") for arg in argv)
+
+
+def subsystem_of(filename):
+    """Подсистема файла: папка лаунчера, пакет из site-packages или stdlib"""
+    path = Path(filename)
+    try:
+        parts = path.resolve().relative_to(PACKAGE_ROOT).parts
+    except (ValueError, OSError):
+        parts = path.parts
+        if "site-packages" in parts:
+            package = parts[parts.index("site-packages") + 1]
+            return package.split(".")[0]
+        return "stdlib" if filename.endswith(".py") else "other"
+    if parts and parts[0] in PACKAGE_SUBSYSTEMS:
+        return parts[0]
+    return "launcher"
+
+
+def format_mb(size):
+    return f"{size / 1024 / 1024:.2f} МБ"
+
+
+class MemoryTracker:
+    """Учет памяти Python через tracemalloc.
+
+    Снимок (snapshot) подписывается меткой: "startup", "install" и т.д.
+    Отчет по снимку показывает память по подсистемам (core, gui,
+    dialogs, threads, PyQt5, minecraft_launcher_lib...) и разницу с
+    прошлым снимком по подсистемам и строкам кода. Учитываются только
+    выделения Python; память Qt (виджеты, картинки) видна в RSS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.previous = None
+        self.report_path = None
+
+    @property
+    def enabled(self):
+        return tracemalloc.is_tracing()
+
+    def start(self, frames=TRACE_FRAMES):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def take(self):
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def by_subsystem(self, stats):
+        totals = {}
+        for stat in stats:
+            subsystem = subsystem_of(stat.traceback[0].filename)
+            totals[subsystem] = totals.get(subsystem, 0) + getattr(stat, "size_diff", stat.size)
+        return totals
+
+    def snapshot(self, label):
+        """Снимает память, возвращает текст отчета и дописывает его в отчет сессии"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            snapshot = self.take()
+            previous, self.previous = self.previous, (label, snapshot)
+            current, peak = tracemalloc.get_traced_memory()
+
+            lines = [f"== {label}: {format_mb(current)} (пик {format_mb(peak)})"]
+            totals = self.by_subsystem(snapshot.statistics("filename"))
+            for subsystem, size in sorted(totals.items(), key=lambda item: item[1], reverse=True):
+                if size >= REPORT_MIN_SIZE:
+                    lines.append(f"  {subsystem:<24} {format_mb(size)}")
+
+            if previous is not None:
+                diff = snapshot.compare_to(previous[1], "lineno")
+                changes = self.by_subsystem(snapshot.compare_to(previous[1], "filename"))
+                lines.append(f"-- разница с {previous[0]}:")
+                for subsystem, size in sorted(changes.items(), key=lambda item: abs(item[1]), reverse=True):
+                    if abs(size) >= REPORT_MIN_SIZE:
+                        lines.append(f"  {subsystem:<24} {size / 1024 / 1024:+.2f} МБ")
+                lines.append("-- строки:")
+                for stat in diff[:REPORT_TOP_LINES]:
+                    frame = stat.traceback[0]
+                    lines.append(f"  {stat.size_diff / 1024:+10.1f} КБ  {stat.count_diff:+7d}  "
+                                 f"{subsystem_of(frame.filename)}: {os.path.basename(frame.filename)}:{frame.lineno}")
+
+        report = "\n".join(lines)
+        print(report)
+        self.append_report(report)
+        return report
+
+    def append_report(self, report):
+        try:
+            if self.report_path is None:
+                ensure_dir_exists(MEMORY_DIR)
+                self.report_path = MEMORY_DIR / f"memory-{time.strftime('%Y%m%d-%H%M%S')}.txt"
+            with open(self.report_path, 'a', encoding='utf-8') as f:
+                f.write(report + "\n\n")
+        except OSError as e:
+            print(f"Ошибка записи отчета о памяти: {e}")
+
+    def measure(self, label, func):
+        """Выполняет сценарий и сравнивает пик памяти с бюджетом MEMORY_CEILINGS_MB.
+
+        Пик считается от памяти, занятой до сценария, чтобы бюджет не
+        зависел от прошлых сценариев. Возвращает (пик в байтах, бюджет
+        в байтах или None, уложился ли)
+        """
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(peak - before, 0)
+        self.snapshot(label)
+        ceiling = MEMORY_CEILINGS_MB.get(label)
+        ceiling = ceiling * 1024 * 1024 if ceiling is not None else None
+        return peak, ceiling, ceiling is None or peak <= ceiling
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_memory_tracker():
+    """Возвращает общий учет памяти (включается через start)"""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = MemoryTracker()
+    return _tracker
+
+
+def run_memory_check(app, scenarios):
+    """Прогоняет сценарии и сравнивает пик памяти Python с MEMORY_CEILINGS_MB.
+
+    Возвращает код выхода: 1, если хоть один сценарий вышел за бюджет,
+    не смог выполниться или был пропущен - пропуск не считается успехом.
+    Модули лаунчера импортируются здесь: core.memory загружается до Qt,
+    чтобы учет памяти включился раньше всех импортов.
+    """
+    import minecraft_launcher_lib
+    from core.config import DEFAULT_MC_VERSION
+    from core.transaction import install_vanilla_version
+    from dialogs.version_selector import VersionSelectorDialog
+    from gui.main_window import WONDERFULAND
+
+    tracker = get_memory_tracker()
+    if not tracker.enabled:
+        print("Учет памяти не включен, бюджеты проверить нельзя")
+        return 1
+    state = {}
+
+    def startup():
+        state["launcher"] = WONDERFULAND()
+        state["launcher"].show()
+        app.processEvents()
+
+    def version_selector():
+        dialog = VersionSelectorDialog(state["launcher"], DEFAULT_MC_VERSION)
+        dialog.show()
+        dialog.loading_thread.join(60)
+        app.processEvents()
+        dialog.close()
+
+    def install():
+        with tempfile.TemporaryDirectory() as minecraft_dir:
+            install_vanilla_version(minecraft_dir, DEFAULT_MC_VERSION)
+
+    steps = {"startup": startup, "version_selector": version_selector, "install": install}
+    failed = False
+    print(f"{'сценарий':<20} {'пик':>10} {'бюджет':>10}")
+    for name in ["startup"] + [name for name in scenarios if name != "startup"]:
+        if name not in steps:
+            print(f"{name:<20} ПРОПУЩЕН: неизвестный сценарий")
+            failed = True
+            continue
+        if name == "version_selector":
+            # Без сети диалог покажет модальную ошибку и проверка зависнет
+            try:
+                minecraft_launcher_lib.utils.get_version_list()
+            except Exception as e:
+                print(f"{name:<20} ПРОПУЩЕН: нет списка версий ({e})")
+                failed = True
+                continue
+        try:
+            peak, ceiling, ok = tracker.measure(name, steps[name])
+        except Exception as e:
+            print(f"{name:<20} ОШИБКА: {e}")
+            failed = True
+            continue
+        failed = failed or not ok
+        budget = f"{ceiling / 1024 / 1024:.0f} МБ" if ceiling else "-"
+        print(f"{name:<20} {peak / 1024 / 1024:7.1f} МБ {budget:>10}  {'OK' if ok else 'ПРЕВЫШЕН'}")
+    return 1 if failed else 0
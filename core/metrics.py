@@ -0,0 +1,416 @@
+import json
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from core.config import LAUNCHER_DATA_DIR, ensure_dir_exists
+
+METRICS_DIR = LAUNCHER_DATA_DIR / "metrics"
+
+# Файл для textfile collector node_exporter (путь можно заменить переменной окружения)
+METRICS_TEXTFILE = METRICS_DIR / "pylauncher.prom"
+
+# Счетчики и гистограммы прошлых сессий: лаунчер живет несколько секунд,
+# без сохранения счетчики каждый раз начинались бы с нуля
+METRICS_STATE_PATH = METRICS_DIR / "state.json"
+
+# Переменные окружения: включение метрик, путь textfile и порт /metrics
+METRICS_ENV_VAR = "PYLAUNCHER_METRICS"
+METRICS_TEXTFILE_ENV_VAR = "PYLAUNCHER_METRICS_TEXTFILE"
+METRICS_PORT_ENV_VAR = "PYLAUNCHER_METRICS_PORT"
+
+# /metrics слушает только локальный адрес
+METRICS_HOST = "127.0.0.1"
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы гистограмм длительностей, секунды
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+# Интервал замера памяти и CPU игры, секунды
+GAME_SAMPLE_INTERVAL = 1.0
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Метрика с метками; значения хранятся по кортежу значений меток"""
+
+    kind = None
+
+    def __init__(self, registry, name, help_text, labels=()):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def family(self, openmetrics):
+        return self.name
+
+    def samples(self):
+        """Строки значений без заголовков (вызывается под блокировкой реестра)"""
+        return [f"{self.name}{format_labels(self.labels, key)} {format_value(value)}"
+                for key, value in sorted(self.values.items())]
+
+    def dump(self):
+        return [[list(key), value] for key, value in self.values.items()]
+
+    def restore(self, items):
+        for key, value in items:
+            if len(key) == len(self.labels):
+                self.values[tuple(key)] = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not self.registry.enabled:
+            return
+        key = self.key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def family(self, openmetrics):
+        # В OpenMetrics имя семейства счетчика - без суффикса _total
+        return self.name[:-len("_total")] if openmetrics else self.name
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        with self.registry.lock:
+            self.values[self.key(labels)] = value
+
+    def dump(self):
+        # Текущее состояние не переносится в следующую сессию
+        return []
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help_text, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(registry, name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        key = self.key(labels)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def samples(self):
+        lines = []
+        for key, state in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["buckets"]):
+                cumulative += count
+                labels = format_labels(self.labels, key, [("le", repr(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labels, key, [("le", "+Inf")])
+            lines.append(f"{self.name}_bucket{labels} {state['count']}")
+            labels = format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+    def restore(self, items):
+        for key, state in items:
+            if len(key) == len(self.labels) and len(state.get("buckets", ())) == len(self.buckets):
+                self.values[tuple(key)] = state
+
+
+class GameMonitor(threading.Thread):
+    """Замеряет память и время CPU процесса игры (нужен psutil)"""
+
+    def __init__(self, registry, pid, interval=GAME_SAMPLE_INTERVAL):
+        super().__init__(name="game-monitor", daemon=True)
+        self.registry = registry
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def sample(self, process):
+        rss = process.memory_info().rss
+        cpu = sum(process.cpu_times()[:2])
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+                cpu += sum(child.cpu_times()[:2])
+            except psutil.Error:
+                continue
+        self.peak_rss = max(self.peak_rss, rss)
+        self.registry.game_rss_bytes.set(rss)
+        self.registry.game_peak_rss_bytes.set(self.peak_rss)
+        self.registry.game_cpu_seconds.set(cpu)
+
+    def run(self):
+        try:
+            process = psutil.Process(self.pid)
+            while True:
+                self.sample(process)
+                if self._stop_event.wait(self.interval):
+                    break
+        except psutil.Error:
+            # Игра завершилась - остаются последние замеры
+            pass
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = self.server.registry.exposition(openmetrics).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsRegistry:
+    """Метрики лаунчера и игры в формате Prometheus/OpenMetrics.
+
+    Выключены по умолчанию: пока реестр не включен, inc/set/observe
+    сразу возвращаются. Включенный реестр отдает метрики файлом для
+    textfile collector (пишется после каждого запуска и при закрытии
+    лаунчера) и, если задан порт, по HTTP на 127.0.0.1. Сеть для этого
+    не нужна. Память и CPU игры замеряются только с открытым портом:
+    ради замеров лаунчер не закрывается после запуска игры.
+    """
+
+    def __init__(self, enabled=False, state_path=METRICS_STATE_PATH):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.state_path = state_path
+        self.metrics = []
+        self.server = None
+        self.monitor = None
+
+        self.download_bytes = self.counter(
+            "launcher_download_bytes_total", "Скачано байт по хостам", ("host",))
+        self.downloads = self.counter(
+            "launcher_downloads_total", "Скачанные файлы по хостам и результату", ("host", "result"))
+        self.cache_requests = self.counter(
+            "launcher_cache_requests_total", "Обращения к кешам лаунчера", ("cache", "result"))
+        self.install_duration = self.histogram(
+            "launcher_install_duration_seconds", "Длительность установки версии", ("loader", "result"))
+        self.launches = self.counter(
+            "launcher_launches_total", "Запуски игры по результату", ("loader", "status"))
+        self.launch_duration = self.histogram(
+            "launcher_launch_duration_seconds", "Подготовка запуска от нажатия Играть до старта процесса", ("loader",))
+        self.launch_stage = self.histogram(
+            "launcher_launch_stage_seconds", "Длительность шагов графа запуска", ("stage",))
+        self.time_to_menu = self.histogram(
+            "launcher_time_to_menu_seconds", "Время от старта процесса игры до главного меню", ("version",))
+        self.game_crashes = self.counter(
+            "launcher_game_crashes_total", "Падения игры", ("kind",))
+        self.game_rss_bytes = self.gauge(
+            "launcher_game_rss_bytes", "Память процесса игры (RSS), замеряется при открытом порте метрик")
+        self.game_peak_rss_bytes = self.gauge(
+            "launcher_game_peak_rss_bytes", "Наибольшая память процесса игры при открытом порте метрик")
+        self.game_cpu_seconds = self.gauge(
+            "launcher_game_cpu_seconds", "Время CPU процесса игры, замеряется при открытом порте метрик")
+        self.gui_stall = self.histogram(
+            "launcher_gui_stall_seconds", "Зависания цикла событий GUI дольше порога")
+
+        if enabled:
+            self.enable()
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(self, name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, labels=()):
+        metric = Gauge(self, name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=DURATION_BUCKETS):
+        metric = Histogram(self, name, help_text, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.load_state()
+        self.enabled = True
+
+    def exposition(self, openmetrics=False):
+        """Текст метрик: OpenMetrics или text format 0.0.4 Prometheus"""
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                family = metric.family(openmetrics)
+                lines.append(f"# TYPE {family} {metric.kind}")
+                lines.append(f"# HELP {family} {metric.help}")
+                lines.extend(metric.samples())
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            for metric in self.metrics:
+                metric.restore(state.get(metric.name, []))
+
+    def save_state(self):
+        with self.lock:
+            state = {metric.name: metric.dump() for metric in self.metrics}
+        try:
+            ensure_dir_exists(self.state_path.parent)
+            tmp_path = self.state_path.with_name(self.state_path.name + ".part")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Ошибка сохранения метрик: {e}")
+
+    def write_textfile(self, path=None):
+        """Пишет метрики для textfile collector (атомарно: collector не увидит половину файла)"""
+        path = path or os.environ.get(METRICS_TEXTFILE_ENV_VAR) or METRICS_TEXTFILE
+        path = os.fspath(path)
+        try:
+            ensure_dir_exists(os.path.dirname(path))
+            tmp_path = path + ".part"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.exposition())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Ошибка записи метрик в {path}: {e}")
+            return None
+        return path
+
+    def start_server(self, port):
+        """Запускает /metrics на 127.0.0.1:port в фоновом потоке"""
+        if self.server is not None:
+            return
+        self.enable()
+        try:
+            self.server = ThreadingHTTPServer((METRICS_HOST, port), _MetricsHandler)
+        except OSError as e:
+            print(f"Не удалось открыть порт метрик {port}: {e}")
+            return
+        self.server.daemon_threads = True
+        self.server.registry = self
+        threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"Метрики: http://{METRICS_HOST}:{self.server.server_address[1]}/metrics")
+
+    def watch_game(self, pid):
+        """Начинает замеры памяти и CPU процесса игры.
+
+        Только при открытом порте метрик: замеры идут в процессе
+        лаунчера, и ради них лаунчер остается открытым после запуска.
+        """
+        if not self.enabled or self.server is None:
+            return
+        if psutil is None:
+            print("psutil не установлен, память и CPU игры не замеряются")
+            return
+        self.stop_game_watch()
+        self.game_peak_rss_bytes.set(0)
+        self.monitor = GameMonitor(self, pid)
+        self.monitor.start()
+
+    @property
+    def watching_game(self):
+        """Идут ли замеры процесса игры"""
+        return self.monitor is not None and self.monitor.is_alive()
+
+    def stop_game_watch(self):
+        """Останавливает замеры игры, возвращает наибольший RSS или None"""
+        monitor, self.monitor = self.monitor, None
+        if monitor is None:
+            return None
+        monitor.stop()
+        monitor.join(GAME_SAMPLE_INTERVAL)
+        return monitor.peak_rss or None
+
+    def flush(self):
+        """Сохраняет состояние и файл для textfile collector посреди сессии"""
+        if not self.enabled:
+            return
+        self.save_state()
+        self.write_textfile()
+
+    def finish(self):
+        """Сохраняет метрики и останавливает сервер (при закрытии лаунчера)"""
+        if not self.enabled:
+            return
+        self.stop_game_watch()
+        self.flush()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Возвращает общий реестр метрик; включен, если задана PYLAUNCHER_METRICS"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry(enabled=os.environ.get(METRICS_ENV_VAR, "") not in ("", "0"))
+    return _metrics
@@ -0,0 +1,285 @@
+import cProfile
+import json
+import linecache
+import os
+import sys
+import threading
+import time
+
+from core.config import LAUNCHER_DATA_DIR, ensure_dir_exists
+
+PROFILES_DIR = LAUNCHER_DATA_DIR / "profiles"
+
+# Переменная окружения, включающая профилирование без флага --profile
+# (значение cprofile дополнительно включает cProfile по этапам)
+PROFILE_ENV_VAR = "PYLAUNCHER_PROFILE"
+
+# Интервал выборки стеков всех потоков, мс (~100 раз в секунду)
+SAMPLE_INTERVAL_MS = 10
+
+# Сколько последних сессий профилирования хранить
+PROFILES_KEEP = 10
+
+# Кадры ожидания: поток в них не занимает CPU, такие выборки отбрасываются
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("connection.py", "wait"),
+}
+
+# Вызовы C-кода, в которых поток ждет (QThread.wait, app.exec_, time.sleep):
+# последний кадр Python - строка с таким вызовом
+IDLE_CALLS = (".wait(", ".exec_(", "sleep(", ".join(", ".communicate(")
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Отмечает этап в текущем потоке; в режиме cProfile профилирует самый внешний этап"""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.profile = None
+
+    def __enter__(self):
+        ident = threading.get_ident()
+        stack = self.profiler.stages.setdefault(ident, [])
+        stack.append(self.name)
+        if self.profiler.use_cprofile and len(stack) == 1:
+            self.profile = cProfile.Profile()
+            try:
+                self.profile.enable()
+            except ValueError:
+                # В потоке уже работает другой профилировщик
+                self.profile = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profile is not None:
+            self.profile.disable()
+            self.profiler.save_cprofile(self.name, self.profile)
+        stack = self.profiler.stages.get(threading.get_ident())
+        if stack:
+            stack.pop()
+        return False
+
+
+class SamplingProfiler:
+    """Выборочный профилировщик всех потоков лаунчера.
+
+    Отдельный поток раз в SAMPLE_INTERVAL_MS снимает стеки всех потоков
+    через sys._current_frames() и считает одинаковые стеки. Выборка
+    идет по настенному времени, ожидания (Event.wait, очереди,
+    QThread.wait, цикл событий Qt) отбрасываются, поэтому остается в
+    основном время работы. Корнем стека служат имя потока и этап запуска
+    (stage()), чтобы время установки и подготовки делилось по шагам.
+
+    Итог сессии пишется в PROFILES_DIR в двух видах: свернутые стеки
+    (flamegraph.pl, inferno, speedscope) и формат speedscope.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.use_cprofile = False
+        self.stages = {}
+        self.counts = {}
+        self.samples = 0
+        self.session = None
+        self._labels = {}
+        self._idle_lines = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, use_cprofile=False):
+        if self._thread is not None:
+            return
+        self.use_cprofile = use_cprofile
+        self.counts = {}
+        self.samples = 0
+        self.session = time.strftime("%Y%m%d-%H%M%S")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name="sampling-profiler", daemon=True)
+        self.enabled = True
+        self._thread.start()
+        print(f"Профилирование включено, результаты: {PROFILES_DIR}")
+
+    def stop(self):
+        """Останавливает выборку и сохраняет профиль сессии, возвращает путь"""
+        if self._thread is None:
+            return None
+        self.enabled = False
+        self._stop_event.set()
+        self._thread.join(1)
+        self._thread = None
+        return self.export()
+
+    def stage(self, name):
+        """Контекст этапа для выборок текущего потока"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def is_idle(self, frame):
+        code = frame.f_code
+        key = (code, frame.f_lineno)
+        idle = self._idle_lines.get(key)
+        if idle is None:
+            line = linecache.getline(code.co_filename, frame.f_lineno)
+            idle = ((os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+                    or any(call in line for call in IDLE_CALLS))
+            self._idle_lines[key] = idle
+        return idle
+
+    def take_sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own or self.is_idle(frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self.label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            name = names.get(ident, "")
+            if not name or name.startswith("Dummy"):
+                # Потоки QThread не зарегистрированы в threading
+                name = "QThread"
+            stage = self.stages.get(ident)
+            key = (name, stage[-1] if stage else "", tuple(stack))
+            with self._lock:
+                self.counts[key] = self.counts.get(key, 0) + 1
+        self.samples += 1
+
+    def run(self):
+        interval = SAMPLE_INTERVAL_MS / 1000
+        while not self._stop_event.wait(interval):
+            self.take_sample()
+
+    def collapsed(self):
+        """Свернутые стеки: "поток;[этап];функция;... число" по строке на стек"""
+        with self._lock:
+            counts = dict(self.counts)
+        lines = []
+        for (thread, stage, stack), count in sorted(counts.items()):
+            root = [thread] + ([f"[{stage}]"] if stage else [])
+            lines.append(f"{';'.join(root + list(stack))} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self):
+        """Профиль в формате speedscope: отдельный профиль на каждый поток"""
+        with self._lock:
+            counts = dict(self.counts)
+        frames = []
+        frame_index = {}
+        profiles = {}
+        for (thread, stage, stack), count in sorted(counts.items()):
+            names = ([f"[{stage}]"] if stage else []) + list(stack)
+            indexes = []
+            for name in names:
+                if name not in frame_index:
+                    frame_index[name] = len(frames)
+                    frames.append({"name": name})
+                indexes.append(frame_index[name])
+            profile = profiles.setdefault(thread, {"samples": [], "weights": []})
+            profile["samples"].append(indexes)
+            profile["weights"].append(count * SAMPLE_INTERVAL_MS)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(profile["weights"]),
+                    "samples": profile["samples"],
+                    "weights": profile["weights"],
+                }
+                for thread, profile in profiles.items()
+            ],
+            "name": f"launcher {self.session}",
+            "exporter": "pylauncher",
+        }
+
+    def session_dir(self):
+        return PROFILES_DIR / f"session-{self.session}"
+
+    def write(self, path, text):
+        tmp_path = path.with_name(path.name + ".part")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def export(self):
+        if not self.counts:
+            return None
+        session_dir = self.session_dir()
+        try:
+            ensure_dir_exists(session_dir)
+            self.write(session_dir / "stacks.collapsed.txt", self.collapsed())
+            self.write(session_dir / "profile.speedscope.json", json.dumps(self.speedscope()))
+            self.prune()
+        except OSError as e:
+            print(f"Ошибка сохранения профиля: {e}")
+            return None
+        print(f"Профиль сессии ({self.samples} выборок): {session_dir}")
+        return session_dir
+
+    def save_cprofile(self, stage, profile):
+        """Сохраняет cProfile этапа рядом с профилем сессии (открывается snakeviz, pstats)"""
+        session_dir = self.session_dir()
+        path = session_dir / f"{stage}-{threading.get_ident()}.prof"
+        try:
+            ensure_dir_exists(session_dir)
+            profile.dump_stats(str(path))
+        except OSError as e:
+            print(f"Ошибка сохранения cProfile {stage}: {e}")
+
+    def prune(self):
+        sessions = sorted(PROFILES_DIR.glob("session-*"))
+        for old in sessions[:-PROFILES_KEEP]:
+            for path in old.iterdir():
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            try:
+                old.rmdir()
+            except OSError:
+                pass
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler():
+    """Возвращает общий профилировщик (выключен, пока не вызван start)"""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = SamplingProfiler()
+    return _profiler
@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# Интервал доставки прогресса в GUI (~30 раз в секунду)
+PROGRESS_INTERVAL_MS = 33
+
+# За сколько последних секунд считается скорость скачивания
+THROUGHPUT_WINDOW = 3.0
+
+
+class ProgressNode:
+    """Узел дерева прогресса: этап запуска или установки.
+
+    Доля узла с детьми - взвешенная сумма долей детей, узла с известным
+    объемом - скачанные байты от общего объема, иначе - заданная доля.
+    Методы можно вызывать из любого потока: они только меняют поля
+    под блокировкой дерева, в GUI ничего не отправляется.
+    """
+
+    def __init__(self, tree, name, weight=1.0):
+        self.tree = tree
+        self.name = name
+        self.weight = weight
+        self.children = []
+        self.value = 0.0
+        self.bytes_done = 0
+        self.bytes_total = None
+
+    def child(self, name, weight=1.0):
+        node = ProgressNode(self.tree, name, weight)
+        with self.tree.lock:
+            self.children.append(node)
+            self.tree.dirty = True
+        return node
+
+    def update(self, fraction=None, status=None):
+        with self.tree.lock:
+            if fraction is not None:
+                self.value = min(max(fraction, 0.0), 1.0)
+            if status is not None:
+                self.tree.status = status
+            self.tree.dirty = True
+
+    def set_total_bytes(self, total):
+        with self.tree.lock:
+            self.bytes_total = total
+            self.tree.dirty = True
+
+    def add_bytes(self, count):
+        with self.tree.lock:
+            self.bytes_done += count
+            self.tree.record_bytes(count)
+
+    def finish(self):
+        with self.tree.lock:
+            self.value = 1.0
+            if self.bytes_total:
+                self.bytes_done = self.bytes_total
+            self.tree.dirty = True
+
+    def fraction(self):
+        """Доля выполнения 0..1 (вызывается под блокировкой дерева)"""
+        if self.children:
+            total_weight = sum(child.weight for child in self.children)
+            if total_weight > 0:
+                return sum(child.weight * child.fraction() for child in self.children) / total_weight
+        if self.bytes_total:
+            return min(1.0, self.bytes_done / self.bytes_total)
+        return self.value
+
+    def remaining_bytes(self):
+        remaining = max(0, self.bytes_total - self.bytes_done) if self.bytes_total else 0
+        return remaining + sum(child.remaining_bytes() for child in self.children)
+
+
+class ProgressTree:
+    """Дерево прогресса одной операции и замер скорости скачивания"""
+
+    def __init__(self, name=""):
+        self.lock = threading.Lock()
+        self.root = ProgressNode(self, name)
+        self.status = ""
+        self.dirty = True
+        self.started = time.monotonic()
+        self.samples = deque()
+
+    def record_bytes(self, count):
+        """Вызывается под блокировкой"""
+        now = time.monotonic()
+        self.samples.append((now, count))
+        while self.samples and self.samples[0][0] < now - THROUGHPUT_WINDOW:
+            self.samples.popleft()
+        self.dirty = True
+
+    def snapshot(self):
+        """Возвращает (доля, статус, байт/с, оставшиеся секунды или None), если что-то изменилось"""
+        with self.lock:
+            if not self.dirty:
+                return None
+            self.dirty = False
+            fraction = self.root.fraction()
+            now = time.monotonic()
+            window = min(THROUGHPUT_WINDOW, max(now - self.started, 1.0))
+            rate = sum(count for moment, count in self.samples if moment >= now - window) / window
+            remaining = self.root.remaining_bytes()
+            if remaining and rate > 0:
+                eta = remaining / rate
+            elif 0.05 < fraction < 1.0:
+                # Объем неизвестен - оценка по скорости роста доли
+                elapsed = now - self.started
+                eta = elapsed * (1 - fraction) / fraction
+            else:
+                eta = None
+            return fraction, self.status, rate, eta
+
+
+def format_progress_text(status, rate, eta):
+    """Статус с текущей скоростью и оставшимся временем скачивания"""
+    parts = []
+    if rate >= 1024:
+        parts.append(f"{rate / 1024 / 1024:.1f} МБ/с")
+    if eta is not None:
+        parts.append(f"~{int(eta)} сек" if eta < 90 else f"~{int(eta / 60)} мин")
+    return f"{status} ({', '.join(parts)})" if parts and status else status
+
+
+class ProgressAggregator(QObject):
+    """Собирает прогресс всех потоков в дерево и отдает его в GUI не чаще
+    PROGRESS_INTERVAL_MS: таймер в потоке GUI опрашивает дерево, поэтому
+    поток, сообщающий о каждом файле или блоке, не создает событий Qt.
+
+    Узел текущего потока задается через use(); update_status и
+    update_progress главного окна пишут в него.
+    """
+
+    changed = pyqtSignal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tree = ProgressTree()
+        self._local = threading.local()
+        self.timer = QTimer(self)
+        self.timer.setInterval(PROGRESS_INTERVAL_MS)
+        self.timer.timeout.connect(self.flush)
+
+    @property
+    def root(self):
+        return self.tree.root
+
+    def reset(self, name=""):
+        self.tree = ProgressTree(name)
+        return self.tree.root
+
+    def current(self):
+        """Узел, в который пишет текущий поток (по умолчанию корень)"""
+        node = getattr(self._local, "node", None)
+        return node if node is not None and node.tree is self.tree else self.tree.root
+
+    def use(self, node, func):
+        """Оборачивает func: пока она выполняется, текущим узлом потока будет node.
+
+        Узел завершается только после успешного func: упавший шаг
+        не показывается выполненным на 100%.
+        """
+        def wrapper():
+            self._local.node = node
+            try:
+                result = func()
+            finally:
+                self._local.node = None
+            node.finish()
+            return result
+        return wrapper
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.flush()
+
+    def flush(self):
+        state = self.tree.snapshot()
+        if state is None:
+            return
+        fraction, status, rate, eta = state
+        self.changed.emit(int(fraction * 100), format_progress_text(status, rate, eta))
@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import minecraft_launcher_lib
+
+from core.metrics import get_metrics
+
+# Потоков копирования: с сетевого диска выгоднее читать параллельно
+STAGING_WORKERS = 8
+
+# Какую часть свободного места в RAM-диске можно занять
+RAM_DISK_MAX_FRACTION = 0.5
+
+# Файлы, которые не нужны ни одному запуску дольше этого срока, удаляются из staging, сек
+STAGING_MAX_AGE = 14 * 24 * 3600
+
+# Предел размера staging: сверх него удаляются давно не запускавшиеся файлы
+STAGING_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Недокопированные .part моложе этого срока не трогаются, сек
+PART_MIN_AGE = 3600
+
+
+def get_default_staging_root(required_bytes=0):
+    """RAM-диск (/dev/shm), если он есть и на нем хватает места, иначе локальная временная папка"""
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        try:
+            if required_bytes <= shutil.disk_usage(shm).free * RAM_DISK_MAX_FRACTION:
+                return shm / f"pylauncher-{os.getuid()}"
+        except OSError:
+            pass
+    return Path(tempfile.gettempdir()) / "pylauncher_staging"
+
+
+class StagingMirror:
+    """Копия classpath и natives версии на быстром локальном диске.
+
+    Файлы хранятся по sha1 в objects/ и раскладываются жесткими ссылками
+    в views/<папка игры>/ с теми же относительными путями (Forge ищет
+    библиотеки по именам файлов). Повторно копируются только изменившиеся
+    файлы: размер и mtime исходника сверяются с manifest.json. Сохранения,
+    настройки и ассеты остаются в исходной папке игры.
+
+    После каждого запуска prune() удаляет файлы, не нужные ни одному
+    запуску дольше STAGING_MAX_AGE, и самые давние сверх STAGING_MAX_BYTES,
+    а также объекты и ссылки в views/, на которые манифест не ссылается.
+    """
+
+    def __init__(self, minecraft_dir, staging_root=None):
+        self.minecraft_dir = Path(minecraft_dir).absolute()
+        self.root = Path(staging_root) if staging_root else None
+        self._lock = threading.Lock()
+        self.copied = 0
+        self.reused = 0
+
+    def setup(self, required_bytes):
+        if self.root is None:
+            self.root = get_default_staging_root(required_bytes)
+        dir_key = hashlib.sha1(str(self.minecraft_dir).encode("utf-8")).hexdigest()[:12]
+        self.objects_dir = self.root / "objects"
+        self.view_dir = self.root / "views" / dir_key
+        self.manifest_path = self.root / "manifest.json"
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self):
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".part")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"Ошибка сохранения манифеста staging: {e}")
+
+    def is_stageable(self, path):
+        """Переносятся только файлы из libraries/ и versions/ папки игры"""
+        path = os.path.abspath(path)
+        for sub in ("libraries", "versions"):
+            if path.startswith(str(self.minecraft_dir / sub) + os.sep):
+                return True
+        return False
+
+    def object_path(self, sha1):
+        return self.objects_dir / sha1[:2] / sha1
+
+    def view_path(self, path):
+        return self.view_dir / os.path.relpath(os.path.abspath(path), self.minecraft_dir)
+
+    def stage_file(self, path):
+        """Кладет файл в staging, возвращает путь копии"""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            entry = self.manifest.get(path)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns and self.object_path(entry[2]).exists():
+            sha1 = entry[2]
+            self.reused += 1
+        else:
+            # Исходник читается один раз: sha1 считается во время копирования
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.objects_dir / f"{threading.get_ident()}.part"
+            digest = hashlib.sha1()
+            with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+                for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            sha1 = digest.hexdigest()
+            source = self.object_path(sha1)
+            if source.exists():
+                os.remove(tmp_path)
+            else:
+                source.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, source)
+            self.copied += 1
+
+        source = self.object_path(sha1)
+        target = self.view_path(path)
+        try:
+            linked = os.path.samefile(source, target)
+        except OSError:
+            linked = False
+        if not linked:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(target.name + ".part")
+            try:
+                os.link(source, tmp_path)
+            except OSError:
+                shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+
+        with self._lock:
+            self.manifest[path] = [st.st_size, st.st_mtime_ns, sha1, time.time(), str(target)]
+        return str(target)
+
+    def prune(self, staged_paths):
+        """Вытесняет из staging старые файлы, файлы текущего запуска остаются.
+
+        Записи манифеста без времени запуска (старый формат) считаются
+        давними. Объекты и ссылки в views/, на которые не ссылается ни одна
+        оставшаяся запись, удаляются - иначе RAM-диск только растет.
+        """
+        now = time.time()
+        with self._lock:
+            entries = sorted(self.manifest.items(),
+                             key=lambda item: item[1][3] if len(item[1]) > 4 else 0, reverse=True)
+            kept = {}
+            objects = set()
+            total = 0
+            for path, entry in entries:
+                if path not in staged_paths:
+                    if len(entry) < 5 or now - entry[3] > STAGING_MAX_AGE:
+                        continue
+                    if entry[2] not in objects and total + entry[0] > STAGING_MAX_BYTES:
+                        continue
+                if entry[2] not in objects:
+                    objects.add(entry[2])
+                    total += entry[0]
+                kept[path] = entry
+            self.manifest = kept
+        views = {entry[4] for entry in kept.values()}
+
+        removed = 0
+        freed = 0
+        for folder, referenced in ((self.objects_dir, lambda path: os.path.basename(path) in objects),
+                                   (self.root / "views", lambda path: path in views)):
+            for current, _, names in os.walk(folder, topdown=False):
+                for name in names:
+                    path = os.path.join(current, name)
+                    if referenced(path):
+                        continue
+                    try:
+                        st = os.stat(path)
+                        if name.endswith(".part") and now - st.st_mtime < PART_MIN_AGE:
+                            continue
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    removed += 1
+                    # Объект занимает место, пока на него есть ссылка из views/
+                    if st.st_nlink <= 1:
+                        freed += st.st_size
+                if current != str(folder):
+                    try:
+                        os.rmdir(current)
+                    except OSError:
+                        pass
+        if removed:
+            print(f"Staging: удалено старых файлов {removed}, освобождено {freed / 1024 / 1024:.1f} МБ")
+
+    def split_arg(self, arg):
+        """Делит аргумент на префикс (-Dkey=) и список путей"""
+        prefix = ""
+        value = arg
+        if arg.startswith("-D") and "=" in arg:
+            prefix, value = arg.split("=", 1)
+            prefix += "="
+        return prefix, value.split(os.pathsep)
+
+    def collect_command_files(self, command):
+        """Файлы и папки natives из команды, которые можно перенести"""
+        files = set()
+        natives_dirs = set()
+        for arg in command[1:]:
+            _, segments = self.split_arg(arg)
+            for segment in segments:
+                if not self.is_stageable(segment):
+                    continue
+                if os.path.isfile(segment):
+                    files.add(segment)
+                elif arg.startswith("-Djava.library.path=") and os.path.isdir(segment):
+                    natives_dirs.add(segment)
+
+        for natives_dir in natives_dirs:
+            for current, _, names in os.walk(natives_dir):
+                files.update(os.path.join(current, name) for name in names)
+        return sorted(files), natives_dirs
+
+    def stage_command(self, command):
+        """Переносит файлы команды в staging и возвращает команду с новыми путями.
+
+        Переносятся только конкретные файлы (classpath, module path, jar
+        версии) и папка natives; папки вроде -DlibraryDirectory остаются
+        на месте, потому что в них лежат файлы, которых нет в команде.
+        """
+        started = time.time()
+        files, natives_dirs = self.collect_command_files(command)
+        self.setup(sum(os.path.getsize(path) for path in files))
+
+        with ThreadPoolExecutor(max_workers=STAGING_WORKERS) as executor:
+            staged = dict(zip(files, executor.map(self.stage_file, files)))
+        for natives_dir in natives_dirs:
+            staged[natives_dir] = str(self.view_path(natives_dir))
+        self.prune({os.path.abspath(path) for path in files})
+        self.save_manifest()
+
+        result = [command[0]]
+        for arg in command[1:]:
+            prefix, segments = self.split_arg(arg)
+            if any(segment in staged for segment in segments):
+                arg = prefix + os.pathsep.join(staged.get(segment, segment) for segment in segments)
+            result.append(arg)
+
+        metrics = get_metrics()
+        metrics.cache_requests.inc(self.reused, cache="staging", result="hit")
+        metrics.cache_requests.inc(self.copied, cache="staging", result="miss")
+        print(f"Staging в {self.root}: файлов {len(files)}, скопировано {self.copied}, "
+              f"уже было {self.reused}, {time.time() - started:.2f} сек")
+        return result
+
+
+def drop_file_cache(path):
+    """Просит ОС выбросить файл из кеша, чтобы замер был честным (только POSIX)"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def benchmark_read(paths):
+    """Читает файлы целиком со сброшенным кешом ОС, возвращает секунды"""
+    for path in paths:
+        drop_file_cache(path)
+    started = time.time()
+    for path in paths:
+        with open(path, "rb") as f:
+            while f.read(1024 * 1024):
+                pass
+    return time.time() - started
+
+
+def benchmark_staging(minecraft_dir, version_id, staging_root=None):
+    """Сравнивает чтение classpath версии из папки игры и из staging"""
+    options = {"username": "Player", "uuid": "0", "token": "0"}
+    command = minecraft_launcher_lib.command.get_minecraft_command(version_id, str(minecraft_dir), options)
+    mirror = StagingMirror(minecraft_dir, staging_root)
+    staged_command = mirror.stage_command(command)
+
+    original, _ = mirror.collect_command_files(command)
+    staged = [str(mirror.view_path(path)) for path in original]
+    size = sum(os.path.getsize(path) for path in original) / 1024 / 1024
+
+    baseline = benchmark_read(original)
+    fast = benchmark_read(staged)
+    print(f"Файлов: {len(original)}, {size:.1f} МБ")
+    print(f"Папка игры: {baseline:.2f} сек ({size / max(baseline, 1e-6):.1f} МБ/с)")
+    print(f"Staging:    {fast:.2f} сек ({size / max(fast, 1e-6):.1f} МБ/с)")
+    return baseline, fast, staged_command
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Использование: python -m core.staging <папка игры> <версия> [папка staging]")
+        sys.exit(1)
+    benchmark_staging(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
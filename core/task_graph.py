@@ -0,0 +1,153 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from core.profiler import get_profiler
+from core.tasks import Cancelled
+from core.tracing import get_tracer
+
+
+class LaunchError(Exception):
+    """Ошибка шага подготовки запуска, сообщение показывается пользователю"""
+    pass
+
+
+class TaskGraphError(Exception):
+    """Обязательная задача графа завершилась с ошибкой"""
+
+    def __init__(self, task, error):
+        super().__init__(f"{task}: {error}")
+        self.task = task
+        self.error = error
+
+
+class TaskGraph:
+    """Граф задач: задача запускается в пуле потоков, как только
+    выполнены все ее зависимости, независимые задачи идут параллельно.
+
+    Ошибка необязательной задачи (optional=True) только печатается,
+    зависимые от нее задачи все равно выполняются. После ошибки
+    обязательной задачи новые задачи не запускаются, а run() поднимает
+    TaskGraphError. После отмены токена новые задачи тоже не запускаются,
+    run() дожидается начатых и поднимает Cancelled. Для каждой задачи
+    записывается время начала и конца. wait() позволяет из другого
+    потока дождаться окончания run() с таймаутом.
+    """
+
+    def __init__(self, name="", max_workers=4):
+        self.name = name
+        self.max_workers = max_workers
+        self.tasks = {}
+        self.results = {}
+        self.timings = {}
+        self._started = None
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def add(self, name, func, deps=(), optional=False):
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Неизвестная зависимость {dep} у задачи {name}")
+        self.tasks[name] = {"func": func, "deps": tuple(deps), "optional": optional}
+
+    def run_task(self, name):
+        start = time.perf_counter() - self._started
+        status = "ok"
+        try:
+            with get_tracer().span(name, self.name or "task"), get_profiler().stage(name):
+                self.results[name] = self.tasks[name]["func"]()
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            self.timings[name] = {
+                "start": start,
+                "end": time.perf_counter() - self._started,
+                "status": status,
+                "thread": threading.current_thread().name,
+            }
+        return self.results[name]
+
+    def run(self, cancel=None):
+        """Выполняет граф, возвращает результаты задач {имя: результат}"""
+        self._started = time.perf_counter()
+        self._idle.clear()
+        try:
+            error = self.execute(cancel)
+        finally:
+            self._idle.set()
+
+        self.print_summary()
+        # Ошибки после отмены - ее следствие (прерванные скачивания)
+        if cancel is not None and cancel.is_cancelled:
+            raise Cancelled(f"Граф {self.name} отменен")
+        if error:
+            raise error
+        return self.results
+
+    def wait(self, timeout=None):
+        """Ждет окончания run() не дольше timeout секунд, возвращает True если граф не выполняется"""
+        return self._idle.wait(timeout)
+
+    def execute(self, cancel):
+        """Запускает задачи по мере готовности зависимостей, возвращает ошибку обязательной задачи"""
+        pending = list(self.tasks)
+        running = {}
+        failed = set()
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name or "task") as executor:
+            while pending or running:
+                cancelled = cancel is not None and cancel.is_cancelled
+                for name in list(pending):
+                    deps = self.tasks[name]["deps"]
+                    blocked = [dep for dep in deps if dep in failed and not self.tasks[dep]["optional"]]
+                    if blocked or error or cancelled:
+                        pending.remove(name)
+                        failed.add(name)
+                        self.timings[name] = {"start": None, "end": None, "status": "skipped", "thread": None}
+                    elif all(dep in self.results or dep in failed for dep in deps):
+                        pending.remove(name)
+                        running[executor.submit(self.run_task, name)] = name
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed.add(name)
+                        if self.tasks[name]["optional"]:
+                            print(f"Задача {name} не выполнена: {e}")
+                        elif error is None:
+                            error = TaskGraphError(name, e)
+                            error.__cause__ = e
+        return error
+
+    def critical_path(self):
+        """Цепочка задач, определившая общее время: от последней задачи
+        назад по зависимости, которая закончилась позже остальных"""
+        done = {name: timing for name, timing in self.timings.items() if timing["end"] is not None}
+        if not done:
+            return []
+        path = [max(done, key=lambda name: done[name]["end"])]
+        while True:
+            deps = [dep for dep in self.tasks[path[-1]]["deps"] if dep in done]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda dep: done[dep]["end"]))
+        return list(reversed(path))
+
+    def print_summary(self):
+        total = max((timing["end"] or 0 for timing in self.timings.values()), default=0)
+        print(f"Граф {self.name}: {total:.2f} сек")
+        for name in self.tasks:
+            timing = self.timings.get(name)
+            if not timing or timing["start"] is None:
+                print(f"  {name:<16} пропущена")
+                continue
+            print(f"  {name:<16} {timing['start']:7.2f} -> {timing['end']:7.2f}  "
+                  f"({timing['end'] - timing['start']:.2f} сек, {timing['status']})")
+        print(f"  критический путь: {' -> '.join(self.critical_path())}")
@@ -0,0 +1,113 @@
+import threading
+
+# Состояния задачи лаунчера
+PENDING = "pending"
+RUNNING = "running"
+CANCELLING = "cancelling"
+CANCELLED = "cancelled"
+FAILED = "failed"
+DONE = "done"
+
+FINAL_STATES = (CANCELLED, FAILED, DONE)
+
+# Сколько ждать остановки фоновых потоков при закрытии лаунчера (мс)
+SHUTDOWN_TIMEOUT_MS = 800
+
+
+class Cancelled(Exception):
+    """Операция прервана через CancellationToken"""
+    pass
+
+
+class CancellationToken:
+    """Токен отмены, который передается вниз во все долгие операции.
+
+    Мягкая отмена: циклы проверяют is_cancelled или вызывают check().
+    Жесткая отмена: on_cancel() регистрирует действие, которое прерывает
+    блокирующий вызов (закрыть HTTP-ответ, убить процесс); оно выполняется
+    сразу в потоке, вызвавшем cancel().
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Ошибка обработчика отмены: {e}")
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled("Операция отменена")
+
+    def wait(self, timeout=None):
+        """Ждет отмены не дольше timeout секунд, возвращает True если отменено"""
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback):
+        """Регистрирует действие при отмене; если уже отменено - выполняет сразу"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return callback
+        callback()
+        return callback
+
+    def remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class TaskHandle:
+    """Состояние одной задачи лаунчера (установка, запуск) и ее токен отмены.
+
+    pending -> running -> done / failed, или через cancelling -> cancelled.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.token = CancellationToken()
+        self.state = PENDING
+        self.message = ""
+        self._lock = threading.Lock()
+
+    def set_state(self, state, message=""):
+        with self._lock:
+            if self.state in FINAL_STATES:
+                return
+            self.state = state
+            self.message = message
+        print(f"Задача {self.name}: {state}{' - ' + message if message else ''}")
+
+    def start(self):
+        self.set_state(CANCELLING if self.token.is_cancelled else RUNNING)
+
+    def cancel(self):
+        if self.state not in FINAL_STATES:
+            self.set_state(CANCELLING)
+        self.token.cancel()
+
+    def finish(self, success, message=""):
+        if self.token.is_cancelled:
+            self.set_state(CANCELLED, message)
+        else:
+            self.set_state(DONE if success else FAILED, message)
+
+    @property
+    def is_active(self):
+        return self.state not in FINAL_STATES and self.state != PENDING
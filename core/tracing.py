@@ -0,0 +1,206 @@
+import functools
+import json
+import os
+import threading
+import time
+
+from core.config import LAUNCHER_DATA_DIR, ensure_dir_exists
+from core.profiler import get_profiler
+
+TRACES_DIR = LAUNCHER_DATA_DIR / "traces"
+
+# Переменная окружения, включающая трассировку без флага --trace
+TRACE_ENV_VAR = "PYLAUNCHER_TRACE"
+
+# Сколько последних трасс хранить
+TRACES_KEEP = 20
+
+
+class _NullSpan:
+    """Отрезок выключенного трассировщика: ничего не делает"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **args):
+        """Добавляет аргументы, известные только к концу отрезка"""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_event({
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": self.tracer.to_us(self.start),
+            "dur": (time.perf_counter() - self.start) * 1e6,
+            "args": self.args,
+        })
+        return False
+
+
+class Tracer:
+    """Трассировка запуска: отрезки (span) и отметки (instant) по потокам.
+
+    Выключенный трассировщик возвращает общий пустой отрезок, поэтому
+    в обычном режиме цена вызова - одна проверка флага. Трасса пишется
+    в формате Chrome trace (открывается в chrome://tracing и Perfetto).
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.events = []
+        self.thread_names = {}
+        self.origin = time.perf_counter()
+        self.launch_id = None
+
+    def enable(self):
+        self.enabled = True
+
+    def to_us(self, moment):
+        return (moment - self.origin) * 1e6
+
+    def add_event(self, event):
+        thread = threading.current_thread()
+        event["pid"] = os.getpid()
+        event["tid"] = thread.ident
+        with self._lock:
+            self.thread_names[thread.ident] = thread.name
+            self.events.append(event)
+
+    def span(self, name, category="launch", **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    def instant(self, name, category="launch", **args):
+        """Отметка момента (нажатие "Играть", первая строка вывода игры)"""
+        if not self.enabled:
+            return
+        self.add_event({
+            "name": name,
+            "cat": category,
+            "ph": "i",
+            "s": "g",
+            "ts": self.to_us(time.perf_counter()),
+            "args": args,
+        })
+
+    def begin_launch(self):
+        """Начинает трассу нового запуска, события прошлого отбрасываются"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.events = []
+            self.origin = time.perf_counter()
+            self.launch_id = time.strftime("%Y%m%d-%H%M%S")
+
+    def chrome_trace(self):
+        with self._lock:
+            events = list(self.events)
+            names = dict(self.thread_names)
+        pid = os.getpid()
+        meta = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "launcher"}}]
+        meta += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in names.items()
+        ]
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+
+    def export(self, path=None):
+        """Записывает трассу в JSON Chrome trace, возвращает путь"""
+        if not self.enabled or not self.events:
+            return None
+        path = path or TRACES_DIR / f"launch-{self.launch_id or time.strftime('%Y%m%d-%H%M%S')}.json"
+        try:
+            ensure_dir_exists(path.parent)
+            tmp_path = path.with_name(path.name + ".part")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.chrome_trace(), f)
+            os.replace(tmp_path, path)
+            self.prune(path.parent)
+        except OSError as e:
+            print(f"Ошибка сохранения трассы: {e}")
+            return None
+        return path
+
+    def prune(self, traces_dir):
+        traces = sorted(traces_dir.glob("launch-*.json"))
+        for old in traces[:-TRACES_KEEP]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def summary(self):
+        """Краткая сводка: отрезки по времени начала и отметки от начала запуска"""
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+        lines = []
+        for event in events:
+            start = event["ts"] / 1000
+            if event["ph"] == "X":
+                lines.append(f"  {start:9.1f} мс  {event['name']:<28} {event['dur'] / 1000:9.1f} мс")
+            else:
+                lines.append(f"  {start:9.1f} мс  * {event['name']}")
+        return "\n".join(lines)
+
+    def finish_launch(self):
+        """Сохраняет трассу и печатает сводку"""
+        path = self.export()
+        if path:
+            print(f"Трасса запуска: {path}")
+            print(self.summary())
+        return path
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Возвращает общий трассировщик; включен, если задана PYLAUNCHER_TRACE"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(enabled=os.environ.get(TRACE_ENV_VAR, "") not in ("", "0"))
+    return _tracer
+
+
+def traced(name, category="launch"):
+    """Декоратор: вызов функции записывается отрезком трассы и этапом профиля"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            profiler = get_profiler()
+            if not tracer.enabled and not profiler.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name, category), profiler.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
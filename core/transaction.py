@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from core.config import VERSION_MANIFEST_URL
+from core.downloads import download_file, download_many, get_session, is_file_valid
+from core.tasks import Cancelled
+from core.utils import write_json_atomic
+from core.verify import VersionVerifier
+
+STAGING_DIR_NAME = ".staging"
+JOURNAL_NAME = "journal.json"
+
+
+class InstallTransaction:
+    """Установка версии через промежуточную папку и журнал.
+
+    Файлы версии собираются в versions/.staging/<id>/files и переносятся
+    в versions/<id> только в publish(): новая папка переименовывается
+    целиком, в существующую файлы переносятся по одному, JSON версии
+    последним. Журнал хранит выполненные шаги, поэтому прерванная
+    установка продолжается с того места, где остановилась.
+    """
+
+    def __init__(self, minecraft_dir, version_id):
+        self.minecraft_dir = Path(minecraft_dir)
+        self.version_id = version_id
+        self.version_dir = self.minecraft_dir / "versions" / version_id
+        self.staging_dir = self.minecraft_dir / "versions" / STAGING_DIR_NAME / version_id
+        self.files_dir = self.staging_dir / "files"
+        self.journal_path = self.staging_dir / JOURNAL_NAME
+        self.journal = self.load_journal()
+
+    def load_journal(self):
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_journal(self):
+        write_json_atomic(self.journal_path, self.journal, indent=2)
+
+    @property
+    def pending(self):
+        """Есть ли незавершенная установка этой версии"""
+        return self.journal_path.exists()
+
+    def begin(self, kind):
+        """Начинает установку или продолжает прерванную"""
+        if self.journal:
+            print(f"Продолжение прерванной установки {self.version_id}: {', '.join(self.journal.get('done', [])) or 'нет шагов'}")
+        else:
+            self.journal = {"version": self.version_id, "kind": kind, "started": time.time(), "done": []}
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        self.save_journal()
+
+    def is_done(self, step):
+        return step in self.journal.get("done", [])
+
+    def mark_done(self, step):
+        if not self.is_done(step):
+            self.journal.setdefault("done", []).append(step)
+            self.save_journal()
+
+    def staged_path(self, name):
+        return self.files_dir / name
+
+    def write_json(self, name, data):
+        write_json_atomic(self.staged_path(name), data, indent=2)
+
+    def read_json(self, name):
+        try:
+            with open(self.staged_path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self):
+        """Переносит собранные файлы в папку версии и закрывает журнал"""
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        if not self.version_dir.exists():
+            os.replace(self.files_dir, self.version_dir)
+        else:
+            # JSON версии переносится последним: пока его нет, версия считается неустановленной
+            names = sorted(os.listdir(self.files_dir), key=lambda name: name == f"{self.version_id}.json")
+            for name in names:
+                os.replace(self.files_dir / name, self.version_dir / name)
+        self.finish()
+
+    def finish(self):
+        """Закрывает журнал (файлы уже на месте)"""
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        try:
+            self.staging_dir.parent.rmdir()
+        except OSError:
+            pass
+        self.journal = {}
+
+    def abort(self):
+        """Отменяет установку и удаляет промежуточные файлы"""
+        self.finish()
+
+
+def is_install_pending(minecraft_dir, version_id):
+    """Была ли установка версии прервана"""
+    return (Path(minecraft_dir) / "versions" / STAGING_DIR_NAME / version_id / JOURNAL_NAME).exists()
+
+
+def is_version_complete(minecraft_dir, version_id, need_jar=True):
+    """Версия установлена полностью: есть JSON (и jar) и нет незавершенного журнала"""
+    version_dir = Path(minecraft_dir) / "versions" / version_id
+    if is_install_pending(minecraft_dir, version_id):
+        return False
+    if not (version_dir / f"{version_id}.json").exists():
+        return False
+    return not need_jar or (version_dir / f"{version_id}.jar").exists()
+
+
+def cancellable_callback(callback, cancel):
+    """Оборачивает callback minecraft_launcher_lib проверкой токена отмены"""
+    callback = dict(callback or {})
+
+    def wrap(func):
+        def wrapper(*args):
+            cancel.check()
+            if func:
+                func(*args)
+        return wrapper
+
+    return {key: wrap(callback.get(key)) for key in ("setStatus", "setProgress", "setMax")}
+
+
+def prefetch_version_files(minecraft_dir, version_id, on_bytes=None, on_size=None, cancel=None):
+    """Скачивает недостающие файлы версии общим загрузчиком.
+
+    Список файлов строится по JSON версии и индексу ассетов, поэтому
+    объем скачивания известен заранее: on_size(байт) вызывается до
+    скачивания, on_bytes(байт) - по мере него. Файлы с верным размером
+    считаются скачанными, их sha1 сверяет minecraft_launcher_lib.
+    """
+    minecraft_dir = Path(minecraft_dir)
+    json_path = minecraft_dir / "versions" / version_id / f"{version_id}.json"
+    if not json_path.exists():
+        response = get_session().get(VERSION_MANIFEST_URL, timeout=30)
+        response.raise_for_status()
+        entry = next((item for item in response.json()["versions"] if item["id"] == version_id), None)
+        if entry is None:
+            # Неизвестную версию сообщит minecraft_launcher_lib (VersionNotFound)
+            return
+        download_file(entry["url"], json_path, entry.get("sha1"), cancel=cancel)
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        asset_index = json.load(f).get("assetIndex")
+    if asset_index:
+        index_path = minecraft_dir / "assets" / "indexes" / f"{asset_index['id']}.json"
+        if not is_file_valid(index_path, asset_index.get("sha1"), asset_index.get("size")):
+            download_file(asset_index["url"], index_path, asset_index.get("sha1"), asset_index.get("size"), cancel=cancel)
+
+    jobs = []
+    for entry in VersionVerifier(minecraft_dir).collect(version_id):
+        if entry["url"] and not is_file_valid(entry["path"], size=entry["size"]):
+            jobs.append(entry)
+    if on_size:
+        on_size(sum(entry["size"] or 0 for entry in jobs))
+    failed = download_many(jobs, on_bytes=on_bytes, cancel=cancel)
+    if failed:
+        print(f"Не удалось заранее скачать {len(failed)} файлов {version_id}, их скачает minecraft_launcher_lib")
+
+
+def install_vanilla_version(minecraft_dir, version_id, callback=None, cancel=None, on_bytes=None, on_size=None):
+    """Устанавливает ванильную версию с журналом.
+
+    minecraft_launcher_lib пишет файлы сам и пропускает уже скачанные
+    с верным sha1, поэтому здесь нужен только журнал: пока он открыт,
+    версия считается недоустановленной, и следующая попытка
+    докачивает недостающее вместо удаления папки версии.
+
+    Недостающие файлы сначала скачиваются prefetch_version_files: так
+    известны объем и скорость скачивания (on_size, on_bytes), а
+    библиотеке остается проверить файлы и распаковать natives.
+
+    Своей отмены у библиотеки нет, поэтому токен cancel проверяется
+    в каждом ее callback: Cancelled прерывает установку на следующем
+    файле, а журнал остается открытым.
+    """
+    import minecraft_launcher_lib
+
+    transaction = InstallTransaction(minecraft_dir, version_id)
+    transaction.begin("vanilla")
+    try:
+        prefetch_version_files(minecraft_dir, version_id, on_bytes, on_size, cancel)
+    except Cancelled:
+        raise
+    except Exception as e:
+        print(f"Ошибка предварительного скачивания {version_id}: {e}")
+    if cancel is not None:
+        callback = cancellable_callback(callback, cancel)
+    minecraft_launcher_lib.install.install_minecraft_version(version_id, str(minecraft_dir), callback=callback)
+    transaction.finish()
@@ -3,6 +3,9 @@ import re
 import uuid
 import os
 import json
+import shutil
+import zipfile
+import zlib
 from pathlib import Path
 from core.config import ensure_dir_exists
 
@@ -82,6 +85,114 @@ def check_java_version(java_path, required_version):
         print(f"Java version check error: {e}")
         return False, f"Ошибка проверки Java: {str(e)}"
 
+def maven_to_path(name):
+    """Преобразует координаты Maven (group:artifact:version[:classifier][@ext]) в относительный путь"""
+    extension = "jar"
+    if "@" in name:
+        name, extension = name.split("@", 1)
+    
+    parts = name.split(":")
+    if len(parts) < 3:
+        return None
+    
+    group, artifact, version = parts[0], parts[1], parts[2]
+    classifier = f"-{parts[3]}" if len(parts) > 3 else ""
+    return f"{group.replace('.', '/')}/{artifact}/{version}/{artifact}-{version}{classifier}.{extension}"
+
+def file_crc32(path, chunk_size=1024 * 1024):
+    """Считает CRC32 файла (как в центральном каталоге zip)"""
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+def extract_zip_entry(zip_file, info, dest_path):
+    """Распаковывает одну запись zip в dest_path через атомарное переименование.
+    
+    Если файл уже есть и совпадает по размеру и CRC, он не перезаписывается.
+    Возвращает True, если файл был записан.
+    """
+    dest_path = Path(dest_path)
+    try:
+        if dest_path.stat().st_size == info.file_size and file_crc32(dest_path) == info.CRC:
+            return False
+    except OSError:
+        pass
+    
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest_path.with_name(dest_path.name + ".part")
+    try:
+        with zip_file.open(info) as src, open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """Записывает JSON через временный файл и атомарное переименование"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".part")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def get_process_group_kwargs():
+    """Аргументы Popen для запуска процесса в отдельной группе (чтобы завершать его вместе с дочерними)"""
+    if os.name == 'nt':
+        return {"creationflags": subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+def kill_process_tree(process):
+    """Завершает процесс вместе со всеми дочерними процессами"""
+    if process is None or process.poll() is not None:
+        return
+    try:
+        if os.name == 'nt':
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                capture_output=True,
+                creationflags=subprocess.CREATE_NO_WINDOW,
+                timeout=10
+            )
+        else:
+            import signal
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+def get_mod_loader(jar_path):
+    """Определяет загрузчик мода по файлам внутри jar: Fabric, Forge или None"""
+    try:
+        with zipfile.ZipFile(jar_path, 'r') as zip_ref:
+            names = set(zip_ref.namelist())
+    except (OSError, zipfile.BadZipFile):
+        return None
+    if "fabric.mod.json" in names:
+        return "Fabric"
+    if "META-INF/mods.toml" in names or "mcmod.info" in names:
+        return "Forge"
+    return None
+
 def generate_offline_uuid(username):
     """Генерирует UUID для офлайн режима"""
     namespace_uuid = uuid.UUID('ba3f5aed-5b9c-11ea-bc55-0242ac130003')
@@ -0,0 +1,243 @@
+import json
+import os
+import platform
+from pathlib import Path
+
+from core.downloads import download_many
+from core.utils import maven_to_path
+from core.workers import hash_files_worker, read_asset_objects_worker, run_in_workers
+
+# Уровни проверки: каждый следующий включает предыдущие
+LEVEL_STAT = 1   # файл есть и совпадает по размеру
+LEVEL_ZIP = 2    # у jar/zip на месте конец центрального каталога
+LEVEL_SHA1 = 3   # sha1 совпадает с JSON версии / индексом ассетов
+
+# Меньше файлов выгоднее хешировать в текущем процессе
+HASH_POOL_THRESHOLD = 64
+
+ASSETS_URL = "https://resources.download.minecraft.net"
+
+# Сигнатура End Of Central Directory и максимальный размер комментария zip
+ZIP_EOCD_SIGNATURE = b"PK\x05\x06"
+ZIP_EOCD_SEARCH = 22 + 65535
+
+
+def get_os_name():
+    """Имя ОС в терминах правил JSON версии"""
+    system = platform.system()
+    if system == "Windows":
+        return "windows"
+    if system == "Darwin":
+        return "osx"
+    return "linux"
+
+
+def rules_allow(rules):
+    """Проверяет правила библиотеки (только правила по ОС, как в JSON версии)"""
+    if not rules:
+        return True
+    allowed = False
+    os_name = get_os_name()
+    for rule in rules:
+        if "features" in rule:
+            continue
+        if "os" in rule and rule["os"].get("name") not in (None, os_name):
+            continue
+        allowed = rule.get("action") == "allow"
+    return allowed
+
+
+def has_zip_eocd(path):
+    """Проверяет, что у zip-архива есть запись конца центрального каталога"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - ZIP_EOCD_SEARCH))
+            return ZIP_EOCD_SIGNATURE in f.read()
+    except OSError:
+        return False
+
+
+class VersionVerifier:
+    """Проверка и восстановление файлов установленной версии.
+
+    Список файлов строится по цепочке inheritsFrom: jar клиента,
+    библиотеки (включая natives), индекс ассетов и сами ассеты,
+    конфигурация логирования. sha1 и разбор индекса ассетов выполняются
+    в общем пуле процессов. Токен cancel прерывает восстановление.
+    """
+
+    def __init__(self, minecraft_dir, status_callback=None, progress_callback=None, cancel=None):
+        self.minecraft_dir = Path(minecraft_dir)
+        self.status_callback = status_callback
+        self.progress_callback = progress_callback
+        self.cancel = cancel
+
+    def set_status(self, text):
+        if self.status_callback:
+            self.status_callback(text)
+
+    def set_progress(self, value):
+        if self.progress_callback:
+            self.progress_callback(value)
+
+    def load_version_chain(self, version_id):
+        """Возвращает список JSON версий от дочерней к родительской"""
+        chain = []
+        current = version_id
+        while current and current not in [item["id"] for item in chain]:
+            json_path = self.minecraft_dir / "versions" / current / f"{current}.json"
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                break
+            data.setdefault("id", current)
+            chain.append(data)
+            current = data.get("inheritsFrom")
+        return chain
+
+    def collect(self, version_id):
+        """Собирает список файлов версии: {path, url, sha1, size}"""
+        files = {}
+
+        def add(path, url=None, sha1=None, size=None):
+            path = str(path)
+            if path not in files:
+                files[path] = {"path": path, "url": url or None, "sha1": sha1, "size": size}
+
+        chain = self.load_version_chain(version_id)
+        if not chain:
+            add(self.minecraft_dir / "versions" / version_id / f"{version_id}.json")
+            return list(files.values())
+
+        libraries_dir = self.minecraft_dir / "libraries"
+        asset_index = None
+        for data in chain:
+            client = data.get("downloads", {}).get("client")
+            if client:
+                jar_path = self.minecraft_dir / "versions" / data["id"] / f"{data['id']}.jar"
+                add(jar_path, client.get("url"), client.get("sha1"), client.get("size"))
+
+            for lib in data.get("libraries", []):
+                if not rules_allow(lib.get("rules")):
+                    continue
+                downloads = lib.get("downloads", {})
+                artifact = downloads.get("artifact")
+                if artifact:
+                    rel_path = artifact.get("path") or maven_to_path(lib["name"])
+                    add(libraries_dir / rel_path, artifact.get("url"), artifact.get("sha1"), artifact.get("size"))
+                elif "downloads" not in lib and lib.get("name"):
+                    # Формат Fabric: name + url репозитория
+                    rel_path = maven_to_path(lib["name"])
+                    base_url = lib.get("url", "https://libraries.minecraft.net/")
+                    if not base_url.endswith("/"):
+                        base_url += "/"
+                    add(libraries_dir / rel_path, base_url + rel_path, lib.get("sha1"), lib.get("size"))
+
+                natives_key = lib.get("natives", {}).get(get_os_name())
+                if natives_key:
+                    natives_key = natives_key.replace("${arch}", "32" if platform.architecture()[0] == "32bit" else "64")
+                    native = downloads.get("classifiers", {}).get(natives_key)
+                    if native:
+                        add(libraries_dir / native["path"], native.get("url"), native.get("sha1"), native.get("size"))
+
+            logging_file = data.get("logging", {}).get("client", {}).get("file")
+            if logging_file:
+                add(self.minecraft_dir / "assets" / "log_configs" / logging_file["id"],
+                    logging_file.get("url"), logging_file.get("sha1"), logging_file.get("size"))
+
+            if not asset_index and data.get("assetIndex"):
+                asset_index = data["assetIndex"]
+
+        if asset_index:
+            index_path = self.minecraft_dir / "assets" / "indexes" / f"{asset_index['id']}.json"
+            add(index_path, asset_index.get("url"), asset_index.get("sha1"), asset_index.get("size"))
+            # Индекс ассетов разбирается в этом процессе: collect идет на каждом
+            # запуске, и запуск процесса пула стоит дороже разбора одного JSON
+            objects = read_asset_objects_worker(str(index_path)) if index_path.exists() else []
+            objects_dir = self.minecraft_dir / "assets" / "objects"
+            for sha1, size in objects:
+                add(objects_dir / sha1[:2] / sha1, f"{ASSETS_URL}/{sha1[:2]}/{sha1}", sha1, size)
+
+        return list(files.values())
+
+    def hash_files(self, entries):
+        """Считает sha1 файлов по порядку, большие списки - в пуле процессов"""
+        def on_progress(done, total):
+            self.set_progress(int(done / total * 100))
+
+        paths = [entry["path"] for entry in entries]
+        return run_in_workers(hash_files_worker, paths, on_progress=on_progress, min_items=HASH_POOL_THRESHOLD)
+
+    def verify(self, version_id, level=LEVEL_SHA1, files=None):
+        """Проверяет файлы версии, возвращает список непрошедших с причиной"""
+        files = files if files is not None else self.collect(version_id)
+        failed = []
+        to_hash = []
+        total = len(files)
+
+        self.set_status(f"Проверка файлов ({total})...")
+        for entry in files:
+            try:
+                st = os.stat(entry["path"])
+            except OSError:
+                failed.append(dict(entry, reason="missing"))
+                continue
+            if entry["size"] is not None and st.st_size != entry["size"]:
+                failed.append(dict(entry, reason="size"))
+                continue
+            if level >= LEVEL_ZIP and entry["path"].endswith((".jar", ".zip")) and not has_zip_eocd(entry["path"]):
+                failed.append(dict(entry, reason="zip"))
+                continue
+            if level >= LEVEL_SHA1 and entry["sha1"]:
+                to_hash.append(entry)
+
+        if to_hash:
+            self.set_status(f"Проверка sha1 ({len(to_hash)} файлов)...")
+            for entry, sha1 in zip(to_hash, self.hash_files(to_hash)):
+                if sha1 != entry["sha1"]:
+                    failed.append(dict(entry, reason="sha1"))
+
+        print(f"Проверка {version_id}: файлов {total}, ошибок {len(failed)}")
+        return failed
+
+    def repair(self, version_id, level=LEVEL_SHA1):
+        """Проверяет версию и заново скачивает только непрошедшие файлы.
+
+        Возвращает список файлов, которые восстановить не удалось.
+        """
+        files = self.collect(version_id)
+        failed = self.verify(version_id, level, files)
+        for attempt in range(2):
+            if not failed:
+                return []
+
+            repairable = [entry for entry in failed if entry["url"]]
+            self.set_status(f"Восстановление файлов ({len(repairable)})...")
+
+            def on_file(done, total):
+                self.set_progress(int(done / total * 100))
+
+            # Поврежденные файлы удаляем, иначе download_many может их пропустить
+            for entry in repairable:
+                try:
+                    os.remove(entry["path"])
+                except OSError:
+                    pass
+            download_many(repairable, on_file=on_file, cancel=self.cancel)
+
+            # Перепроверяем только восстановленные файлы и новые: индекс
+            # ассетов мог быть восстановлен, и список файлов вырос
+            known = {entry["path"] for entry in files}
+            retry = {entry["path"] for entry in failed}
+            files = self.collect(version_id)
+            failed = self.verify(version_id, level, [
+                entry for entry in files
+                if entry["path"] in retry or entry["path"] not in known
+            ])
+
+        for entry in failed:
+            print(f"Не удалось восстановить {entry['path']} ({entry['reason']})")
+        return failed
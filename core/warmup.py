@@ -0,0 +1,207 @@
+import json
+import os
+import re
+import threading
+import time
+
+from core.config import LAUNCHER_DATA_DIR, ensure_dir_exists
+from core.verify import VersionVerifier
+
+TIME_TO_MENU_PATH = LAUNCHER_DATA_DIR / "time_to_menu.json"
+
+# Сколько последних замеров хранить
+TIME_TO_MENU_HISTORY = 50
+
+# Строки лога игры, после которых главное меню уже на экране
+MENU_LOG_MARKERS = (
+    "Sound engine started",
+    "Created: 1024x512",
+)
+
+# Время в начале строки лога log4j: [12:34:56]
+LOG_TIME_RE = re.compile(r"^\[(\d\d):(\d\d):(\d\d)")
+
+# Замеры дольше этого считаются ошибочными (лог другого запуска)
+MAX_TIME_TO_MENU = 30 * 60
+
+WARMUP_CHUNK_SIZE = 1024 * 1024
+
+
+def get_boot_time():
+    """Время загрузки системы (только Linux), None если неизвестно"""
+    try:
+        with open("/proc/stat", "r") as f:
+            for line in f:
+                if line.startswith("btime "):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def collect_warmup_files(minecraft_dir, version_id):
+    """Файлы, которые JVM читает первыми: jar версии, библиотеки, natives,
+    индекс ассетов и конфигурация логов. Сами ассеты не входят - их много,
+    а игра читает их уже после появления окна."""
+    files = VersionVerifier(minecraft_dir).collect(version_id)
+    objects_dir = os.path.join(str(minecraft_dir), "assets", "objects")
+    return [entry["path"] for entry in files if not entry["path"].startswith(objects_dir)]
+
+
+class PageCacheWarmer(threading.Thread):
+    """Прогрев страничного кеша ОС перед запуском JVM.
+
+    На Linux/macOS файлы передаются в posix_fadvise(WILLNEED) - ядро
+    читает их асинхронно. Где этого нет (Windows), файлы читаются
+    в фоновом потоке последовательно большими блоками.
+    """
+
+    def __init__(self, minecraft_dir, version_id):
+        super().__init__(daemon=True)
+        self.minecraft_dir = minecraft_dir
+        self.version_id = version_id
+        self.paths = []
+        self.bytes = 0
+        self.elapsed = 0.0
+        self._cancelled = threading.Event()
+
+    def stop(self):
+        self._cancelled.set()
+
+    def run(self):
+        started = time.time()
+        self.paths = collect_warmup_files(self.minecraft_dir, self.version_id)
+        use_fadvise = hasattr(os, "posix_fadvise")
+        for path in self.paths:
+            if self._cancelled.is_set():
+                break
+            try:
+                if use_fadvise:
+                    fd = os.open(path, os.O_RDONLY)
+                    try:
+                        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                        self.bytes += os.fstat(fd).st_size
+                    finally:
+                        os.close(fd)
+                else:
+                    with open(path, "rb", buffering=0) as f:
+                        while not self._cancelled.is_set():
+                            chunk = f.read(WARMUP_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            self.bytes += len(chunk)
+            except OSError:
+                continue
+        self.elapsed = time.time() - started
+        print(f"Прогрев кеша: {len(self.paths)} файлов, {self.bytes / 1024 / 1024:.1f} МБ за {self.elapsed:.2f} сек")
+
+
+def describe_launch_mode(item):
+    return (f"прогрев {'вкл' if item['warmup'] else 'выкл'}, "
+            f"staging {'вкл' if item.get('staging') else 'выкл'}")
+
+
+def load_time_to_menu():
+    try:
+        with open(TIME_TO_MENU_PATH, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data.setdefault("history", [])
+        return data
+    except (OSError, ValueError):
+        return {"pending": None, "history": []}
+
+
+def save_time_to_menu(data):
+    try:
+        ensure_dir_exists(TIME_TO_MENU_PATH.parent)
+        tmp_path = TIME_TO_MENU_PATH.with_name(TIME_TO_MENU_PATH.name + ".part")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, TIME_TO_MENU_PATH)
+    except OSError as e:
+        print(f"Ошибка сохранения замеров запуска: {e}")
+
+
+def start_time_to_menu(version_id, warmup, staging=False):
+    """Запоминает момент запуска JVM. Лаунчер закрывается раньше, чем
+    появляется меню, поэтому замер завершается при следующем запуске
+    по logs/latest.log игры."""
+    data = load_time_to_menu()
+    data["pending"] = {
+        "version": version_id,
+        "started": time.time(),
+        "warmup": warmup,
+        "staging": staging,
+        "boot_time": get_boot_time(),
+    }
+    save_time_to_menu(data)
+
+
+def find_menu_time(log_path, started):
+    """Секунды от started до строки лога о загрузке меню или None"""
+    try:
+        if os.path.getmtime(log_path) < started:
+            return None
+        with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                if not any(marker in line for marker in MENU_LOG_MARKERS):
+                    continue
+                match = LOG_TIME_RE.match(line)
+                if not match:
+                    continue
+                hours, minutes, seconds = (int(value) for value in match.groups())
+                start = time.localtime(started)
+                start_seconds = start.tm_hour * 3600 + start.tm_min * 60 + start.tm_sec
+                # В логе только время суток, запуск мог пройти через полночь
+                elapsed = (hours * 3600 + minutes * 60 + seconds - start_seconds) % 86400
+                return elapsed if elapsed <= MAX_TIME_TO_MENU else None
+    except OSError:
+        pass
+    return None
+
+
+def finish_time_to_menu(minecraft_dir):
+    """Завершает замер прошлого запуска и печатает сравнение холодных и теплых.
+
+    Холодный запуск - первый после загрузки системы, когда файлов
+    игры еще нет в кеше ОС.
+    """
+    data = load_time_to_menu()
+    pending = data.get("pending")
+    if not pending:
+        return None
+    data["pending"] = None
+
+    seconds = find_menu_time(os.path.join(str(minecraft_dir), "logs", "latest.log"), pending["started"])
+    if seconds is None:
+        save_time_to_menu(data)
+        return None
+
+    history = data["history"]
+    boot_time = pending.get("boot_time")
+    cold = None
+    if boot_time is not None:
+        cold = not any(item.get("boot_time") == boot_time for item in history)
+    version_id = pending["version"]
+    history.append({
+        "version": version_id,
+        "seconds": seconds,
+        "warmup": pending["warmup"],
+        "staging": pending.get("staging", False),
+        "cold": cold,
+        "boot_time": boot_time,
+        "time": int(pending["started"]),
+    })
+    data["history"] = history[-TIME_TO_MENU_HISTORY:]
+    save_time_to_menu(data)
+
+    kind = "холодный" if cold else "теплый" if cold is not None else "запуск"
+    print(f"Время до меню {version_id}: {seconds} сек ({kind}, {describe_launch_mode(pending)})")
+    groups = {}
+    for item in data["history"]:
+        if item["version"] == version_id:
+            label = {True: "холодные", False: "теплые"}.get(item["cold"], "запуски")
+            groups.setdefault((label, describe_launch_mode(item)), []).append(item["seconds"])
+    for (label, mode), samples in sorted(groups.items()):
+        print(f"  {label}, {mode}: среднее {sum(samples) / len(samples):.1f} сек ({len(samples)} зап.)")
+    return seconds
@@ -0,0 +1,192 @@
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, QTimer
+
+from core.config import LAUNCHER_DATA_DIR, ensure_dir_exists
+from core.metrics import get_metrics
+from core.tracing import get_tracer
+
+# Сводка зависаний GUI по местам в коде, копится между запусками
+STALLS_REPORT_PATH = LAUNCHER_DATA_DIR / "gui_stalls.json"
+
+# Зависание дольше порога записывается; 0 в переменной окружения выключает сторож
+STALL_THRESHOLD_MS = 250
+STALL_ENV_VAR = "PYLAUNCHER_STALL_MS"
+
+# Как часто цикл событий отмечается и как часто поток-сторож проверяет отметку
+HEARTBEAT_INTERVAL_MS = 50
+CHECK_INTERVAL_MS = 100
+
+# Сколько кадров стека хранить для места зависания
+STACK_DEPTH = 12
+
+# Сколько мест хранить в сводке
+REPORT_KEEP = 50
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+
+def find_call_site(stack):
+    """Последний кадр кода лаунчера: строка обработчика, а не библиотеки под ним"""
+    for frame in reversed(stack):
+        try:
+            Path(frame.filename).resolve().relative_to(PACKAGE_ROOT)
+        except ValueError:
+            continue
+        return frame
+    return stack[-1] if stack else None
+
+
+def format_frame(frame):
+    try:
+        filename = Path(frame.filename).resolve().relative_to(PACKAGE_ROOT).as_posix()
+    except ValueError:
+        filename = os.path.basename(frame.filename)
+    return f"{filename}:{frame.lineno} {frame.name}"
+
+
+class GuiWatchdog(QObject):
+    """Сторож цикла событий Qt.
+
+    Таймер в потоке GUI каждые HEARTBEAT_INTERVAL_MS обновляет отметку
+    времени, фоновый поток раз в CHECK_INTERVAL_MS ее проверяет. Пока
+    отметка старше порога, поток снимает стек главного потока через
+    sys._current_frames(); по окончании зависания самый частый стек
+    печатается и добавляется в сводку по местам в коде. В обычной работе
+    это одно сравнение времени раз в 100 мс.
+    """
+
+    def __init__(self, parent=None, threshold_ms=None, report_path=STALLS_REPORT_PATH):
+        super().__init__(parent)
+        if threshold_ms is None:
+            try:
+                threshold_ms = int(os.environ.get(STALL_ENV_VAR, STALL_THRESHOLD_MS) or 0)
+            except ValueError:
+                threshold_ms = STALL_THRESHOLD_MS
+        self.threshold = threshold_ms / 1000
+        self.report_path = report_path
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.sites = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(HEARTBEAT_INTERVAL_MS)
+        self.timer.timeout.connect(self.beat)
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self.beat()
+        self.timer.start()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name="gui-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает сторож и сохраняет сводку"""
+        if self._thread is None:
+            return
+        self.timer.stop()
+        self._stop_event.set()
+        self._thread.join(CHECK_INTERVAL_MS / 1000 * 2)
+        self._thread = None
+        self.save_report()
+
+    def capture(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return None
+        return traceback.extract_stack(frame)[-STACK_DEPTH:]
+
+    def run(self):
+        interval = CHECK_INTERVAL_MS / 1000
+        stalled_beat = None
+        stacks = {}
+        while not self._stop_event.wait(interval):
+            beat = self.last_beat
+            if stalled_beat is not None and beat != stalled_beat:
+                # Цикл событий снова работает
+                self.record_stall(beat - stalled_beat - HEARTBEAT_INTERVAL_MS / 1000, stacks)
+                stalled_beat = None
+                stacks = {}
+            if time.monotonic() - beat - HEARTBEAT_INTERVAL_MS / 1000 < self.threshold:
+                continue
+            stack = self.capture()
+            # Главный поток ждет в app.exec_() - это не зависание, а, например, сон системы
+            if not stack or "exec_(" in (stack[-1].line or ""):
+                continue
+            stalled_beat = beat
+            key = (format_frame(find_call_site(stack)), tuple(format_frame(frame) for frame in stack))
+            stacks[key] = stacks.get(key, 0) + 1
+
+    def record_stall(self, seconds, stacks):
+        if not stacks:
+            return
+        # Долгое зависание снимается несколько раз, место - самый частый стек
+        call_site, stack = max(stacks, key=stacks.get)
+        ms = int(seconds * 1000)
+        print(f"GUI не отвечал {ms} мс: {call_site}")
+        for line in stack:
+            print(f"    {line}")
+        get_metrics().gui_stall.observe(seconds)
+        get_tracer().instant("gui_stall", ms=ms, site=call_site)
+
+        with self._lock:
+            entry = self.sites.setdefault(call_site, {"count": 0, "total_ms": 0, "max_ms": 0, "stack": list(stack)})
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            if ms >= entry["max_ms"]:
+                entry["max_ms"] = ms
+                entry["stack"] = list(stack)
+
+    def summary(self, limit=10):
+        with self._lock:
+            items = sorted(self.sites.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        return "\n".join(
+            f"  {entry['total_ms']:7d} мс  {entry['count']:4d} раз  до {entry['max_ms']} мс  {site}"
+            for site, entry in items[:limit]
+        )
+
+    def save_report(self):
+        """Добавляет зависания сессии в сводку STALLS_REPORT_PATH"""
+        with self._lock:
+            sites = {site: dict(entry) for site, entry in self.sites.items()}
+        if not sites:
+            return
+        try:
+            with open(self.report_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = {}
+        for site, entry in sites.items():
+            total = report.setdefault(site, {"count": 0, "total_ms": 0, "max_ms": 0, "stack": entry["stack"]})
+            total["count"] += entry["count"]
+            total["total_ms"] += entry["total_ms"]
+            if entry["max_ms"] >= total["max_ms"]:
+                total["max_ms"] = entry["max_ms"]
+                total["stack"] = entry["stack"]
+        report = dict(sorted(report.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:REPORT_KEEP])
+        try:
+            ensure_dir_exists(self.report_path.parent)
+            tmp_path = self.report_path.with_name(self.report_path.name + ".part")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.report_path)
+        except OSError as e:
+            print(f"Ошибка сохранения сводки зависаний: {e}")
+        print("Зависания GUI за сессию:\n" + self.summary())
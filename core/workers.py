@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from core.downloads import file_sha1
+from core.tasks import Cancelled
+from core.utils import extract_zip_entry
+
+WORKER_PROCESSES = os.cpu_count() or 1
+
+# Частей на процесс: больше частей - чаще обновляется прогресс,
+# меньше - меньше накладных расходов на передачу между процессами
+CHUNKS_PER_WORKER = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Общий пул процессов для работы, которая держит GIL (хеши, распаковка, разбор JSON).
+
+    Процессы создаются один раз и переиспользуются всеми установками,
+    поэтому запуск пула не повторяется на каждую проверку версии.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKER_PROCESSES)
+        return _pool
+
+
+def shutdown_worker_pool():
+    """Останавливает пул не дожидаясь текущих задач; они пишут файлы атомарно"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _reset_broken_pool():
+    """Упавший процесс-воркер ломает весь пул, следующий вызов создаст новый"""
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def run_in_worker(func, *args):
+    """Выполняет func(*args) в процессе-воркере и возвращает результат"""
+    try:
+        return get_worker_pool().submit(func, *args).result()
+    except BrokenProcessPool:
+        _reset_broken_pool()
+        raise
+
+
+def run_in_workers(func, items, on_progress=None, cancel=None, min_items=0):
+    """Обрабатывает список частями в пуле процессов.
+
+    func получает часть списка и возвращает список результатов той же
+    длины. Результаты готовых частей приходят сразу, on_progress(done, total)
+    вызывается после каждой части. При отмене через cancel еще не начатые
+    части снимаются, а вызов поднимает Cancelled. Списки короче min_items
+    обрабатываются в текущем процессе. Возвращает результаты в порядке items.
+    """
+    items = list(items)
+    total = len(items)
+    if not items:
+        return []
+    if total < min_items:
+        results = func(items)
+        if on_progress:
+            on_progress(total, total)
+        return results
+
+    size = max(1, total // (WORKER_PROCESSES * CHUNKS_PER_WORKER))
+    chunks = [(start, items[start:start + size]) for start in range(0, total, size)]
+    results = [None] * total
+    done = 0
+
+    try:
+        pool = get_worker_pool()
+        futures = {pool.submit(func, chunk): (start, len(chunk)) for start, chunk in chunks}
+        try:
+            for future in as_completed(futures):
+                if cancel is not None and cancel.is_cancelled:
+                    raise Cancelled("Операция отменена")
+                start, count = futures[future]
+                results[start:start + count] = future.result()
+                done += count
+                if on_progress:
+                    on_progress(done, total)
+        finally:
+            for future in futures:
+                future.cancel()
+    except BrokenProcessPool:
+        _reset_broken_pool()
+        raise
+    return results
+
+
+def hash_files_worker(paths):
+    """sha1 файлов, None для недоступных"""
+    hashes = []
+    for path in paths:
+        try:
+            hashes.append(file_sha1(path))
+        except OSError:
+            hashes.append(None)
+    return hashes
+
+
+def extract_zip_worker(zip_path, entries):
+    """Распаковывает записи [(имя в архиве, путь назначения)], архив открывается один раз на часть.
+
+    Возвращает для каждой записи True, если файл был записан.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return [extract_zip_entry(zip_ref, zip_ref.getinfo(name), dest) for name, dest in entries]
+
+
+def read_asset_objects_worker(index_path):
+    """Разбирает индекс ассетов и возвращает только [(hash, size)] - так меньше передается назад"""
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            objects = json.load(f).get("objects", {})
+    except (OSError, ValueError):
+        return []
+    return [(info["hash"], info.get("size")) for info in objects.values()]
@@ -1,13 +1,9 @@
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
-import os
-import minecraft_launcher_lib
 import threading
-import time
-from pathlib import Path
 from core.config import get_recommended_java_version, get_asset_path
-from core.utils import check_java_version
+from core.java_runtime import install_java_runtime
 
 class JavaDownloadDialog(QDialog):
     # Создаем сигналы для обновления UI из потока
@@ -218,113 +214,25 @@ class JavaDownloadDialog(QDialog):
     def download_java(self):
         """Скачивает Java (выполняется в отдельном потоке)"""
         try:
-            # Определяем runtime для нужной версии Java
-            if self.recommended_java == 8:
-                runtime_name = "java-runtime-alpha"
-            elif self.recommended_java == 11:
-                runtime_name = "java-runtime-beta"
-            elif self.recommended_java == 17:
-                runtime_name = "java-runtime-delta"
-            else:  # 21+
-                runtime_name = "java-runtime-gamma"
-            
-            java_dir = self.parent.minecraft_dir / "runtime"
-            java_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Создаем callback для обновления прогресса
-            def set_status(text):
-                self.status_update_signal.emit(text)
-            
-            def set_progress(progress):
-                self.progress_update_signal.emit(int(progress * 100))
-            
-            callback = {
-                "setStatus": set_status,
-                "setProgress": set_progress,
-                "setMax": lambda max_val: None
-            }
-            
             # Обновляем статус
             self.status_update_signal.emit(f"Скачивание Java {self.recommended_java}...")
             
-            # Скачиваем Java
-            minecraft_launcher_lib.runtime.install_jvm_runtime(
-                runtime_name,
-                str(java_dir),
-                callback=callback
+            # Установщик возвращает точный путь к java из манифеста,
+            # поэтому искать установленную Java по папкам не нужно
+            java_path = install_java_runtime(
+                self.parent.minecraft_dir,
+                self.recommended_java,
+                status_callback=self.status_update_signal.emit,
+                progress_callback=self.progress_update_signal.emit
             )
+            # Проверка java -version для реестра - тоже здесь, а не в потоке GUI
+            self.parent.java_manager.register(java_path)
             
-            # Даем время на завершение записи файлов
-            time.sleep(2)
-            
-            # Ищем установленную Java
-            self.status_update_signal.emit("Поиск установленной Java...")
-            java_path = self.find_installed_java()
-            
-            if java_path:
-                self.download_success_signal.emit(java_path)
-            else:
-                # Если не нашли, пробуем найти в подпапках
-                self.status_update_signal.emit("Расширенный поиск Java...")
-                java_path = self.find_java_deep()
-                if java_path:
-                    self.download_success_signal.emit(java_path)
-                else:
-                    self.download_error_signal.emit("Java установлена, но путь не найден")
+            self.download_success_signal.emit(java_path)
                 
         except Exception as e:
             self.download_error_signal.emit(str(e))
     
-    def find_installed_java(self):
-        """Ищет установленную Java в стандартной папке runtime"""
-        runtime_path = self.parent.minecraft_dir / "runtime"
-        
-        # Определяем нужную папку runtime
-        if self.recommended_java == 8:
-            runtime_name = "java-runtime-alpha"
-        elif self.recommended_java == 11:
-            runtime_name = "java-runtime-beta"
-        elif self.recommended_java == 17:
-            runtime_name = "java-runtime-delta"
-        else:
-            runtime_name = "java-runtime-gamma"
-        
-        # Проверяем разные возможные пути
-        possible_paths = [
-            runtime_path / runtime_name / "bin" / "java.exe",
-            runtime_path / runtime_name / "bin" / "java",
-            runtime_path / runtime_name / "jre" / "bin" / "java.exe",
-            runtime_path / runtime_name / "jre" / "bin" / "java",
-            runtime_path / runtime_name / "contents" / "home" / "bin" / "java",  # для Mac
-        ]
-        
-        for java_path in possible_paths:
-            if java_path.exists():
-                is_valid, msg = check_java_version(str(java_path), self.recommended_java)
-                if is_valid:
-                    return str(java_path)
-        
-        return None
-    
-    def find_java_deep(self):
-        """Глубокий поиск Java во всех подпапках runtime"""
-        runtime_path = self.parent.minecraft_dir / "runtime"
-        
-        if not runtime_path.exists():
-            return None
-        
-        # Ищем все файлы java.exe или java
-        for root, dirs, files in os.walk(runtime_path):
-            for file in files:
-                if file.lower() in ["java.exe", "java"]:
-                    java_path = Path(root) / file
-                    is_valid, msg = check_java_version(str(java_path), self.recommended_java)
-                    if is_valid:
-                        print(f"Найдена Java: {java_path}")
-                        return str(java_path)
-        
-        return None
-    
     def check_download_status(self):
         """Проверяет статус скачивания"""
         if not self.download_thread or not self.download_thread.is_alive():
@@ -346,7 +254,7 @@ class JavaDownloadDialog(QDialog):
         self.status_label.setText("Java успешно установлена!")
         self.progress_bar.setValue(100)
         
-        # Устанавливаем путь к Java
+        # Устанавливаем путь к Java (в реестре она уже есть)
         self.parent.java_path = java_path
         self.parent.java_edit.setText(java_path)
         
@@ -371,7 +279,7 @@ class JavaDownloadDialog(QDialog):
         # Показываем информацию о том, где искали Java
         runtime_path = self.parent.minecraft_dir / "runtime"
         QMessageBox.critical(self, "Ошибка", 
-                            f"Не удалось найти установленную Java.\n\n"
+                            f"Не удалось установить Java.\n\n"
                             f"Папка установки: {runtime_path}\n"
                             f"Ошибка: {error_msg}\n\n"
                             "Попробуйте указать путь к Java вручную.")
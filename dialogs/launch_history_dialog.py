@@ -0,0 +1,129 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+import sqlite3
+import time
+from core.launch_history import get_launch_history, EVENT_TIME_TO_MENU, EVENT_CRASH
+
+class LaunchHistoryDialog(QDialog):
+    """Последние запуски и перцентили времени запуска текущей версии"""
+
+    COLUMNS = ["Дата", "Версия", "Загрузчик", "Java", "Подготовка", "До меню", "Статус"]
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.init_ui()
+        self.load_history()
+
+    def init_ui(self):
+        self.setWindowTitle("История запусков")
+        self.resize(760, 460)
+        self.setModal(True)
+        self.setWindowFlags(Qt.Dialog | Qt.WindowCloseButtonHint)
+
+        self.setStyleSheet("""
+            QDialog {
+                background: #2d2d2d;
+                border: 2px solid #444;
+            }
+            QLabel {
+                color: white;
+                padding: 4px;
+                font-size: 12px;
+            }
+            QTableWidget {
+                background: #3d3d3d;
+                color: white;
+                gridline-color: #555;
+                border: 1px solid #444;
+                font-size: 11px;
+            }
+            QHeaderView::section {
+                background: #2d2d2d;
+                color: #4CAF50;
+                border: 1px solid #444;
+                padding: 4px;
+            }
+            QPushButton {
+                background: #3d3d3d;
+                color: white;
+                padding: 8px 20px;
+                border-radius: 4px;
+                border: 1px solid #555;
+                min-width: 120px;
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                background: #4d4d4d;
+                border: 1px solid #4CAF50;
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        close_button = QPushButton("Закрыть")
+        close_button.clicked.connect(self.accept)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+    def format_seconds(self, value):
+        return f"{value:.1f} сек" if value is not None else "-"
+
+    def load_history(self):
+        history = get_launch_history()
+        try:
+            launches = history.recent(50)
+        except sqlite3.Error as e:
+            self.summary_label.setText(f"Не удалось прочитать историю запусков: {e}")
+            return
+
+        # Перцентили по версии последнего успешного запуска этой папки игры
+        version = next((launch["version"] for launch in launches
+                        if launch["status"] == "ok" and launch["minecraft_dir"] == str(self.parent.minecraft_dir)), None)
+        if version:
+            menu = history.percentiles(version, EVENT_TIME_TO_MENU, days=30, minecraft_dir=self.parent.minecraft_dir)
+            total = history.percentiles(version, "total", days=30, minecraft_dir=self.parent.minecraft_dir)
+            self.summary_label.setText(
+                f"<b>{version}</b> за 30 дней: до меню p50 {self.format_seconds(menu['p50'])}, "
+                f"p95 {self.format_seconds(menu['p95'])} ({menu['count']} зап.); "
+                f"подготовка p50 {self.format_seconds(total['p50'])}, p95 {self.format_seconds(total['p95'])}"
+            )
+        else:
+            self.summary_label.setText("Успешных запусков пока нет")
+
+        self.table.setRowCount(len(launches))
+        for row, launch in enumerate(launches):
+            status = launch["status"]
+            if launch.get(EVENT_CRASH):
+                status = f"падение: {launch[EVENT_CRASH]}"
+            values = [
+                time.strftime("%d.%m %H:%M", time.localtime(launch["started"])),
+                launch["version"] or "",
+                launch["loader"] or "",
+                str(launch["java_version"] or ""),
+                self.format_seconds(launch["total_seconds"]),
+                self.format_seconds(launch.get(EVENT_TIME_TO_MENU)),
+                status,
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                # Полные длительности шагов - во всплывающей подсказке
+                item.setToolTip("\n".join(f"{name}: {seconds:.2f} сек" for name, seconds in launch["stages"].items()))
+                self.table.setItem(row, column, item)
+        self.table.resizeColumnsToContents()
@@ -5,6 +5,7 @@ import minecraft_launcher_lib
 import threading
 import time
 from core.config import VERSION_TYPES
+from core.java_requirements import get_resolver
 
 class VersionSelectorDialog(QDialog):
     
@@ -315,6 +316,9 @@ class VersionSelectorDialog(QDialog):
                 if "releaseTime" in version and not isinstance(version["releaseTime"], str):
                     version["releaseTime"] = str(version["releaseTime"])
             
+            # Запоминаем требования Java для всех версий манифеста
+            get_resolver().update_release_times(versions)
+            
             QMetaObject.invokeMethod(self, "_update_versions_list", 
                                      Q_ARG(list, versions))
             
@@ -13,6 +13,13 @@ import minecraft_launcher_lib
 
 from core.config import DEFAULT_MC_VERSION, FORGE_VERSION, FABRIC_LOADER_VERSION, REQUIRED_JAVA_VERSION, DEFAULT_MINECRAFT_DIR, get_asset_path
 from core.utils import check_java_version, generate_offline_uuid, create_launcher_profiles
+from core.java_manager import JavaRuntimeManager
+from core.profiler import get_profiler
+from core.progress import ProgressAggregator
+from core.tracing import get_tracer
+from core.tasks import SHUTDOWN_TIMEOUT_MS
+from core.watchdog import GuiWatchdog
+from core.workers import shutdown_worker_pool
 from gui.widgets import BackgroundWidget
 from gui.main_window_ui import MainWindowUI
 from gui.main_window_handlers import MainWindowHandlers
@@ -73,10 +80,15 @@ class WONDERFULAND(QMainWindow, MainWindowUI, MainWindowHandlers, MainWindowGame
         self.minecraft_dir = DEFAULT_MINECRAFT_DIR
         
         self.java_path = ""
+        self.java_manager = JavaRuntimeManager()
         self.loader = "Vanilla"
         self.install_success = True
         self.forge_install_success = True
         self.fabric_install_success = True
+        self.warmup_enabled = True
+        self.staging_enabled = False
+        self.profile_enabled = False
+        self.warmer = None
         self.current_theme = None
         self.custom_font = None
         
@@ -140,6 +152,19 @@ class WONDERFULAND(QMainWindow, MainWindowUI, MainWindowHandlers, MainWindowGame
         self.install_thread = None
         self.forge_thread = None
         self.fabric_thread = None
+        self.launch_task = None
+        self.launch_graph = None
+        self.java_search_thread = None
+        self.java_register_thread = None
+        
+        # Прогресс из потоков доставляется в GUI таймером, не чаще ~30 раз в секунду
+        self.progress_tracker = ProgressAggregator(self)
+        self.progress_tracker.changed.connect(self.on_progress_changed)
+        self.progress_tracker.start()
+        
+        # Сторож цикла событий: записывает, где обработчики блокируют GUI
+        self.gui_watchdog = GuiWatchdog(self)
+        self.gui_watchdog.start()
         
         QTimer.singleShot(1000, self.check_java_after_start)
         if self.beta_enabled:
@@ -165,17 +190,55 @@ class WONDERFULAND(QMainWindow, MainWindowUI, MainWindowHandlers, MainWindowGame
         from core.utils import create_launcher_profiles
         create_launcher_profiles(self.minecraft_dir)
         
-        if self.install_thread and self.install_thread.isRunning():
-            self.install_thread.stop()
-            self.install_thread.wait()
-        if self.forge_thread and self.forge_thread.isRunning():
-            self.forge_thread.stop()
-            self.forge_thread.wait()
-        if self.fabric_thread and self.fabric_thread.isRunning():
-            self.fabric_thread.stop()
-            self.fabric_thread.wait()
+        self.gui_watchdog.stop()
+        self.finish_game_metrics()
+        self.stop_background_tasks()
+        get_profiler().stop()
+        # Перезапись трассы: к закрытию в ней уже есть отметки готовности игры
+        get_tracer().export()
         super().closeEvent(event)
     
+    def stop_background_tasks(self):
+        """Отменяет запуск, установки и очистку и ждет их не дольше SHUTDOWN_TIMEOUT_MS.
+        
+        Скачивания пишут во временные файлы, установки идут через журнал,
+        поэтому поток, не успевший остановиться, можно бросить: профиль и
+        трасса сохраняются, процесс завершается сразу, а прерванная
+        установка продолжится при следующем запуске. Пул задач графа запуска
+        не служебный и держал бы выход, поэтому граф тоже ждется с таймаутом.
+        """
+        if self.launch_task is not None:
+            self.launch_task.cancel()
+        
+        threads = [
+            thread for thread in (self.install_thread, self.forge_thread, self.fabric_thread,
+                                  getattr(self, "cleanup_thread", None),
+                                  self.java_search_thread, self.java_register_thread)
+            if thread is not None and thread.isRunning()
+        ]
+        for thread in threads:
+            thread.stop()
+        shutdown_worker_pool()
+        
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT_MS / 1000
+        stuck = []
+        for thread in threads:
+            remaining = max(0, int((deadline - time.monotonic()) * 1000))
+            if not thread.wait(remaining):
+                stuck.append(thread.task.name)
+        if self.launch_graph is not None:
+            remaining = max(0, deadline - time.monotonic())
+            if not self.launch_graph.wait(remaining):
+                stuck.append(self.launch_task.name)
+        
+        if stuck:
+            print(f"Не остановились за {SHUTDOWN_TIMEOUT_MS} мс: {', '.join(stuck)}, завершаем процесс")
+            get_profiler().stop()
+            get_tracer().export()
+            sys.stdout.flush()
+            # Ожидание зависшего потока заблокировало бы закрытие окна
+            os._exit(0)
+    
     @property
     def memory_slider(self):
         return self.settings_page.memory_slider
@@ -7,13 +7,24 @@ import subprocess
 import os
 import uuid
 import json
+import sqlite3
 import minecraft_launcher_lib
+from core.classpath import JVM_PAIR_FLAGS, ClasspathResolver
 from core.config import DEFAULT_MC_VERSION, REQUIRED_JAVA_VERSION, get_asset_path, get_recommended_java_version, get_recommended_forge_version, get_recommended_fabric_version
-from core.utils import generate_offline_uuid, check_java_version, create_launcher_profiles, get_java_major_version
+from core.launch_history import EVENT_CLOSED, EVENT_CRASH, EVENT_EARLY_EXIT, find_crash_signature, get_launch_history
+from core.memory import get_memory_tracker
+from core.metrics import get_metrics
+from core.staging import StagingMirror
+from core.task_graph import LaunchError, TaskGraph, TaskGraphError
+from core.tasks import Cancelled, TaskHandle
+from core.tracing import get_tracer
+from core.transaction import InstallTransaction, is_install_pending, is_version_complete
+from core.utils import generate_offline_uuid, create_launcher_profiles, get_mod_loader
+from core.verify import VersionVerifier, LEVEL_STAT, LEVEL_SHA1
+from core.warmup import MENU_LOG_MARKERS, PageCacheWarmer, finish_time_to_menu, start_time_to_menu
 from threads.download_thread import DownloadProgressThread
 from threads.forge_thread import ForgeInstallThread
 from threads.fabric_thread import FabricInstallThread
-from dialogs.java_dialog import JavaDownloadDialog
 
 class MainWindowGame:
     """Класс для игровых функций главного окна"""
@@ -25,16 +36,11 @@ class MainWindowGame:
             QMessageBox.critical(self, "Ошибка", "Введите имя игрока")
             return
         
-        if not self.java_path:
-            QMessageBox.critical(self, "Ошибка", "Java не найдена! Укажите путь к Java.")
-            return
-        
-        # Проверяем совместимость Java с выбранной версией Minecraft
-        if not self.check_java_compatibility():
-            return
+        # Java подбирается автоматически под версию в потоке запуска,
+        # там же создается launcher_profiles.json
         
-        # Создаем launcher_profiles.json если его нет
-        create_launcher_profiles(self.minecraft_dir)
+        get_tracer().begin_launch()
+        get_tracer().instant("play_clicked")
         
         # Блокируем кнопку запуска
         self.play_button.setEnabled(False)
@@ -60,6 +66,7 @@ class MainWindowGame:
         memory = self.memory_slider.value() if hasattr(self, 'memory_slider') else 4096
         
         # Запускаем поток установки и запуска
+        self.launch_task = TaskHandle("запуск игры")
         thread = threading.Thread(
             target=self.launch_thread,
             args=(username, memory, loader, mc_version),
@@ -67,180 +74,359 @@ class MainWindowGame:
         )
         thread.start()
     
-    def check_java_compatibility(self):
-        """Проверяет совместимость текущей Java с выбранной версией Minecraft"""
-        recommended_java = get_recommended_java_version(self.current_mc_version)
-        current_java = get_java_major_version(self.java_path)
+    def select_java_for_version(self, version_name, mc_version):
+        """Выбирает Java для версии, при необходимости устанавливает нужный runtime"""
+        # Файлы runtime скачиваются в пуле потоков - узел прогресса берется здесь
+        node = self.progress_tracker.current()
+        return self.java_manager.select_java(
+            self.minecraft_dir,
+            version_name,
+            mc_version,
+            preferred_path=self.java_path,
+            status_callback=self.update_status,
+            progress_callback=self.update_progress,
+            bytes_callback=node.add_bytes,
+            size_callback=node.set_total_bytes,
+            cancel=self.launch_task.token
+        )
+    
+    def launch_thread(self, username, memory_mb, loader, mc_version):
+        """Поток подготовки и запуска игры.
         
-        if current_java == 0:
-            QMessageBox.critical(self, "Ошибка", "Не удалось определить версию Java")
-            return False
+        Шаги описаны графом задач: выбор Java, проверка установки, анализ
+        модов и прогрев кеша идут параллельно, затем сборка команды и запуск.
+        Отмена launch_task (закрытие окна) останавливает потоки установки
+        и не дает запустить новые шаги графа.
+        """
+        task = self.launch_task
+        task.start()
+        started = time.time()
+        status = "failed"
+        # Дерево прогресса: доля этапа в общей полосе задается весом
+        progress = self.progress_tracker.reset("launch")
         
-        print(f"Проверка Java: требуется {recommended_java}, установлена {current_java}")
+        def stage(name, func, weight=0):
+            return self.progress_tracker.use(progress.child(name, weight), func)
         
-        # Если версия Java подходит, просто продолжаем
-        if current_java >= recommended_java:
-            return True
+        graph = TaskGraph("launch")
+        self.launch_graph = graph
+        try:
+            graph.add("profiles", lambda: create_launcher_profiles(self.minecraft_dir))
+            # Замер времени до меню прошлого запуска (по логу игры)
+            graph.add("time_to_menu", self.finish_previous_launch, optional=True)
+            graph.add("mods_scan", lambda: self.scan_mods(loader), optional=True)
+            # Файлы vanilla нужны при любом загрузчике - прогреваются параллельно с выбором Java
+            base_installed = self.is_version_json_present(mc_version)
+            graph.add("warmup_base", lambda: self.run_warmup(mc_version), optional=True)
+            # Java для версии (нужна и установщику Forge)
+            graph.add("java_base", stage("java_base", lambda: self.resolve_java(mc_version, mc_version), 1))
+            graph.add("install", stage("install", lambda: self.install_version(loader, mc_version, graph.results["java_base"][0]), 6),
+                      deps=("profiles", "java_base"))
+            graph.add("verify", stage("verify", lambda: self.verify_before_launch(graph.results["install"]), 2), deps=("install",))
+            if loader != "Vanilla" or not base_installed:
+                graph.add("warmup", lambda: self.run_warmup(graph.results["install"]), deps=("install",), optional=True)
+            graph.add("java", stage("java", lambda: self.resolve_java(graph.results["install"], mc_version), 1), deps=("install",))
+            graph.add("command", stage("command", lambda: self.prepare_command(
+                username, memory_mb, graph.results["install"], mc_version, graph.results["java"]
+            ), 1), deps=("verify", "java"))
+            graph.add("spawn", lambda: self.spawn_game(graph.results["command"]), deps=("command",))
+            
+            graph.run(cancel=task.token)
+            status = "ok"
+            task.finish(True)
+            self.update_status("Игра запущена!")
+            QMetaObject.invokeMethod(self, "delayed_close")
+            
+        except Cancelled:
+            status = "cancelled"
+            task.finish(False)
+            print("Запуск игры отменен")
+        except TaskGraphError as e:
+            task.finish(False, str(e))
+            if isinstance(e.error, LaunchError):
+                # Пустое сообщение - подробная ошибка уже показана
+                self.show_error(str(e.error) or "Не удалось запустить игру")
+            else:
+                self.show_error(f"Исключение: {str(e.error)}")
+                import traceback
+                traceback.print_exception(e.error)
+        except Exception as e:
+            task.finish(False, str(e))
+            self.show_error(f"Исключение: {str(e)}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            self.record_launch_history(graph, loader, mc_version, status, started)
+            get_tracer().finish_launch()
+            self.restore_ui()
+    
+    def finish_previous_launch(self):
+        """Дописывает в историю запусков время до меню и падение прошлого запуска"""
+        seconds = finish_time_to_menu(self.minecraft_dir)
+        try:
+            previous = get_launch_history().finish_previous(self.minecraft_dir, seconds)
+        except sqlite3.Error as e:
+            print(f"Ошибка истории запусков: {e}")
+            return seconds
+        if previous:
+            metrics = get_metrics()
+            if seconds is not None:
+                metrics.time_to_menu.observe(seconds, version=previous["version"])
+            if previous[EVENT_CRASH]:
+                metrics.game_crashes.inc(kind="crash_report")
+        return seconds
+    
+    def record_launch_history(self, graph, loader, mc_version, status, started):
+        """Сохраняет запуск в историю: длительности шагов графа, Java и флаги JVM"""
+        stages = {
+            name: round(timing["end"] - timing["start"], 3)
+            for name, timing in graph.timings.items()
+            if timing["start"] is not None and timing["end"] is not None
+        }
+        total = max((timing["end"] for timing in graph.timings.values() if timing["end"] is not None), default=None)
+        launch = graph.results.get("command") or {}
+        metrics = get_metrics()
+        metrics.launches.inc(loader=loader, status=status)
+        if status == "ok" and total is not None:
+            metrics.launch_duration.observe(total, loader=loader)
+            for name, seconds in stages.items():
+                metrics.launch_stage.observe(seconds, stage=name)
+        if launch.get("exit_code") is not None:
+            metrics.game_crashes.inc(kind="early_exit")
+        jvm_flags = []
+        if launch.get("command"):
+            _, tokens, _ = ClasspathResolver(self.minecraft_dir).split_jvm_args(launch["command"])
+            # Пути classpath и module path слишком длинные и есть в last_launch_command.txt
+            jvm_flags = [
+                flag if value is None else f"{flag} {value}"
+                for flag, value in tokens
+                if JVM_PAIR_FLAGS.get(flag) not in ("-cp", "-p")
+            ]
+        try:
+            history = get_launch_history()
+            launch_id = history.record_launch(
+                self.minecraft_dir,
+                launch.get("version_name") or graph.results.get("install") or mc_version,
+                mc_version=mc_version,
+                loader=loader,
+                java_path=launch.get("java_path"),
+                java_version=launch.get("java_version"),
+                jvm_flags=jvm_flags,
+                stages=stages,
+                total_seconds=total,
+                warmup=self.warmup_enabled,
+                staging=launch.get("staging_used", False),
+                status=status,
+                started=started,
+            )
+            if launch.get("exit_code") is not None:
+                # Игра завершилась сразу после запуска - итог известен уже сейчас
+                history.add_event(launch_id, EVENT_EARLY_EXIT, value=launch["exit_code"])
+                crash = find_crash_signature(self.minecraft_dir, started)
+                if crash:
+                    history.add_event(launch_id, EVENT_CRASH, text=crash)
+                history.add_event(launch_id, EVENT_CLOSED)
+        except sqlite3.Error as e:
+            print(f"Ошибка записи истории запусков: {e}")
+        # Лаунчер обычно закрывается после запуска - textfile не ждет закрытия
+        metrics.flush()
+    
+    def finish_game_metrics(self):
+        """Сохраняет метрики при закрытии лаунчера"""
+        get_metrics().finish()
+    
+    def resolve_java(self, version_name, mc_version):
+        """Выбирает Java для версии, поднимает LaunchError если подходящей нет"""
+        self.update_status("Выбор Java...")
+        java_path, java_major = self.select_java_for_version(version_name, mc_version)
+        if not java_path:
+            raise LaunchError(f"Не удалось найти или установить Java для Minecraft {mc_version}")
+        print(f"Java {java_major} для {version_name}: {java_path}")
+        return java_path, java_major
+    
+    def install_version(self, loader, mc_version, java_path):
+        """Проверяет установку и при необходимости ставит версию, возвращает имя версии для запуска"""
+        version_name = mc_version
+        token = self.launch_task.token
+        token.check()
+        started = time.monotonic()
         
-        # Если версия не подходит, спрашиваем пользователя
-        reply = QMessageBox.question(
-            self,
-            "Версия Java",
-            f"Minecraft {self.current_mc_version} рекомендуется Java {recommended_java}.\n"
-            f"У вас Java {current_java}.\n\n"
-            "Хотите скачать и установить подходящую версию Java?\n"
-            "Если нет, запуск будет продолжен с текущей Java (может не работать).",
-            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel
-        )
+        # Установка Forge если выбран
+        if loader == "Forge":
+            self.update_status("Установка Forge...")
+            
+            self.forge_install_success = False
+            
+            # Создаем поток установки Forge
+            self.forge_thread = ForgeInstallThread(
+                self.minecraft_dir,
+                mc_version,
+                java_path
+            )
+            self.connect_progress(self.forge_thread)
+            # Обработчик вызывается в потоке установки, до выхода из wait()
+            self.forge_thread.finished.connect(self.on_forge_install_finished, Qt.DirectConnection)
+            
+            token.on_cancel(self.forge_thread.stop)
+            self.forge_thread.start()
+            self.forge_thread.wait()
+            self.observe_install("forge", started, self.forge_install_success)
+            
+            if not self.forge_install_success:
+                raise LaunchError("Не удалось установить Forge")
+            
+            # Получаем имя установленной версии
+            version_name = self.forge_thread.version_name
+            print(f"Forge установлен, версия для запуска: {version_name}")
+            
+        # Установка Fabric если выбран
+        elif loader == "Fabric":
+            self.update_status("Установка Fabric...")
+            
+            self.fabric_install_success = False
+            
+            # Создаем поток установки Fabric
+            self.fabric_thread = FabricInstallThread(
+                self.minecraft_dir,
+                mc_version,
+                java_path
+            )
+            self.connect_progress(self.fabric_thread)
+            self.fabric_thread.finished.connect(self.on_fabric_install_finished, Qt.DirectConnection)
+            
+            token.on_cancel(self.fabric_thread.stop)
+            self.fabric_thread.start()
+            self.fabric_thread.wait()
+            self.observe_install("fabric", started, self.fabric_install_success)
+            
+            if not self.fabric_install_success:
+                raise LaunchError("Не удалось установить Fabric")
+            
+            # Получаем имя установленной версии
+            version_name = self.fabric_thread.version_name
+            print(f"Fabric установлен, версия для запуска: {version_name}")
         
-        if reply == QMessageBox.Yes:
-            dialog = JavaDownloadDialog(self, self.current_mc_version)
-            if dialog.exec_() == QDialog.Accepted:
-                return True
-            return False
-        elif reply == QMessageBox.No:
-            # Продолжаем с текущей Java
-            QMessageBox.warning(self, "Предупреждение", 
-                               f"Запуск с Java {current_java} может не работать. Рекомендуется Java {recommended_java}.")
-            return True
+        # Установка Vanilla
         else:
-            return False
-    
-    def launch_thread(self, username, memory_mb, loader, mc_version):
-        """Поток установки и запуска игры"""
-        try:
-            version_name = mc_version
+            self.update_status(f"Проверка Minecraft {version_name}...")
             
-            # Установка Forge если выбран
-            if loader == "Forge":
-                self.update_status("Установка Forge...")
-                
-                self.forge_install_success = False
-                
-                # Создаем поток установки Forge
-                self.forge_thread = ForgeInstallThread(
-                    self.minecraft_dir,
-                    mc_version,
-                    self.java_path
-                )
-                self.forge_thread.progress.connect(self.update_progress)
-                self.forge_thread.status.connect(self.update_status)
-                self.forge_thread.finished.connect(self.on_forge_install_finished)
-                
-                self.forge_thread.start()
-                
-                # Ждем завершения установки
-                while self.forge_thread.isRunning():
-                    QApplication.processEvents()
-                    time.sleep(0.1)
-                
-                if not self.forge_install_success:
-                    self.show_error("Не удалось установить Forge")
-                    return
-                
-                # Получаем имя установленной версии
-                version_name = self.forge_thread.version_name
-                print(f"Forge установлен, версия для запуска: {version_name}")
-                
-            # Установка Fabric если выбран
-            elif loader == "Fabric":
-                self.update_status("Установка Fabric...")
-                
-                self.fabric_install_success = False
-                
-                # Создаем поток установки Fabric
-                self.fabric_thread = FabricInstallThread(
-                    self.minecraft_dir,
-                    mc_version,
-                    self.java_path
-                )
-                self.fabric_thread.progress.connect(self.update_progress)
-                self.fabric_thread.status.connect(self.update_status)
-                self.fabric_thread.finished.connect(self.on_fabric_install_finished)
-                
-                self.fabric_thread.start()
-                
-                # Ждем завершения установки
-                while self.fabric_thread.isRunning():
-                    QApplication.processEvents()
-                    time.sleep(0.1)
+            # Проверяем установку Vanilla
+            version_dir = self.minecraft_dir / "versions" / version_name
+            version_json = version_dir / f"{version_name}.json"
+            version_jar = version_dir / f"{version_name}.jar"
+            
+            # Получаем список установленных версий
+            installed_versions = minecraft_launcher_lib.utils.get_installed_versions(str(self.minecraft_dir))
+            version_installed = any(ver["id"] == version_name for ver in installed_versions)
+            
+            # Если версия не установлена, повреждена или ее установка была прервана
+            if not version_installed or not is_version_complete(self.minecraft_dir, version_name):
+                # Папка версии не удаляется: установка продолжается,
+                # файлы с верным sha1 повторно не скачиваются
+                if is_install_pending(self.minecraft_dir, version_name) or version_dir.exists():
+                    self.update_status(f"Продолжение установки {version_name}...")
+                else:
+                    self.update_status(f"Установка {version_name}...")
                 
-                if not self.fabric_install_success:
-                    self.show_error("Не удалось установить Fabric")
-                    return
+                self.install_success = False
                 
-                # Получаем имя установленной версии
-                version_name = self.fabric_thread.version_name
-                print(f"Fabric установлен, версия для запуска: {version_name}")
-            
-            # Установка Vanilla
-            else:
-                self.update_status(f"Проверка Minecraft {version_name}...")
+                # Запускаем установку
+                self.install_thread = DownloadProgressThread(self.minecraft_dir, version_name)
+                self.connect_progress(self.install_thread)
+                self.install_thread.finished.connect(self.on_install_finished, Qt.DirectConnection)
                 
-                # Проверяем установку Vanilla
-                version_dir = self.minecraft_dir / "versions" / version_name
-                version_json = version_dir / f"{version_name}.json"
-                version_jar = version_dir / f"{version_name}.jar"
+                token.on_cancel(self.install_thread.stop)
+                self.install_thread.start()
+                self.install_thread.wait()
+                self.observe_install("vanilla", started, self.install_success)
                 
-                # Получаем список установленных версий
-                installed_versions = minecraft_launcher_lib.utils.get_installed_versions(str(self.minecraft_dir))
-                version_installed = any(ver["id"] == version_name for ver in installed_versions)
+                if not self.install_success:
+                    raise LaunchError(f"Не удалось установить {version_name}")
                 
-                # Если версия не установлена или повреждена
-                if not version_installed or not version_json.exists() or not version_jar.exists():
-                    self.update_status(f"Установка {version_name}...")
-                    
-                    # Удаляем поврежденную установку если есть
-                    if version_dir.exists():
-                        import shutil
-                        try:
-                            shutil.rmtree(version_dir)
-                            self.update_status("Удалена поврежденная установка...")
-                        except:
-                            pass
-                    
-                    self.install_success = False
-                    
-                    # Запускаем установку
-                    self.install_thread = DownloadProgressThread(self.minecraft_dir, version_name)
-                    self.install_thread.progress.connect(self.update_progress)
-                    self.install_thread.status.connect(self.update_status)
-                    self.install_thread.finished.connect(self.on_install_finished)
-                    
-                    self.install_thread.start()
-                    
-                    # Ждем завершения установки
-                    while self.install_thread.isRunning():
-                        QApplication.processEvents()
-                        time.sleep(0.1)
-                    
-                    if not self.install_success:
-                        self.show_error(f"Не удалось установить {version_name}")
-                        return
-                    
-                    # Проверяем еще раз после установки
-                    if not version_json.exists() or not version_jar.exists():
-                        self.show_error(f"Установка завершена, но файлы не найдены")
-                        return
-                else:
-                    self.update_status(f"Версия {version_name} уже установлена")
-            
-            # Запускаем игру
-            self.update_status("Запуск игры...")
-            success = self.run_game(username, memory_mb, version_name, mc_version)
-            
-            if not success:
-                self.show_error("Не удалось запустить игру")
+                # Проверяем еще раз после установки
+                if not version_json.exists() or not version_jar.exists():
+                    raise LaunchError("Установка завершена, но файлы не найдены")
             else:
-                self.update_status("Игра запущена!")
-                QMetaObject.invokeMethod(self, "delayed_close")
-                
+                self.update_status(f"Версия {version_name} уже установлена")
+        
+        return version_name
+    
+    def observe_install(self, loader, started, success):
+        if self.launch_task.token.is_cancelled:
+            result = "cancelled"
+        else:
+            result = "ok" if success else "failed"
+        get_metrics().install_duration.observe(time.monotonic() - started, loader=loader, result=result)
+        get_memory_tracker().snapshot(f"install.{loader}")
+    
+    def verify_before_launch(self, version_name):
+        """Быстрая проверка (наличие и размер файлов), поврежденные файлы скачиваются заново.
+        
+        Файлы, которые скачать не удалось или неоткуда (выходы процессоров
+        Forge без url), не дают запустить игру: версия помечается журналом
+        как недоустановленная, и следующий запуск повторит установку -
+        Forge возьмет выходы процессоров из кеша. Ошибка самой проверки
+        тоже останавливает запуск.
+        """
+        self.update_status("Проверка файлов...")
+        verifier = VersionVerifier(self.minecraft_dir, self.update_status, self.update_progress,
+                                   cancel=self.launch_task.token)
+        try:
+            failed = verifier.repair(version_name, LEVEL_STAT)
+        except Cancelled:
+            raise
         except Exception as e:
-            self.show_error(f"Исключение: {str(e)}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            self.restore_ui()
+            # Проверка не прошла - файлы версии неизвестны, запускать нельзя
+            self.mark_for_reinstall(version_name)
+            raise LaunchError(
+                f"Не удалось проверить файлы {version_name}: {e}\n\n"
+                "Установка версии будет повторена при следующем запуске."
+            )
+        if not failed:
+            return
+        
+        self.mark_for_reinstall(version_name)
+        names = ", ".join(os.path.basename(entry["path"]) for entry in failed[:3])
+        raise LaunchError(
+            f"Не удалось восстановить файлы {version_name} ({len(failed)}): {names}\n\n"
+            "Установка версии будет повторена при следующем запуске."
+        )
+    
+    def prepare_command(self, username, memory_mb, version_name, mc_version, java):
+        launch = self.build_launch_command(username, memory_mb, version_name, mc_version, java)
+        if not launch:
+            raise LaunchError("")
+        return launch
+    
+    def spawn_game(self, launch):
+        self.update_status("Запуск игры...")
+        if not self.start_game(launch):
+            raise LaunchError("")
+    
+    def is_version_json_present(self, version_name):
+        return (self.minecraft_dir / "versions" / version_name / f"{version_name}.json").exists()
+    
+    def run_warmup(self, version_name):
+        """Прогревает кеш ОС для файлов версии, если это включено в настройках"""
+        if not self.warmup_enabled or not self.is_version_json_present(version_name):
+            return
+        self.warmer = PageCacheWarmer(self.minecraft_dir, version_name)
+        self.launch_task.token.on_cancel(self.warmer.stop)
+        # Выполняется в потоке задачи графа
+        self.warmer.run()
+    
+    def scan_mods(self, loader):
+        """Проверяет, что моды в папке mods подходят выбранному загрузчику"""
+        mods_dir = self.minecraft_dir / "mods"
+        if not mods_dir.is_dir():
+            return []
+        mismatched = []
+        for mod_file in sorted(mods_dir.glob("*.jar")):
+            mod_loader = get_mod_loader(mod_file)
+            if mod_loader and mod_loader != loader:
+                mismatched.append(mod_file.name)
+                print(f"Мод {mod_file.name} для {mod_loader}, выбран {loader}")
+        return mismatched
     
     def get_forge_version_name(self, mc_version):
         """Возвращает правильное имя версии Forge для разных версий Minecraft"""
@@ -308,6 +494,14 @@ class MainWindowGame:
     
     def run_game(self, username, memory_mb, version_name, original_version=None):
         """Запускает игру с указанными параметрами"""
+        launch = self.build_launch_command(username, memory_mb, version_name, original_version)
+        return bool(launch) and self.start_game(launch)
+    
+    def build_launch_command(self, username, memory_mb, version_name, original_version=None, java=None):
+        """Собирает команду запуска, возвращает словарь с командой и параметрами или None.
+        
+        java - уже выбранная Java (путь, мажорная версия), иначе выбирается здесь.
+        """
         try:
             actual_version_name = version_name
             loader_type = "vanilla"
@@ -330,7 +524,7 @@ class MainWindowGame:
             
             if not version_json.exists():
                 self.show_error(f"Версия {actual_version_name} не найдена")
-                return False
+                return None
             
             # Определяем версию Minecraft из имени
             mc_version = original_version if original_version else actual_version_name
@@ -381,8 +575,13 @@ class MainWindowGame:
                 f"-Dminecraft.launcher.version=1.0",
             ])
             
+            # Выбираем Java по требованиям версии (из реестра, без повторной проверки)
+            java_path, java_version = java or self.select_java_for_version(actual_version_name, mc_version)
+            if not java_path:
+                self.show_error(f"Не найдена Java для Minecraft {mc_version}")
+                return None
+            
             # Добавляем аргументы для старых версий Java
-            java_version = get_java_major_version(self.java_path)
             if java_version >= 9:
                 jvm_args.extend([
                     "--add-opens=java.base/java.util.jar=ALL-UNNAMED",
@@ -449,8 +648,7 @@ class MainWindowGame:
             options["jvmArguments"] = jvm_args
             
             # Путь к Java
-            if self.java_path:
-                options["executablePath"] = self.java_path
+            options["executablePath"] = java_path
             
             # Добавляем аргументы из JSON если они есть и не были добавлены ранее
             if "arguments" in version_data:
@@ -465,14 +663,70 @@ class MainWindowGame:
             
             # Получаем команду запуска
             try:
-                command = minecraft_launcher_lib.command.get_minecraft_command(
-                    actual_version_name,
-                    str(self.minecraft_dir),
-                    options
-                )
+                with get_tracer().span("get_minecraft_command", version=actual_version_name):
+                    command = minecraft_launcher_lib.command.get_minecraft_command(
+                        actual_version_name,
+                        str(self.minecraft_dir),
+                        options
+                    )
             except Exception as e:
                 self.show_error(f"Ошибка получения команды запуска: {str(e)}\n\nПроверьте установку Minecraft и попробуйте переустановить версию.")
-                return False
+                return None
+            
+            # Убираем повторы библиотек и флагов JVM из всей цепочки inheritsFrom
+            try:
+                with get_tracer().span("compact_command"):
+                    command, dropped = ClasspathResolver(self.minecraft_dir).compact_command(actual_version_name, command)
+                if dropped["libraries"] or dropped["jvm"]:
+                    print(f"Удалено из classpath: {len(dropped['libraries'])}, повторов JVM: {len(dropped['jvm'])}")
+                    for entry in dropped["libraries"] + dropped["jvm"]:
+                        print(f"  - {entry}")
+            except Exception as e:
+                print(f"Не удалось сжать команду запуска: {e}")
+            
+            # Библиотеки и natives - с быстрого диска, папка игры (сохранения) остается прежней
+            staging_used = False
+            if self.staging_enabled:
+                self.update_status("Подготовка файлов на быстром диске...")
+                try:
+                    with get_tracer().span("staging"):
+                        command = StagingMirror(self.minecraft_dir).stage_command(command)
+                    staging_used = True
+                except Exception as e:
+                    print(f"Staging не удался, запуск из папки игры: {e}")
+            
+            return {
+                "command": command,
+                "options": options,
+                "version_name": actual_version_name,
+                "mc_version": mc_version,
+                "major_version": major_version,
+                "loader_type": loader_type,
+                "is_modern_forge": is_modern_forge,
+                "java_path": java_path,
+                "java_version": java_version,
+                "staging_used": staging_used,
+            }
+            
+        except Exception as e:
+            print(f"Ошибка сборки команды запуска: {e}")
+            import traceback
+            traceback.print_exc()
+            self.show_error(f"Ошибка запуска: {str(e)}")
+            return None
+    
+    def start_game(self, launch):
+        """Запускает процесс игры по собранной команде"""
+        try:
+            command = launch["command"]
+            options = launch["options"]
+            actual_version_name = launch["version_name"]
+            mc_version = launch["mc_version"]
+            major_version = launch["major_version"]
+            loader_type = launch["loader_type"]
+            is_modern_forge = launch["is_modern_forge"]
+            java_path = launch["java_path"]
+            java_version = launch["java_version"]
             
             print(f"Запуск Minecraft {actual_version_name}")
             print(f"Команда: {' '.join(command)}")
@@ -492,22 +746,27 @@ class MainWindowGame:
             if os.name == 'nt':
                 creation_flags = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.CREATE_NO_WINDOW
             
+            tracer = get_tracer()
             try:
-                process = subprocess.Popen(
-                    command,
-                    cwd=str(self.minecraft_dir),
-                    creationflags=creation_flags,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    encoding='utf-8',
-                    errors='ignore',
-                    bufsize=1
-                )
+                with tracer.span("spawn", version=actual_version_name):
+                    process = subprocess.Popen(
+                        command,
+                        cwd=str(self.minecraft_dir),
+                        creationflags=creation_flags,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        text=True,
+                        encoding='utf-8',
+                        errors='ignore',
+                        bufsize=1
+                    )
             except Exception as e:
                 self.show_error(f"Ошибка запуска процесса: {str(e)}")
                 return False
             
+            start_time_to_menu(actual_version_name, self.warmup_enabled, launch["staging_used"])
+            get_metrics().watch_game(process.pid)
+            
             # Сохраняем вывод игры в лог
             log_file = self.minecraft_dir / "logs" / "game_output.log"
             try:
@@ -517,6 +776,8 @@ class MainWindowGame:
             
             def save_output():
                 """Сохраняет вывод игры в лог-файл"""
+                # Отметки готовности игры для трассы запуска
+                marks = {"first": False, "menu": False}
                 try:
                     with open(log_file, 'w', encoding='utf-8', buffering=1) as f:
                         while True:
@@ -536,6 +797,12 @@ class MainWindowGame:
                             try:
                                 line = process.stdout.readline()
                                 if line:
+                                    if not marks["first"]:
+                                        marks["first"] = True
+                                        tracer.instant("game_first_output")
+                                    if not marks["menu"] and any(marker in line for marker in MENU_LOG_MARKERS):
+                                        marks["menu"] = True
+                                        tracer.instant("game_menu")
                                     f.write(line)
                                     print(f"MC: {line.strip()}")
                                 else:
@@ -553,6 +820,7 @@ class MainWindowGame:
             
             # Проверяем не завершился ли процесс сразу
             if process.poll() is not None:
+                launch["exit_code"] = process.returncode
                 try:
                     stderr_output = process.stderr.read() if process.stderr else ""
                 except:
@@ -593,8 +861,7 @@ class MainWindowGame:
                     error_msg += f"Ошибка:\n{stderr_output[:500]}"
                 
                 # Добавляем информацию о Java версии
-                java_ver = get_java_major_version(self.java_path)
-                error_msg += f"\n\nJava версия: {java_ver}"
+                error_msg += f"\n\nJava версия: {java_version} ({java_path})"
                 
                 # Добавляем информацию о версии
                 error_msg += f"\nВерсия Minecraft: {actual_version_name}"
@@ -685,14 +952,30 @@ class MainWindowGame:
         self.progress_bar.setValue(0)
     
     def update_status(self, text):
-        """Обновляет статус в UI"""
-        QMetaObject.invokeMethod(self.status_label, "setText",
-                                 Q_ARG(str, text))
+        """Обновляет статус в UI (из любого потока, доставляет ProgressAggregator)"""
+        self.progress_tracker.current().update(status=text)
     
     def update_progress(self, value):
-        """Обновляет прогресс бар"""
-        QMetaObject.invokeMethod(self.progress_bar, "setValue",
-                                 Q_ARG(int, value))
+        """Обновляет прогресс текущего этапа (0-100)"""
+        self.progress_tracker.current().update(fraction=value / 100)
+    
+    def connect_progress(self, thread):
+        """Сигналы потока установки пишутся в узел текущего этапа прямо в потоке
+        установки, без очереди событий Qt"""
+        node = self.progress_tracker.current()
+        thread.progress.connect(lambda value: node.update(fraction=value / 100), Qt.DirectConnection)
+        thread.status.connect(lambda text: node.update(status=text), Qt.DirectConnection)
+        if hasattr(thread, "downloaded"):
+            thread.downloaded.connect(node.add_bytes, Qt.DirectConnection)
+        # Объем скачивания известен - доля этапа считается по байтам
+        if hasattr(thread, "download_size"):
+            thread.download_size.connect(node.set_total_bytes, Qt.DirectConnection)
+    
+    @pyqtSlot(int, str)
+    def on_progress_changed(self, value, text):
+        self.progress_bar.setValue(value)
+        if text:
+            self.status_label.setText(text)
     
     def show_error(self, text):
         """Показывает сообщение об ошибке"""
@@ -712,7 +995,14 @@ class MainWindowGame:
     
     @pyqtSlot()
     def delayed_close(self):
-        """Закрывает лаунчер с задержкой"""
+        """Закрывает лаунчер с задержкой.
+        
+        С открытым портом метрик (--metrics-port) лаунчер остается открытым:
+        память и CPU игры замеряются его потоком.
+        """
+        if get_metrics().watching_game:
+            print("Открыт порт метрик: лаунчер остается открытым для замеров игры")
+            return
         QTimer.singleShot(2000, self.close)
     
     def get_installed_versions(self):
@@ -737,34 +1027,20 @@ class MainWindowGame:
         else:
             return "Vanilla"
     
-    def verify_version_files(self, version_name):
-        """Проверяет целостность файлов версии"""
-        version_dir = self.minecraft_dir / "versions" / version_name
-        json_file = version_dir / f"{version_name}.json"
-        jar_file = version_dir / f"{version_name}.jar"
-        
-        return json_file.exists() and jar_file.exists()
+    def verify_version_files(self, version_name, level=LEVEL_SHA1):
+        """Проверяет целостность файлов версии (размер, zip, sha1 - в зависимости от уровня)"""
+        verifier = VersionVerifier(self.minecraft_dir, self.update_status, self.update_progress)
+        return not verifier.verify(version_name, level)
+    
+    def mark_for_reinstall(self, version_name):
+        """Открывает журнал установки: следующий запуск переустановит версию"""
+        InstallTransaction(self.minecraft_dir, version_name).begin(self.get_version_type(version_name).lower())
     
-    def repair_version(self, version_name):
-        """Пытается восстановить поврежденную версию"""
+    def repair_version(self, version_name, level=LEVEL_SHA1):
+        """Заново скачивает только поврежденные и отсутствующие файлы версии"""
         try:
-            version_dir = self.minecraft_dir / "versions" / version_name
-            
-            # Проверяем JSON
-            json_path = version_dir / f"{version_name}.json"
-            if not json_path.exists():
-                return False
-            
-            # Проверяем JAR
-            jar_path = version_dir / f"{version_name}.jar"
-            if not jar_path.exists():
-                # Пробуем скопировать из vanilla версии
-                vanilla_jar = self.minecraft_dir / "versions" / self.current_mc_version / f"{self.current_mc_version}.jar"
-                if vanilla_jar.exists():
-                    import shutil
-                    shutil.copy2(vanilla_jar, jar_path)
-                    return True
-            
-            return False
-        except:
+            verifier = VersionVerifier(self.minecraft_dir, self.update_status, self.update_progress)
+            return not verifier.repair(version_name, level)
+        except Exception as e:
+            print(f"Ошибка восстановления версии {version_name}: {e}")
             return False
\ No newline at end of file
@@ -6,9 +6,13 @@ import json
 import os
 import sys
 import subprocess
-from core.config import DEFAULT_MC_VERSION, REQUIRED_JAVA_VERSION
-from core.utils import check_java_version, create_launcher_profiles
+from core.config import DEFAULT_MC_VERSION
+from core.memory import get_memory_tracker
+from core.utils import create_launcher_profiles
 from dialogs.java_dialog import JavaDownloadDialog
+from dialogs.launch_history_dialog import LaunchHistoryDialog
+from threads.cleanup_thread import CleanupThread
+from threads.java_search_thread import JavaSearchThread
 
 class MainWindowHandlers:
     """Класс для обработчиков событий главного окна"""
@@ -50,12 +54,8 @@ class MainWindowHandlers:
         self.mods_dialog.show()
     
     def check_java_after_start(self):
-        if not self.java_path:
-            self.find_java_auto()
-        else:
-            is_valid, msg = check_java_version(self.java_path, REQUIRED_JAVA_VERSION)
-            if not is_valid:
-                self.find_java_auto()
+        # Текущая Java проверяется в фоне, поиск - только если она не запускается
+        self.start_java_search(keep_path=self.java_path or None)
     
     def browse_directory(self):
         directory = QFileDialog.getExistingDirectory(
@@ -68,65 +68,105 @@ class MainWindowHandlers:
     
     def browse_java(self):
         filename, _ = QFileDialog.getOpenFileName(
-            self, "Выберите java.exe (Java 21)", "C:/",
+            self, "Выберите java.exe", "C:/",
             "Java Executable (java.exe);;Все файлы (*.*)"
         )
         if filename:
             self.settings_page.java_edit.setText(filename)
             self.java_path = filename
-            is_valid, msg = check_java_version(filename, REQUIRED_JAVA_VERSION)
-            if is_valid:
-                self.status_label.setText(f"Java выбрана: {os.path.basename(filename)}")
-            else:
-                QMessageBox.warning(self, "Внимание", f"Выбранная Java не подходит:\n{msg}")
+            # Версия выбранной Java определяется запуском java -version - в фоне
+            self.java_register_thread = JavaSearchThread(self.java_manager, self.minecraft_dir, java_path=filename)
+            self.java_register_thread.found.connect(self.on_java_registered)
+            self.java_register_thread.start()
     
-    def find_java_auto(self):
-        self.status_label.setText("Ищем Java 21...")
-        
-        runtime_path = self.minecraft_dir / "runtime" / "java-runtime-gamma" / "bin"
-        
-        if os.name == 'nt':
-            java_exe = runtime_path / "java.exe"
+    def on_java_registered(self, java_path, major):
+        if major:
+            self.status_label.setText(f"Java {major} выбрана: {os.path.basename(java_path)}")
         else:
-            java_exe = runtime_path / "java"
+            QMessageBox.warning(self, "Внимание", "Не удалось определить версию выбранной Java")
+    
+    def find_java_auto(self):
+        self.start_java_search()
+    
+    def start_java_search(self, keep_path=None):
+        """Ищет Java для текущей версии в фоне, результат - в on_java_found"""
+        if self.java_search_thread is not None and self.java_search_thread.isRunning():
+            return
+        self.java_search_thread = JavaSearchThread(
+            self.java_manager, self.minecraft_dir, self.current_mc_version, keep_path=keep_path
+        )
+        self.java_search_thread.status.connect(self.status_label.setText)
+        self.java_search_thread.found.connect(self.on_java_found)
+        self.java_search_thread.start()
+    
+    def on_java_found(self, java_path, required):
+        if java_path:
+            self.settings_page.java_edit.setText(java_path)
+            self.java_path = java_path
+            self.status_label.setText(f"Java {required} найдена")
+            return
         
-        if java_exe.exists():
-            is_valid, msg = check_java_version(str(java_exe), REQUIRED_JAVA_VERSION)
-            if is_valid:
-                self.settings_page.java_edit.setText(str(java_exe))
-                self.java_path = str(java_exe)
-                self.status_label.setText("Java найдена в runtime")
-                return
+        self.status_label.setText(f"Java {required} не найдена!")
+        dialog = JavaDownloadDialog(self)
+        dialog.exec_()
+    
+    def show_launch_history(self):
+        """Показывает последние запуски и перцентили времени запуска"""
+        dialog = LaunchHistoryDialog(self)
+        dialog.exec_()
+    
+    def take_memory_snapshot(self):
+        """Снимок памяти по подсистемам и разница с прошлым снимком"""
+        tracker = get_memory_tracker()
+        report = tracker.snapshot("вручную")
+        if report is None:
+            return
+        lines = report.splitlines()
+        if len(lines) > 30:
+            lines = lines[:30] + ["..."]
+        QMessageBox.information(self, "Память", "\n".join(lines) + f"\n\nПолный отчет: {tracker.report_path}")
+    
+    def cleanup_storage(self):
+        """Ищет неиспользуемые библиотеки, ассеты, Java и версии"""
+        if getattr(self, "cleanup_thread", None) and self.cleanup_thread.isRunning():
+            return
         
-        if os.name == 'nt':
-            search_paths = [
-                "C:/Program Files/Java/jdk-21/bin/java.exe",
-                "C:/Program Files/Java/jre-21/bin/java.exe",
-                "C:/Program Files (x86)/Java/jdk-21/bin/java.exe",
-                "C:/Program Files (x86)/Java/jre-21/bin/java.exe",
-                str(Path.home() / ".jdks" / "jdk-21" / "bin" / "java.exe"),
-            ]
-        else:
-            search_paths = [
-                "/usr/lib/jvm/jdk-21/bin/java",
-                "/usr/lib/jvm/jre-21/bin/java",
-                "/usr/java/jdk-21/bin/java",
-                "/opt/java/jdk-21/bin/java",
-                str(Path.home() / ".jdks" / "jdk-21" / "bin" / "java"),
-            ]
+        self.cleanup_thread = CleanupThread(self.minecraft_dir, keep_paths=[self.java_path])
+        self.cleanup_thread.status.connect(self.status_label.setText)
+        self.cleanup_thread.report_ready.connect(self.on_cleanup_report)
+        self.cleanup_thread.finished.connect(lambda success, message: self.status_label.setText(message))
+        self.cleanup_thread.start()
+    
+    def on_cleanup_report(self, report):
+        """Показывает результат пробного прохода и запускает удаление"""
+        if not report["total_bytes"]:
+            QMessageBox.information(self, "Очистка", "Неиспользуемых файлов не найдено")
+            return
         
-        for java_path in search_paths:
-            if os.path.exists(java_path):
-                is_valid, msg = check_java_version(java_path, REQUIRED_JAVA_VERSION)
-                if is_valid:
-                    self.settings_page.java_edit.setText(java_path)
-                    self.java_path = java_path
-                    self.status_label.setText(f"Java 21 найдена")
-                    return
+        names = {
+            "versions": "Версии",
+            "libraries": "Библиотеки",
+            "assets": "Ассеты",
+            "runtime": "Java runtime",
+        }
+        lines = [
+            f"{title}: {len(report[key]['paths'])} шт., {report[key]['bytes'] / 1024 / 1024:.1f} МБ"
+            for key, title in names.items() if report[key]["paths"]
+        ]
+        answer = QMessageBox.question(
+            self, "Очистка",
+            "Найдены файлы, не используемые ни одной установленной версией:\n\n"
+            + "\n".join(lines)
+            + f"\n\nВсего: {report['total_bytes'] / 1024 / 1024:.1f} МБ. Удалить?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if answer != QMessageBox.Yes:
+            return
         
-        self.status_label.setText("Java 21 не найдена!")
-        dialog = JavaDownloadDialog(self)
-        dialog.exec_()
+        self.cleanup_thread = CleanupThread(self.minecraft_dir, report=report)
+        self.cleanup_thread.status.connect(self.status_label.setText)
+        self.cleanup_thread.finished.connect(lambda success, message: self.status_label.setText(message))
+        self.cleanup_thread.start()
     
     def load_settings(self):
         settings_path = Path.home() / ".ai_launcher_settings.json"
@@ -140,6 +180,15 @@ class MainWindowHandlers:
                 if hasattr(self, 'memory_slider'):
                     self.memory_slider.setValue(data.get('memory', 4096))
                     self.memory_label.setText(f"{self.memory_slider.value()} MB")
+                self.warmup_enabled = data.get('warmup_cache', True)
+                if hasattr(self, 'settings_page'):
+                    self.settings_page.warmup_checkbox.setChecked(self.warmup_enabled)
+                self.staging_enabled = data.get('staging', False)
+                if hasattr(self, 'settings_page'):
+                    self.settings_page.staging_checkbox.setChecked(self.staging_enabled)
+                self.profile_enabled = data.get('profile', False)
+                if hasattr(self, 'settings_page'):
+                    self.settings_page.profile_checkbox.setChecked(self.profile_enabled)
                 self.loader = data.get('loader', "Vanilla")
                 self.loader_combo.setCurrentText(self.loader)
                 self.current_mc_version = data.get('mc_version', DEFAULT_MC_VERSION)
@@ -268,6 +317,9 @@ class MainWindowHandlers:
             'username': self.name_edit.text(),
             'memory': self.memory_slider.value() if hasattr(self, 'memory_slider') else 4096,
             'loader': self.loader_combo.currentText(),
+            'warmup_cache': self.warmup_enabled,
+            'staging': self.staging_enabled,
+            'profile': self.profile_enabled,
             'mc_version': self.current_mc_version,
             'version_type': self.version_type_label.text() if hasattr(self, 'version_type_label') else 'release',
         }
@@ -3,6 +3,7 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 import os
 from core.config import DEFAULT_MC_VERSION, get_asset_path
+from core.memory import get_memory_tracker
 
 class MainWindowUI:
     
@@ -270,7 +271,9 @@ class MainWindowUI:
     def show_version_selector(self):
         from dialogs.version_selector import VersionSelectorDialog
         dialog = VersionSelectorDialog(self, self.current_mc_version)
-        if dialog.exec_() == QDialog.Accepted:
+        accepted = dialog.exec_() == QDialog.Accepted
+        get_memory_tracker().snapshot("version_selector")
+        if accepted:
             selected_version = dialog.get_selected_version()
             if selected_version:
                 self.current_mc_version = selected_version["id"]
@@ -2,6 +2,8 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from core.config import DEFAULT_MC_VERSION
+from core.memory import get_memory_tracker
+from core.profiler import get_profiler
 from gui.widgets import BackgroundWidget
 from pathlib import Path
 import json
@@ -133,12 +135,12 @@ class SettingsPage(BackgroundWidget):
         memory_group.setLayout(memory_layout)
         settings_layout.addWidget(memory_group)
         
-        java_group = self.create_group_box("Путь к Java (требуется Java 21+)")
+        java_group = self.create_group_box("Путь к Java")
         java_layout = QVBoxLayout()
         
         java_path_layout = QHBoxLayout()
         self.java_edit = QLineEdit()
-        self.java_edit.setPlaceholderText("Автоматический поиск Java 21...")
+        self.java_edit.setPlaceholderText("Автоматический выбор Java...")
         self.java_edit.setReadOnly(True)
         java_browse = QPushButton("Указать")
         java_browse.clicked.connect(self.parent.browse_java)
@@ -146,17 +148,83 @@ class SettingsPage(BackgroundWidget):
         java_path_layout.addWidget(java_browse)
         java_layout.addLayout(java_path_layout)
         
-        java_auto = QPushButton("Автопоиск Java 21")
+        java_auto = QPushButton("Автопоиск Java")
         java_auto.clicked.connect(self.parent.find_java_auto)
         java_layout.addWidget(java_auto)
         
-        java_info = QLabel(f"Java 21 необходима для Minecraft {self.parent.current_mc_version}")
+        java_info = QLabel("Подходящая Java для каждой версии выбирается и устанавливается автоматически")
         java_info.setStyleSheet("color: #888; font-size: 10px; padding: 5px; background: transparent; border: none;")
         java_layout.addWidget(java_info)
         
         java_group.setLayout(java_layout)
         settings_layout.addWidget(java_group)
         
+        speed_group = self.create_group_box("Ускорение запуска")
+        speed_layout = QVBoxLayout()
+        
+        self.warmup_checkbox = QCheckBox("Прогревать файлы игры перед запуском")
+        self.warmup_checkbox.setChecked(self.parent.warmup_enabled)
+        self.warmup_checkbox.stateChanged.connect(self.on_warmup_toggled)
+        speed_layout.addWidget(self.warmup_checkbox)
+        
+        warmup_info = QLabel("Библиотеки и jar версии заранее загружаются в кеш системы, пока выбирается Java и собирается команда запуска. Ускоряет первый запуск после перезагрузки компьютера.")
+        warmup_info.setStyleSheet("color: #888; font-size: 10px; padding: 5px; background: transparent; border: none;")
+        warmup_info.setWordWrap(True)
+        speed_layout.addWidget(warmup_info)
+        
+        self.staging_checkbox = QCheckBox("Запускать с быстрого диска (staging)")
+        self.staging_checkbox.setChecked(self.parent.staging_enabled)
+        self.staging_checkbox.stateChanged.connect(self.on_staging_toggled)
+        speed_layout.addWidget(self.staging_checkbox)
+        
+        staging_info = QLabel("Для папки игры на сетевом или медленном диске: библиотеки и natives копируются в оперативную память или на локальный диск, копируются только изменившиеся файлы. Сохранения остаются в папке игры.")
+        staging_info.setStyleSheet("color: #888; font-size: 10px; padding: 5px; background: transparent; border: none;")
+        staging_info.setWordWrap(True)
+        speed_layout.addWidget(staging_info)
+        
+        history_button = QPushButton("История запусков")
+        history_button.clicked.connect(self.parent.show_launch_history)
+        speed_layout.addWidget(history_button)
+        
+        history_info = QLabel("Длительность каждого шага подготовки, время до главного меню и падения игры по каждому запуску, медиана и p95 за 30 дней.")
+        history_info.setStyleSheet("color: #888; font-size: 10px; padding: 5px; background: transparent; border: none;")
+        history_info.setWordWrap(True)
+        speed_layout.addWidget(history_info)
+        
+        self.profile_checkbox = QCheckBox("Профилирование лаунчера (для разработчиков)")
+        self.profile_checkbox.setChecked(self.parent.profile_enabled)
+        self.profile_checkbox.stateChanged.connect(self.on_profile_toggled)
+        speed_layout.addWidget(self.profile_checkbox)
+        
+        profile_info = QLabel("Стеки всех потоков снимаются 100 раз в секунду и сохраняются по этапам установки и запуска в папку profiles (свернутые стеки и speedscope). Почти не замедляет работу.")
+        profile_info.setStyleSheet("color: #888; font-size: 10px; padding: 5px; background: transparent; border: none;")
+        profile_info.setWordWrap(True)
+        speed_layout.addWidget(profile_info)
+        
+        # Учет памяти включается при запуске (--memory), поэтому кнопка видна только тогда
+        if get_memory_tracker().enabled:
+            memory_button = QPushButton("Снимок памяти")
+            memory_button.clicked.connect(self.parent.take_memory_snapshot)
+            speed_layout.addWidget(memory_button)
+        
+        speed_group.setLayout(speed_layout)
+        settings_layout.addWidget(speed_group)
+        
+        storage_group = self.create_group_box("Место на диске")
+        storage_layout = QVBoxLayout()
+        
+        cleanup_button = QPushButton("Освободить место")
+        cleanup_button.clicked.connect(self.parent.cleanup_storage)
+        storage_layout.addWidget(cleanup_button)
+        
+        storage_info = QLabel("Удаляет библиотеки, ассеты, Java и папки версий, которые не нужны ни одной установленной версии. Перед удалением показывается список.")
+        storage_info.setStyleSheet("color: #888; font-size: 10px; padding: 5px; background: transparent; border: none;")
+        storage_info.setWordWrap(True)
+        storage_layout.addWidget(storage_info)
+        
+        storage_group.setLayout(storage_layout)
+        settings_layout.addWidget(storage_group)
+        
         if self.parent.beta_enabled:
             plugins_group = self.create_group_box("Управление плагинами")
             plugins_layout = QVBoxLayout()
@@ -368,6 +436,19 @@ class SettingsPage(BackgroundWidget):
         if msg.exec_() == QMessageBox.Yes:
             self.restart_launcher()
     
+    def on_warmup_toggled(self, state):
+        self.parent.warmup_enabled = (state == Qt.Checked)
+    
+    def on_staging_toggled(self, state):
+        self.parent.staging_enabled = (state == Qt.Checked)
+    
+    def on_profile_toggled(self, state):
+        self.parent.profile_enabled = (state == Qt.Checked)
+        if self.parent.profile_enabled:
+            get_profiler().start()
+        else:
+            get_profiler().stop()
+    
     def restart_launcher(self):
         try:
             self.parent.save_settings()
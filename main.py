@@ -1,14 +1,23 @@
+import os
 import sys
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QFont, QFontDatabase, QPalette, QColor
-from PyQt5.QtCore import Qt
+import multiprocessing
 
-from core.config import get_asset_path
-from core.utils import create_launcher_profiles
-from gui.main_window import WONDERFULAND
+from core.memory import get_memory_tracker, memory_tracking_requested, run_memory_check
+
+# Учет памяти включается до импорта Qt и модулей лаунчера, чтобы в отчет попали и они
+if __name__ == "__main__" and memory_tracking_requested(sys.argv):
+    get_memory_tracker().start()
+
+# Qt и модули лаунчера импортируются внутри функций: процессы пула
+# (core.workers) на Windows заново импортируют этот файл как __mp_main__,
+# и им не нужно загружать весь GUI
 
 def setup_app_style(app):
     """Настройка стиля приложения"""
+    from PyQt5.QtGui import QFont, QFontDatabase, QPalette, QColor
+    from PyQt5.QtCore import Qt
+    from core.config import get_asset_path
+    
     app.setStyle('Fusion')
     
     # загрузить шрифт по умолчанию
@@ -42,17 +51,64 @@ def setup_app_style(app):
     return app
 
 def main():
+    from PyQt5.QtWidgets import QApplication
+    from core.metrics import METRICS_PORT_ENV_VAR, get_metrics
+    from core.profiler import PROFILE_ENV_VAR, get_profiler
+    from core.tracing import get_tracer
+    from core.utils import create_launcher_profiles
+    from gui.main_window import WONDERFULAND
+    
+    # Проверка бюджетов памяти: --memory-check (запуск и выбор версии)
+    # или --memory-check=startup,version_selector,install (install скачивает версию)
+    memory_check = next((arg for arg in sys.argv if arg.startswith("--memory-check")), None)
+    if memory_check:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    
     app = QApplication(sys.argv)
     app = setup_app_style(app)
     
     beta_enabled = "--beta" in sys.argv
     
+    # Трасса запуска в ~/.pylauncher/traces (также PYLAUNCHER_TRACE=1)
+    if "--trace" in sys.argv:
+        get_tracer().enable()
+    
+    # Профиль CPU всех потоков в ~/.pylauncher/profiles (также PYLAUNCHER_PROFILE=1),
+    # --profile=cprofile дополнительно пишет cProfile по этапам установки и запуска
+    profile_mode = os.environ.get(PROFILE_ENV_VAR, "")
+    for arg in sys.argv:
+        if arg == "--profile" or arg.startswith("--profile="):
+            profile_mode = arg.split("=", 1)[1] if "=" in arg else "1"
+    if profile_mode not in ("", "0"):
+        get_profiler().start(use_cprofile=(profile_mode == "cprofile"))
+    
+    # Метрики Prometheus в ~/.pylauncher/metrics (также PYLAUNCHER_METRICS=1),
+    # --metrics-port=9464 дополнительно открывает http://127.0.0.1:9464/metrics
+    if "--metrics" in sys.argv:
+        get_metrics().enable()
+    metrics_port = os.environ.get(METRICS_PORT_ENV_VAR)
+    for arg in sys.argv:
+        if arg.startswith("--metrics-port="):
+            metrics_port = arg.split("=", 1)[1]
+    if metrics_port:
+        try:
+            get_metrics().start_server(int(metrics_port))
+        except ValueError:
+            print(f"Неверный порт метрик: {metrics_port}")
+    
+    if memory_check:
+        scenarios = memory_check.split("=", 1)[1].split(",") if "=" in memory_check else ["startup", "version_selector"]
+        sys.exit(run_memory_check(app, scenarios))
+    
     launcher = WONDERFULAND(beta_enabled=beta_enabled)
     launcher.show()
     
     create_launcher_profiles(launcher.minecraft_dir)
+    get_memory_tracker().snapshot("startup")
     
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # Нужно для пула процессов в собранном exe
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""Бюджеты памяти MEMORY_CEILINGS_MB для сценариев --memory-check.
+
+Сеть подменяется: все запросы requests (и лаунчера, и
+minecraft_launcher_lib) отвечает FakeMojang из памяти - манифест
+версий, JSON версии, библиотеки, индекс ассетов, ассеты и jar клиента.
+Поэтому сценарий install проходит полностью, а результат не зависит
+от серверов Mojang.
+"""
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+# Настройки и папки лаунчера - во временной папке, до импорта core.config
+TEST_HOME = tempfile.mkdtemp(prefix="pylauncher_test_")
+for name in ("HOME", "USERPROFILE", "APPDATA"):
+    os.environ[name] = TEST_HOME
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.memory import MEMORY_CEILINGS_MB, get_memory_tracker, run_memory_check
+
+# Как и в main.py: учет памяти включается до импорта Qt и модулей лаунчера
+get_memory_tracker().start()
+
+import requests
+from PyQt5.QtWidgets import QApplication
+
+import main
+from core.config import DEFAULT_MC_VERSION
+
+MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest_v2.json"
+ASSETS_URL = "https://resources.download.minecraft.net"
+
+# Размер данных примерно как у настоящей версии, но без сотен мегабайт ассетов
+VERSIONS_COUNT = 800
+LIBRARIES_COUNT = 60
+ASSETS_COUNT = 400
+
+
+class FakeRaw(io.BytesIO):
+    decode_content = False
+
+
+class FakeMojang:
+    """Сервер Mojang в памяти: URL -> содержимое, остальное отвечает 404"""
+
+    def __init__(self, version_id):
+        self.files = {}
+        self.requested = []
+
+        client = self.add("https://piston-data.mojang.com/v1/objects/client.jar", self.make_jar("net/minecraft/client/Main.class"))
+        libraries = []
+        for i in range(LIBRARIES_COUNT):
+            path = f"com/example/lib{i}/1.0/lib{i}-1.0.jar"
+            artifact = self.add(f"https://libraries.minecraft.net/{path}", self.make_jar(f"lib{i}/Lib.class"))
+            libraries.append({
+                "name": f"com.example:lib{i}:1.0",
+                "downloads": {"artifact": dict(artifact, path=path)},
+            })
+
+        objects = {}
+        for i in range(ASSETS_COUNT):
+            data = f"asset {i}".encode() * 64
+            sha1 = hashlib.sha1(data).hexdigest()
+            self.files[f"{ASSETS_URL}/{sha1[:2]}/{sha1}"] = data
+            objects[f"minecraft/sounds/sound{i}.ogg"] = {"hash": sha1, "size": len(data)}
+        asset_index = self.add("https://piston-meta.mojang.com/v1/packages/index.json",
+                               json.dumps({"objects": objects}).encode())
+
+        version_json = self.add(f"https://piston-meta.mojang.com/v1/packages/{version_id}.json", json.dumps({
+            "id": version_id,
+            "type": "release",
+            "mainClass": "net.minecraft.client.main.Main",
+            "assets": "19",
+            "assetIndex": dict(asset_index, id="19", totalSize=0),
+            "downloads": {"client": client},
+            "libraries": libraries,
+        }).encode())
+
+        versions = [dict(version_json, id=version_id, type="release",
+                         time="2024-12-03T10:12:57+00:00", releaseTime="2024-12-03T10:12:57+00:00", complianceLevel=1)]
+        for i in range(VERSIONS_COUNT):
+            versions.append({
+                "id": f"{i // 100}.{i % 100}-fixture",
+                "type": "snapshot" if i % 3 else "release",
+                "url": f"https://piston-meta.mojang.com/v1/packages/fixture-{i}.json",
+                "time": "2020-01-01T00:00:00+00:00",
+                "releaseTime": "2020-01-01T00:00:00+00:00",
+                "sha1": "0" * 40,
+                "complianceLevel": 0,
+            })
+        self.files[MANIFEST_URL] = json.dumps({
+            "latest": {"release": version_id, "snapshot": version_id},
+            "versions": versions,
+        }).encode()
+
+    def add(self, url, data):
+        self.files[url] = data
+        return {"url": url, "sha1": hashlib.sha1(data).hexdigest(), "size": len(data)}
+
+    def make_jar(self, name):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zip_ref:
+            zip_ref.writestr(name, b"\xca\xfe\xba\xbe" + name.encode() * 32)
+        return buffer.getvalue()
+
+    def request(self, session, method, url, **kwargs):
+        self.requested.append(url)
+        data = self.files.get(url)
+        response = requests.models.Response()
+        response.url = url
+        response.status_code = 200 if data is not None else 404
+        response.reason = "OK" if data is not None else "Not Found"
+        response.encoding = "utf-8"
+        response._content = data or b""
+        response._content_consumed = True
+        response.raw = FakeRaw(data or b"")
+        response.headers["Content-Length"] = str(len(response._content))
+        return response
+
+
+class MemoryBudgetTest(unittest.TestCase):
+    """Сценарии из MEMORY_CEILINGS_MB укладываются в бюджет, а пропуск - ошибка"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv[:1])
+        main.setup_app_style(cls.app)
+
+    def setUp(self):
+        self.server = FakeMojang(DEFAULT_MC_VERSION)
+        network = mock.patch("requests.Session.request", autospec=True, side_effect=self.server.request)
+        network.start()
+        self.addCleanup(network.stop)
+
+    def tearDown(self):
+        # closeEvent лаунчера сохраняет настройки и останавливает задачи - здесь это не нужно
+        for widget in self.app.topLevelWidgets():
+            widget.hide()
+            widget.deleteLater()
+        self.app.processEvents()
+
+    def test_scenarios_within_budget(self):
+        self.assertEqual(run_memory_check(self.app, list(MEMORY_CEILINGS_MB)), 0)
+        # install действительно прошел через подмененную сеть до jar клиента
+        self.assertIn("https://piston-data.mojang.com/v1/objects/client.jar", self.server.requested)
+
+    def test_each_scenario_has_ceiling(self):
+        for name in ("startup", "version_selector", "install"):
+            self.assertIn(name, MEMORY_CEILINGS_MB)
+
+    def test_skipped_scenario_fails(self):
+        with mock.patch("minecraft_launcher_lib.utils.get_version_list", side_effect=requests.ConnectionError("offline")):
+            self.assertEqual(run_memory_check(self.app, ["version_selector"]), 1)
+
+    def test_unknown_scenario_fails(self):
+        self.assertEqual(run_memory_check(self.app, ["no_such_scenario"]), 1)
+
+    def test_failed_scenario_fails(self):
+        self.server.files.clear()
+        self.assertEqual(run_memory_check(self.app, ["install"]), 1)
+
+    def test_over_budget_fails(self):
+        with mock.patch.dict(MEMORY_CEILINGS_MB, {"startup": 0}):
+            self.assertEqual(run_memory_check(self.app, ["startup"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+from PyQt5.QtCore import *
+from core.cleanup import StorageCollector
+from core.tasks import TaskHandle
+
+
+class CleanupThread(QThread):
+    """Анализ и очистка неиспользуемых файлов в фоне.
+
+    Без report выполняется пробный проход (сигнал report_ready),
+    с report - удаление найденного.
+    """
+    progress = pyqtSignal(int)
+    status = pyqtSignal(str)
+    report_ready = pyqtSignal(object)
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, minecraft_dir, keep_versions=None, keep_paths=None, report=None):
+        super().__init__()
+        self.minecraft_dir = minecraft_dir
+        self.keep_versions = keep_versions
+        self.keep_paths = keep_paths
+        self.report = report
+        self.task = TaskHandle("очистка")
+        self.token = self.task.token
+        self.finished.connect(self.task.finish, Qt.DirectConnection)
+        
+    def run(self):
+        self.task.start()
+        try:
+            collector = StorageCollector(self.minecraft_dir, keep_paths=self.keep_paths)
+            
+            if self.report is None:
+                self.status.emit("Анализ занятого места...")
+                report = collector.plan(self.keep_versions)
+                self.report_ready.emit(report)
+                self.finished.emit(True, f"Можно освободить {report['total_bytes'] / 1024 / 1024:.0f} МБ")
+                return
+            
+            self.status.emit("Удаление неиспользуемых файлов...")
+            freed = collector.sweep(self.report, progress_callback=self.progress.emit, cancel=self.token)
+            self.finished.emit(True, f"Освобождено {freed / 1024 / 1024:.0f} МБ")
+            
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.finished.emit(False, f"Ошибка очистки: {str(e)}")
+    
+    def stop(self):
+        self.task.cancel()
@@ -1,33 +1,38 @@
 from PyQt5.QtCore import *
-import minecraft_launcher_lib
 from pathlib import Path
+from core.tasks import TaskHandle
+from core.tracing import traced
+from core.transaction import install_vanilla_version
 
 class DownloadProgressThread(QThread):
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
+    downloaded = pyqtSignal(int)
+    download_size = pyqtSignal(object)
     
     def __init__(self, minecraft_dir, version_name):
         super().__init__()
         self.minecraft_dir = minecraft_dir
         self.version_name = version_name
-        self._is_running = True
+        self.task = TaskHandle(f"установка {version_name}")
+        self.token = self.task.token
+        self.finished.connect(self.task.finish, Qt.DirectConnection)
         
+    @traced("install.vanilla")
     def run(self):
+        self.task.start()
         try:
             callback = {
-                "setStatus": lambda text: self.status.emit(text) if self._is_running else None,
-                "setProgress": lambda progress: self.progress.emit(int(progress * 100)) if self._is_running else None,
+                "setStatus": lambda text: self.status.emit(text),
+                "setProgress": lambda progress: self.progress.emit(int(progress * 100)),
                 "setMax": lambda max_val: None
             }
             
             self.status.emit(f"Установка Minecraft {self.version_name}...")
             
-            minecraft_launcher_lib.install.install_minecraft_version(
-                self.version_name,
-                str(self.minecraft_dir),
-                callback=callback
-            )
+            install_vanilla_version(self.minecraft_dir, self.version_name, callback=callback, cancel=self.token,
+                                    on_bytes=self.downloaded.emit, on_size=self.download_size.emit)
             
             # Проверяем успешность установки
             version_dir = Path(self.minecraft_dir) / "versions" / self.version_name
@@ -43,4 +48,4 @@ class DownloadProgressThread(QThread):
             self.finished.emit(False, str(e))
     
     def stop(self):
-        self._is_running = False
\ No newline at end of file
+        self.task.cancel()
\ No newline at end of file
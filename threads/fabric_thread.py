@@ -1,22 +1,32 @@
 from PyQt5.QtCore import *
 import json
-import requests
 import os
 from pathlib import Path
-import minecraft_launcher_lib
-from core.config import FABRIC_VERSIONS
+from core.config import FABRIC_VERSIONS, FABRIC_LOADER_VERSION
+from core.downloads import download_file, download_many
+from core.loader_catalog import get_loader_catalog
+from core.tasks import TaskHandle
+from core.tracing import traced
+from core.transaction import InstallTransaction, install_vanilla_version, is_install_pending, is_version_complete
+from core.utils import maven_to_path
 
 class FabricInstallThread(QThread):
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
+    # Скачанные байты - для скорости и оставшегося времени
+    downloaded = pyqtSignal(int)
     
     def __init__(self, minecraft_dir, mc_version, java_path):
         super().__init__()
         self.minecraft_dir = Path(minecraft_dir)
         self.mc_version = mc_version
         self.java_path = java_path
-        self._is_running = True
+        self.task = TaskHandle(f"установка Fabric {mc_version}")
+        self.token = self.task.token
+        self.finished.connect(self.task.finish, Qt.DirectConnection)
+        self.profile_data = {}
+        self.transaction = None
         
         # Получаем правильную версию Fabric для указанной версии Minecraft
         self.loader_version = self.get_fabric_loader_version(mc_version)
@@ -24,14 +34,27 @@ class FabricInstallThread(QThread):
         
     def get_fabric_loader_version(self, mc_version):
         """Получает правильную версию Fabric Loader для указанной версии Minecraft"""
-        # Проверяем в словаре
+        # Закрепленная версия важнее каталога, каталог - для остальных версий
         if mc_version in FABRIC_VERSIONS:
             return FABRIC_VERSIONS[mc_version]
         
-        # Для неизвестных версий используем заглушку
-        return "0.14.25"
+        catalog = get_loader_catalog()
+        loader_version = catalog.get_fabric_loader(mc_version)
+        
+        # Каталог для этой версии еще не скачан или устарел
+        if not loader_version or catalog.is_stale(catalog.data["fabric"].get(mc_version)):
+            catalog.refresh_fabric(mc_version)
+            loader_version = catalog.get_fabric_loader(mc_version) or loader_version
+        
+        if loader_version:
+            return loader_version
+        
+        # Нет сети и кеша
+        return FABRIC_LOADER_VERSION
     
+    @traced("install.fabric")
     def run(self):
+        self.task.start()
         try:
             self.status.emit(f"Установка Fabric для {self.mc_version}...")
             self.progress.emit(10)
@@ -57,7 +80,12 @@ class FabricInstallThread(QThread):
             
             # Скачиваем библиотеки Fabric
             if not self.download_fabric_libraries():
-                self.status.emit("Предупреждение: Некоторые библиотеки не скачались")
+                # Журнал остается открытым: при следующем запуске докачаются только недостающие
+                self.finished.emit(False, "Не удалось скачать библиотеки Fabric, установка продолжится при следующем запуске")
+                return
+            
+            self.transaction.mark_done("libraries")
+            self.transaction.publish()
             
             self.progress.emit(80)
             
@@ -72,13 +100,10 @@ class FabricInstallThread(QThread):
         except Exception as e:
             self.finished.emit(False, f"Ошибка установки Fabric: {str(e)}")
     
+    @traced("fabric.vanilla")
     def check_vanilla_installation(self):
         """Проверяет наличие vanilla Minecraft и устанавливает если нужно"""
-        vanilla_dir = self.minecraft_dir / "versions" / self.mc_version
-        vanilla_json = vanilla_dir / f"{self.mc_version}.json"
-        vanilla_jar = vanilla_dir / f"{self.mc_version}.jar"
-        
-        if not vanilla_json.exists() or not vanilla_jar.exists():
+        if not is_version_complete(self.minecraft_dir, self.mc_version):
             self.status.emit(f"Установка Minecraft {self.mc_version}...")
             
             callback = {
@@ -87,11 +112,8 @@ class FabricInstallThread(QThread):
             }
             
             try:
-                minecraft_launcher_lib.install.install_minecraft_version(
-                    self.mc_version,
-                    str(self.minecraft_dir),
-                    callback=callback
-                )
+                install_vanilla_version(self.minecraft_dir, self.mc_version, callback=callback, cancel=self.token,
+                                        on_bytes=self.downloaded.emit)
             except Exception as e:
                 self.finished.emit(False, f"Ошибка установки Vanilla: {str(e)}")
                 return False
@@ -103,7 +125,8 @@ class FabricInstallThread(QThread):
         version_dir = self.minecraft_dir / "versions" / self.version_name
         json_path = version_dir / f"{self.version_name}.json"
         
-        if json_path.exists():
+        # Прерванная установка продолжается, а не считается готовой
+        if json_path.exists() and not is_install_pending(self.minecraft_dir, self.version_name):
             try:
                 with open(json_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
@@ -118,6 +141,16 @@ class FabricInstallThread(QThread):
     def create_fabric_profile(self):
         """Создает JSON профиль Fabric"""
         try:
+            # Полный профиль из Fabric meta (со всеми библиотеками)
+            profile_data = get_loader_catalog().get_fabric_profile(self.mc_version, self.loader_version)
+            if profile_data:
+                self.version_name = profile_data.get("id", self.version_name)
+            else:
+                print("Профиль Fabric meta недоступен, создаем базовый профиль")
+                profile_data = self.create_fallback_profile()
+            
+            self.profile_data = profile_data
+            
             # Создаем директорию для версии
             version_dir = self.minecraft_dir / "versions" / self.version_name
             version_dir.mkdir(parents=True, exist_ok=True)
@@ -130,34 +163,13 @@ class FabricInstallThread(QThread):
                 except:
                     pass
             
-            # Создаем правильный JSON профиль для Fabric
-            profile_data = {
-                "id": self.version_name,
-                "inheritsFrom": self.mc_version,
-                "releaseTime": "2024-01-01T00:00:00+00:00",
-                "time": "2024-01-01T00:00:00+00:00",
-                "type": "release",
-                "mainClass": "net.fabricmc.loader.impl.launch.knot.KnotClient",
-                "arguments": {
-                    "game": [],
-                    "jvm": [
-                        "-Dfabric.skipMcProvider=true"
-                    ]
-                },
-                "libraries": [
-                    {
-                        "name": f"net.fabricmc:fabric-loader:{self.loader_version}",
-                        "url": "https://maven.fabricmc.net/"
-                    }
-                ]
-            }
-            
-            # Сохраняем JSON
-            json_path = version_dir / f"{self.version_name}.json"
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, indent=2)
+            # JSON собирается в промежуточной папке и публикуется после скачивания библиотек
+            self.transaction = InstallTransaction(self.minecraft_dir, self.version_name)
+            self.transaction.begin("fabric")
+            self.transaction.write_json(f"{self.version_name}.json", profile_data)
+            self.transaction.mark_done("profile")
             
-            print(f"Создан профиль Fabric: {json_path}")
+            print(f"Создан профиль Fabric: {self.transaction.staged_path(f'{self.version_name}.json')}")
             return True
             
         except Exception as e:
@@ -165,88 +177,78 @@ class FabricInstallThread(QThread):
             self.finished.emit(False, f"Ошибка создания профиля Fabric: {str(e)}")
             return False
     
+    def create_fallback_profile(self):
+        """Создает базовый профиль Fabric, если meta недоступна"""
+        # Библиотеки Fabric, которые нужно скачать
+        libraries = [
+            {
+                "name": f"net.fabricmc:fabric-loader:{self.loader_version}",
+                "url": "https://maven.fabricmc.net/"
+            },
+            {
+                "name": f"net.fabricmc:intermediary:{self.mc_version}",
+                "url": "https://maven.fabricmc.net/"
+            }
+        ]
+        
+        # Добавляем ASM для старых версий
+        version_parts = self.mc_version.split('.')
+        major_version = int(version_parts[1]) if len(version_parts) > 1 else 0
+        
+        if major_version < 16:
+            for artifact in ["asm", "asm-analysis", "asm-commons", "asm-tree", "asm-util"]:
+                libraries.append({
+                    "name": f"org.ow2.asm:{artifact}:9.2",
+                    "url": "https://repo.maven.apache.org/maven2/"
+                })
+        
+        return {
+            "id": self.version_name,
+            "inheritsFrom": self.mc_version,
+            "releaseTime": "2024-01-01T00:00:00+00:00",
+            "time": "2024-01-01T00:00:00+00:00",
+            "type": "release",
+            "mainClass": "net.fabricmc.loader.impl.launch.knot.KnotClient",
+            "arguments": {
+                "game": [],
+                "jvm": [
+                    "-Dfabric.skipMcProvider=true"
+                ]
+            },
+            "libraries": libraries
+        }
+    
+    @traced("fabric.libraries")
     def download_fabric_libraries(self):
-        """Скачивает библиотеки Fabric"""
+        """Скачивает библиотеки Fabric из профиля"""
         try:
-            # Библиотеки Fabric, которые нужно скачать
-            fabric_libraries = [
-                {
-                    "name": f"net.fabricmc:fabric-loader:{self.loader_version}",
-                    "url": "https://maven.fabricmc.net/"
-                },
-                {
-                    "name": f"net.fabricmc:intermediary:{self.mc_version}",
-                    "url": "https://maven.fabricmc.net/"
-                }
-            ]
-            
-            # Добавляем ASM для старых версий
-            version_parts = self.mc_version.split('.')
-            major_version = int(version_parts[1]) if len(version_parts) > 1 else 0
+            jobs = []
+            for lib in self.profile_data.get("libraries", []):
+                lib_path = maven_to_path(lib.get("name", ""))
+                if not lib_path:
+                    continue
+                
+                base_url = lib.get("url", "https://maven.fabricmc.net/")
+                if not base_url.endswith("/"):
+                    base_url += "/"
+                
+                jobs.append({
+                    "url": base_url + lib_path,
+                    "path": self.minecraft_dir / "libraries" / lib_path,
+                    "sha1": lib.get("sha1"),
+                    "size": lib.get("size"),
+                })
             
-            if major_version < 16:
-                fabric_libraries.extend([
-                    {
-                        "name": "org.ow2.asm:asm:9.2",
-                        "url": "https://repo.maven.apache.org/maven2/"
-                    },
-                    {
-                        "name": "org.ow2.asm:asm-analysis:9.2",
-                        "url": "https://repo.maven.apache.org/maven2/"
-                    },
-                    {
-                        "name": "org.ow2.asm:asm-commons:9.2",
-                        "url": "https://repo.maven.apache.org/maven2/"
-                    },
-                    {
-                        "name": "org.ow2.asm:asm-tree:9.2",
-                        "url": "https://repo.maven.apache.org/maven2/"
-                    },
-                    {
-                        "name": "org.ow2.asm:asm-util:9.2",
-                        "url": "https://repo.maven.apache.org/maven2/"
-                    }
-                ])
+            self.status.emit(f"Скачивание библиотек Fabric ({len(jobs)})...")
             
-            total = len(fabric_libraries)
+            def on_file(done, total):
+                self.progress.emit(40 + int(done / total * 35))
             
-            for i, lib in enumerate(fabric_libraries):
-                if not self._is_running:
-                    return False
-                
-                parts = lib["name"].split(":")
-                if len(parts) >= 3:
-                    group, artifact, version = parts[0], parts[1], parts[2]
-                    
-                    base_url = lib["url"]
-                    if not base_url.endswith("/"):
-                        base_url += "/"
-                    
-                    lib_path = group.replace(".", "/") + f"/{artifact}/{version}/{artifact}-{version}.jar"
-                    lib_url = base_url + lib_path
-                    
-                    dest_path = self.minecraft_dir / "libraries" / lib_path.replace("/", os.sep)
-                    
-                    if not dest_path.exists():
-                        dest_path.parent.mkdir(parents=True, exist_ok=True)
-                        
-                        try:
-                            self.status.emit(f"Скачивание: {artifact}")
-                            response = requests.get(lib_url, timeout=30)
-                            if response.status_code == 200:
-                                with open(dest_path, 'wb') as f:
-                                    f.write(response.content)
-                                print(f"Скачана библиотека: {artifact}")
-                            else:
-                                print(f"Не удалось скачать {artifact}: HTTP {response.status_code}")
-                        except Exception as e:
-                            print(f"Ошибка скачивания {artifact}: {e}")
-                
-                # Обновляем прогресс
-                progress = 40 + int((i + 1) / total * 35)
-                self.progress.emit(progress)
+            failed = download_many(jobs, on_file=on_file, on_bytes=self.downloaded.emit, cancel=self.token)
+            for job, error in failed:
+                print(f"Ошибка скачивания {job['url']}: {error}")
             
-            return True
+            return not failed
             
         except Exception as e:
             print(f"Ошибка при скачивании библиотек: {e}")
@@ -306,17 +308,12 @@ class FabricInstallThread(QThread):
             lib_url = base_url + lib_path
             dest_path = self.minecraft_dir / "libraries" / lib_path.replace("/", os.sep)
             
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            response = requests.get(lib_url, timeout=30)
-            if response.status_code == 200:
-                with open(dest_path, 'wb') as f:
-                    f.write(response.content)
-                print(f"Скачана недостающая библиотека: {artifact}")
-                return True
+            download_file(lib_url, dest_path, cancel=self.token)
+            print(f"Скачана недостающая библиотека: {artifact}")
+            return True
         except Exception as e:
             print(f"Ошибка скачивания библиотеки: {e}")
         return False
     
     def stop(self):
-        self._is_running = False
\ No newline at end of file
+        self.task.cancel()
\ No newline at end of file
@@ -1,24 +1,46 @@
 from PyQt5.QtCore import *
 import json
-import requests
 import subprocess
-import os
-import shutil
+import re
+import threading
 import zipfile
+from functools import partial
 from pathlib import Path
 from core.config import FORGE_VERSIONS
+from core.downloads import DownloadError, download_file
+from core.forge_installer import ForgeInstaller, ForgeInstallCancelled
+from core.forge_processors import ForgeProcessorPlan
+from core.installer_cache import get_installer_cache
+from core.transaction import InstallTransaction, install_vanilla_version, is_install_pending, is_version_complete
+from core.loader_catalog import get_loader_catalog
+from core.tasks import Cancelled, TaskHandle
+from core.tracing import traced
+from core.workers import extract_zip_worker, run_in_workers
+from core.utils import extract_zip_entry, maven_to_path, get_process_group_kwargs, kill_process_tree, write_json_atomic
+
+# Максимальное время работы установщика Forge (секунды)
+FORGE_INSTALL_TIMEOUT = 300
+
+# Строки вида "Processor 3/12" или "processor 3 of 12"
+FORGE_PROCESSOR_RE = re.compile(r'(?i)processor\D*?(\d+)\s*(?:/|of)\s*(\d+)')
 
 class ForgeInstallThread(QThread):
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
+    # Скачанные байты - для скорости и оставшегося времени
+    downloaded = pyqtSignal(int)
     
     def __init__(self, minecraft_dir, mc_version, java_path):
         super().__init__()
         self.minecraft_dir = Path(minecraft_dir)
         self.mc_version = mc_version
         self.java_path = java_path
-        self._is_running = True
+        self.task = TaskHandle(f"установка Forge {mc_version}")
+        self.token = self.task.token
+        self.finished.connect(self.task.finish, Qt.DirectConnection)
+        self.installer_process = None
+        self.forge_installer = None
         
         # Получаем правильную версию Forge для указанной версии Minecraft
         self.forge_version = self.get_forge_version(mc_version)
@@ -36,29 +58,22 @@ class ForgeInstallThread(QThread):
         
     def get_forge_version(self, mc_version):
         """Получает правильную версию Forge для указанной версии Minecraft"""
-        # Проверяем в словаре из config.py
+        # Закрепленная сборка важнее каталога, каталог - для остальных версий
         if mc_version in FORGE_VERSIONS:
             return FORGE_VERSIONS[mc_version]
         
-        # Для версий, которых нет в словаре, пробуем получить через API
-        try:
-            # Пробуем получить последнюю стабильную версию Forge для данной версии Minecraft
-            api_url = f"https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json"
-            response = requests.get(api_url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if "promos" in data:
-                    # Ищем recommended версию для данной версии Minecraft
-                    for key, value in data["promos"].items():
-                        if key == f"{mc_version}-recommended":
-                            return value
-                        elif key == f"{mc_version}-latest":
-                            # Если нет recommended, берем latest
-                            return value
-        except:
-            pass
+        catalog = get_loader_catalog()
+        forge_version = catalog.get_forge_version(mc_version)
+        
+        # Каталог еще не скачан или устарел - обновляем его (мы в фоновом потоке)
+        if not forge_version or catalog.is_stale(catalog.data["forge"]):
+            catalog.refresh_forge()
+            forge_version = catalog.get_forge_version(mc_version) or forge_version
+        
+        if forge_version:
+            return forge_version
         
-        # Если ничего не нашли, возвращаем заглушку
+        # Каталог недоступен (нет сети)
         return "latest"
         
     def determine_forge_format(self):
@@ -104,9 +119,17 @@ class ForgeInstallThread(QThread):
             self.library_path = "net/minecraftforge/forge"
             self.is_modern_forge = False
         
+        # Точный id артефакта из каталога Maven (формат разный для разных версий)
+        maven_version = get_loader_catalog().get_forge_maven_version(self.mc_version, self.forge_version)
+        if maven_version:
+            self.forge_version_id = maven_version
+            self.installer_url = f"https://maven.minecraftforge.net/net/minecraftforge/forge/{maven_version}/forge-{maven_version}-installer.jar"
+        
         print(f"Forge тип: {self.forge_type}, современный: {self.is_modern_forge}, версия: {self.version_name}, ID: {self.forge_version_id}")
     
+    @traced("install.forge")
     def run(self):
+        self.task.start()
         try:
             self.status.emit(f"Установка Forge для {self.mc_version}...")
             self.progress.emit(5)
@@ -152,6 +175,10 @@ class ForgeInstallThread(QThread):
                 if self.mc_version == "1.7.10":
                     self.download_required_libraries()
                 
+                # Журнал, открытый проверкой перед запуском, закрывается и после внешнего установщика
+                if is_install_pending(self.minecraft_dir, self.version_name):
+                    InstallTransaction(self.minecraft_dir, self.version_name).finish()
+                
                 if self.verify_forge_installation():
                     self.progress.emit(100)
                     self.status.emit("Forge успешно установлен!")
@@ -168,27 +195,20 @@ class ForgeInstallThread(QThread):
             traceback.print_exc()
             self.finished.emit(False, f"Ошибка установки Forge: {str(e)}")
     
+    @traced("forge.vanilla")
     def check_vanilla_installation(self):
         """Проверяет наличие vanilla Minecraft и устанавливает если нужно"""
-        vanilla_dir = self.minecraft_dir / "versions" / self.mc_version
-        vanilla_json = vanilla_dir / f"{self.mc_version}.json"
-        vanilla_jar = vanilla_dir / f"{self.mc_version}.jar"
-        
-        if not vanilla_json.exists() or not vanilla_jar.exists():
+        if not is_version_complete(self.minecraft_dir, self.mc_version):
             self.status.emit(f"Установка Minecraft {self.mc_version}...")
             
             callback = {
-                "setStatus": lambda text: self.status.emit(text) if self._is_running else None,
-                "setProgress": lambda progress: self.progress.emit(5 + int(progress * 10)) if self._is_running else None,
+                "setStatus": lambda text: self.status.emit(text),
+                "setProgress": lambda progress: self.progress.emit(5 + int(progress * 10)),
             }
             
             try:
-                import minecraft_launcher_lib
-                minecraft_launcher_lib.install.install_minecraft_version(
-                    self.mc_version,
-                    str(self.minecraft_dir),
-                    callback=callback
-                )
+                install_vanilla_version(self.minecraft_dir, self.mc_version, callback=callback, cancel=self.token,
+                                        on_bytes=self.downloaded.emit)
             except Exception as e:
                 self.finished.emit(False, f"Ошибка установки Vanilla: {str(e)}")
                 return False
@@ -215,7 +235,8 @@ class ForgeInstallThread(QThread):
         for name in possible_names:
             version_dir = versions_dir / name
             json_path = version_dir / f"{name}.json"
-            if json_path.exists():
+            # Прерванная установка продолжается, а не считается готовой
+            if json_path.exists() and not is_install_pending(self.minecraft_dir, name):
                 try:
                     with open(json_path, 'r', encoding='utf-8') as f:
                         data = json.load(f)
@@ -248,7 +269,7 @@ class ForgeInstallThread(QThread):
             # Проверяем, что версия относится к нашей Minecraft
             if self.mc_version in name and ("forge" in name.lower() or "Forge" in name):
                 json_path = version_dir / f"{name}.json"
-                if json_path.exists():
+                if json_path.exists() and not is_install_pending(self.minecraft_dir, name):
                     try:
                         with open(json_path, 'r', encoding='utf-8') as f:
                             data = json.load(f)
@@ -272,10 +293,9 @@ class ForgeInstallThread(QThread):
         
         return False
     
+    @traced("forge.download_installer")
     def download_installer(self):
         """Скачивает установщик Forge"""
-        installer_path = self.minecraft_dir / "forge_installer.jar"
-        
         try:
             self.status.emit("Скачивание установщика Forge...")
             
@@ -293,42 +313,41 @@ class ForgeInstallThread(QThread):
                     f"https://maven.minecraftforge.net/net/minecraftforge/forge/{self.forge_version_id}/forge-{self.forge_version_id}-installer.jar"
                 )
             
+            installer_cache = get_installer_cache()
+            
+            # Сначала ищем установщик в кеше - без обращения к сети
+            for url in urls_to_try:
+                cached_path = installer_cache.get(url.split("/")[-2])
+                if cached_path:
+                    self.status.emit("Установщик Forge взят из кеша")
+                    print(f"Установщик из кеша: {cached_path}")
+                    return cached_path
+            
             for url in urls_to_try:
-                if not self._is_running:
+                if self.token.is_cancelled:
                     return None
                     
                 try:
                     self.status.emit(f"Попытка загрузки...")
                     print(f"Пробуем URL: {url}")
                     
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    }
-                    response = requests.get(url, stream=True, timeout=30, headers=headers)
+                    downloaded = [0]
                     
-                    if response.status_code == 200:
-                        total_size = int(response.headers.get('content-length', 0))
-                        downloaded = 0
-                        
-                        with open(installer_path, 'wb') as f:
-                            for chunk in response.iter_content(chunk_size=8192):
-                                if not self._is_running:
-                                    return None
-                                if chunk:
-                                    f.write(chunk)
-                                    downloaded += len(chunk)
-                                    if total_size > 0:
-                                        progress = 15 + int((downloaded / total_size) * 15)
-                                        self.progress.emit(progress)
-                        
-                        if installer_path.stat().st_size > 100000:  # Проверяем, что файл не слишком маленький
-                            self.status.emit("Установщик скачан")
-                            print(f"Установщик скачан успешно: {installer_path}, размер: {installer_path.stat().st_size}")
-                            return installer_path
-                        else:
-                            print(f"Скачанный файл слишком маленький: {installer_path.stat().st_size}")
-                            installer_path.unlink(missing_ok=True)
-                            
+                    def on_bytes(count):
+                        self.downloaded.emit(count)
+                        downloaded[0] += count
+                        # Размер установщика заранее неизвестен, показываем мегабайты
+                        if downloaded[0] // (1024 * 1024) != (downloaded[0] - count) // (1024 * 1024):
+                            self.status.emit(f"Скачивание установщика Forge: {downloaded[0] // (1024 * 1024)} МБ")
+                    
+                    installer_path = installer_cache.download(url.split("/")[-2], url, on_bytes=on_bytes, cancel=self.token)
+                    self.progress.emit(30)
+                    self.status.emit("Установщик скачан")
+                    print(f"Установщик скачан успешно: {installer_path}, размер: {installer_path.stat().st_size}")
+                    return installer_path
+                
+                except Cancelled:
+                    return None
                 except Exception as e:
                     print(f"Ошибка скачивания с {url}: {e}")
                     continue
@@ -351,22 +370,104 @@ class ForgeInstallThread(QThread):
     
     def get_forge_version_info(self):
         """Получает информацию о доступных версиях Forge"""
-        try:
-            api_url = "https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json"
-            response = requests.get(api_url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if "promos" in data:
-                    # Ищем подходящую версию
-                    for key, value in data["promos"].items():
-                        if key.startswith(f"{self.mc_version}-"):
-                            return value
-        except:
-            pass
+        catalog = get_loader_catalog()
+        catalog.refresh_forge(force=True)
+        forge_version = catalog.get_forge_version(self.mc_version, "latest")
+        # Та же версия уже не скачалась - повторять нет смысла
+        if forge_version and forge_version != self.forge_version:
+            return forge_version
         return None
     
+    def count_installer_steps(self, installer_path):
+        """Возвращает (число библиотек, число процессоров) из install_profile.json установщика"""
+        try:
+            with zipfile.ZipFile(installer_path, 'r') as zip_ref:
+                install_profile = json.loads(zip_ref.read("install_profile.json"))
+                libraries = len(install_profile.get("libraries", []))
+                version_json = install_profile.get("json", "/version.json").lstrip("/")
+                if version_json in zip_ref.namelist():
+                    libraries += len(json.loads(zip_ref.read(version_json)).get("libraries", []))
+            processors = [
+                processor for processor in install_profile.get("processors", [])
+                if "client" in processor.get("sides", ["client"])
+            ]
+            return libraries, len(processors)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            print(f"Не удалось прочитать install_profile.json: {e}")
+            return 0, 0
+    
+    def parse_installer_line(self, line, state):
+        """Разбирает строку вывода установщика Forge, возвращает прогресс 0..1 или None"""
+        line = line.strip()
+        if line.startswith("Considering library"):
+            state["libraries"] += 1
+            self.status.emit(f"Forge: библиотеки {state['libraries']}/{state['total_libraries'] or '?'}")
+        elif line.startswith("MainClass:"):
+            state["processors"] += 1
+            self.status.emit(f"Forge: процессор {state['processors']}/{state['total_processors'] or '?'}")
+        else:
+            match = FORGE_PROCESSOR_RE.search(line)
+            if not match:
+                return None
+            state["processors"] = int(match.group(1))
+            state["total_processors"] = int(match.group(2))
+        
+        # Библиотеки - первая половина установки, процессоры - вторая
+        libraries_part = min(state["libraries"] / state["total_libraries"], 1.0) if state["total_libraries"] else 0.0
+        if state["processors"]:
+            libraries_part = 1.0
+        processors_part = min(state["processors"] / state["total_processors"], 1.0) if state["total_processors"] else 0.0
+        return libraries_part * 0.5 + processors_part * 0.5
+    
+    @traced("forge.install_modern")
     def install_modern_forge(self, installer_path):
-        """Установка Forge для новых версий (1.13+)"""
+        """Установка Forge для новых версий (1.13+)
+        
+        Сначала лаунчер сам выполняет install_profile.json установщика,
+        при неудаче запускается сам установщик.
+        """
+        self.status.emit("Установка Forge...")
+        self.progress.emit(40)
+        
+        log_file = self.minecraft_dir / "logs" / "forge_install.log"
+        log_file.parent.mkdir(exist_ok=True)
+        
+        self.forge_installer = ForgeInstaller(
+            self.minecraft_dir,
+            installer_path,
+            self.mc_version,
+            self.java_path,
+            log_file=log_file,
+            status_callback=self.status.emit,
+            progress_callback=lambda fraction: self.progress.emit(40 + int(fraction * 30)),
+            bytes_callback=self.downloaded.emit
+        )
+        try:
+            if self.token.is_cancelled:
+                return False
+            self.version_name = self.forge_installer.install()
+            self.progress.emit(70)
+            return True
+        except ForgeInstallCancelled:
+            self.status.emit("Установка Forge отменена")
+            return False
+        except Exception as e:
+            if self.token.is_cancelled:
+                self.status.emit("Установка Forge отменена")
+                return False
+            print(f"Не удалось установить Forge без установщика: {e}, запускаем установщик")
+        finally:
+            self.forge_installer = None
+        
+        return self.run_forge_installer(installer_path)
+    
+    @traced("forge.run_installer")
+    def run_forge_installer(self, installer_path):
+        """Установка Forge внешним установщиком (java -jar installer --installClient)
+        
+        Вывод установщика читается построчно: пишется сразу в forge_install.log
+        и разбирается в прогресс. stop() завершает процесс вместе с дочерними.
+        """
         try:
             self.status.emit("Запуск установщика Forge...")
             self.progress.emit(40)
@@ -389,84 +490,195 @@ class ForgeInstallThread(QThread):
             log_file = self.minecraft_dir / "logs" / "forge_install.log"
             log_file.parent.mkdir(exist_ok=True)
             
-            creation_flags = 0
-            if os.name == 'nt':
-                creation_flags = subprocess.CREATE_NO_WINDOW
+            total_libraries, total_processors = self.count_installer_steps(installer_path)
+            state = {
+                "libraries": 0,
+                "processors": 0,
+                "total_libraries": total_libraries,
+                "total_processors": total_processors,
+            }
+            
+            processor_plan = self.restore_processor_cache(installer_path)
             
             self.status.emit("Установка Forge (это может занять несколько минут)...")
             
-            process = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                creationflags=creation_flags,
-                timeout=300,
-                cwd=str(self.minecraft_dir)
-            )
-            
-            # Сохраняем лог
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.write(f"Command: {' '.join(cmd)}\n\n")
-                f.write(f"STDOUT:\n{process.stdout}\n")
-                f.write(f"STDERR:\n{process.stderr}\n")
-            
-            print(f"Forge installer output: {process.stdout}")
-            if process.stderr:
-                print(f"Forge installer errors: {process.stderr}")
+            if self.token.is_cancelled:
+                return False
+            
+            # Дописываем в лог: там может быть вывод неудачной установки без установщика
+            with open(log_file, 'a', encoding='utf-8') as log:
+                log.write(f"Command: {' '.join(cmd)}\n\n")
+                log.flush()
+                
+                self.installer_process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    stdin=subprocess.DEVNULL,
+                    text=True,
+                    encoding='utf-8',
+                    errors='replace',
+                    bufsize=1,
+                    cwd=str(self.minecraft_dir),
+                    **get_process_group_kwargs()
+                )
+                
+                # stop() мог быть вызван до того, как процесс был сохранен
+                if self.token.is_cancelled:
+                    self.kill_installer()
+                
+                # Зависший установщик завершается по таймеру
+                timed_out = threading.Event()
+                
+                def on_timeout():
+                    timed_out.set()
+                    self.kill_installer()
+                
+                timer = threading.Timer(FORGE_INSTALL_TIMEOUT, on_timeout)
+                timer.daemon = True
+                timer.start()
+                
+                last_progress = 40
+                try:
+                    for line in self.installer_process.stdout:
+                        log.write(line)
+                        fraction = self.parse_installer_line(line, state)
+                        if fraction is not None:
+                            value = 40 + int(fraction * 30)
+                            if value != last_progress:
+                                last_progress = value
+                                self.progress.emit(value)
+                    returncode = self.installer_process.wait()
+                finally:
+                    timer.cancel()
+                    self.installer_process.stdout.close()
+                
+                log.write(f"\nExit code: {returncode}\n")
+            
+            self.installer_process = None
+            
+            if self.token.is_cancelled:
+                self.status.emit("Установка Forge отменена")
+                return False
+            if timed_out.is_set():
+                self.status.emit("Установка Forge превысила время ожидания")
+                return False
+            if returncode != 0:
+                print(f"Установщик Forge завершился с кодом {returncode}, лог: {log_file}")
+                return False
+            
+            if processor_plan:
+                try:
+                    stored = processor_plan.store_outputs()
+                    if stored:
+                        print(f"Сохранено в кеш процессоров Forge: {stored}")
+                except OSError as e:
+                    print(f"Не удалось сохранить кеш процессоров Forge: {e}")
             
             self.progress.emit(70)
-            return process.returncode == 0
+            return True
             
-        except subprocess.TimeoutExpired:
-            self.status.emit("Установка Forge превысила время ожидания")
-            return False
         except Exception as e:
             print(f"Ошибка установки modern Forge: {e}")
             return False
     
+    def restore_processor_cache(self, installer_path):
+        """Раскладывает результаты процессоров из кеша перед запуском установщика.
+        
+        Установщик сам пропускает процессор ("Cache Hit!"), если все его
+        выходные файлы уже на месте и совпадают по sha1.
+        """
+        try:
+            processor_plan = ForgeProcessorPlan(self.minecraft_dir, installer_path, self.mc_version)
+            hits = processor_plan.restore_cached()
+            if hits:
+                self.status.emit(f"Forge: {hits} из {len(processor_plan.processors)} процессоров взяты из кеша")
+                print(f"Кеш процессоров Forge: {hits}/{len(processor_plan.processors)}")
+            return processor_plan
+        except Exception as e:
+            print(f"Кеш процессоров Forge недоступен: {e}")
+            return None
+    
+    def kill_installer(self):
+        """Завершает процесс установщика Forge и все его дочерние процессы"""
+        process = self.installer_process
+        if process is not None:
+            kill_process_tree(process)
+    
+    @traced("forge.install_legacy")
     def install_legacy_forge(self, installer_path):
-        """Установка Forge для старых версий (1.7.10 - 1.12)"""
+        """Установка Forge для старых версий (1.7.10 - 1.12)
+        
+        Установщик не распаковывается целиком: из центрального каталога zip
+        читаются только нужные записи и пишутся сразу в libraries/.
+        Распаковка идет в общем пуле процессов, чтобы не занимать GIL процесса GUI.
+        """
         try:
-            self.status.emit("Распаковка установщика Forge...")
+            self.status.emit("Чтение установщика Forge...")
             self.progress.emit(40)
             
-            # Создаем временную папку для распаковки
-            extract_dir = self.minecraft_dir / "forge_temp"
-            if extract_dir.exists():
-                shutil.rmtree(extract_dir, ignore_errors=True)
-            extract_dir.mkdir(exist_ok=True)
+            libraries_dir = self.minecraft_dir / "libraries"
+            forge_lib = None
             
-            # Распаковываем installer
             try:
                 with zipfile.ZipFile(installer_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_dir)
+                    install_profile = {}
+                    if "install_profile.json" in zip_ref.namelist():
+                        install_profile = json.loads(zip_ref.read("install_profile.json"))
+                    
+                    # Библиотеки из папки maven/ установщика
+                    entries = [
+                        info for info in zip_ref.infolist()
+                        if info.filename.startswith("maven/") and not info.is_dir()
+                    ]
+                    
+                    # Старые установщики хранят universal jar в корне архива
+                    install_info = install_profile.get("install", {})
+                    universal_entry = None
+                    if install_info.get("filePath") and install_info.get("path"):
+                        forge_lib = install_info["path"]
+                        try:
+                            universal_entry = zip_ref.getinfo(install_info["filePath"])
+                        except KeyError:
+                            universal_entry = None
+                    
+                    self.status.emit("Копирование библиотек...")
+                    written = 0
+                    total = len(entries) + (1 if universal_entry else 0)
+                    
+                    for info in entries:
+                        if info.filename.startswith("maven/net/minecraftforge/forge/") and info.filename.endswith(".jar"):
+                            forge_version_dir = Path(info.filename).parent.name
+                            forge_lib = forge_lib or f"net.minecraftforge:forge:{forge_version_dir}"
+                    
+                    def on_progress(done, count):
+                        self.progress.emit(40 + int(done / total * 30))
+                    
+                    try:
+                        results = run_in_workers(
+                            partial(extract_zip_worker, str(installer_path)),
+                            [(info.filename, str(libraries_dir / info.filename[len("maven/"):])) for info in entries],
+                            on_progress=on_progress,
+                            cancel=self.token
+                        )
+                    except Cancelled:
+                        return False
+                    written += sum(results)
+                    
+                    if universal_entry:
+                        if extract_zip_entry(zip_ref, universal_entry, libraries_dir / maven_to_path(forge_lib)):
+                            written += 1
+                    
+                    print(f"Записано библиотек: {written}, пропущено (совпадают): {total - written}")
             except zipfile.BadZipFile:
                 self.status.emit("Ошибка: файл установщика поврежден")
                 return False
             
-            self.progress.emit(55)
-            
-            # Копируем библиотеки
-            self.status.emit("Копирование библиотек...")
-            
-            # Ищем папку maven (может быть в корне или в version)
-            maven_dirs = list(extract_dir.glob("**/maven"))
-            if maven_dirs:
-                libraries_src = maven_dirs[0]
-            else:
-                libraries_src = extract_dir / "maven"
-            
-            if libraries_src.exists():
-                self.copy_libraries(libraries_src, self.minecraft_dir / "libraries")
-            
             self.progress.emit(70)
             
             # Создаем профиль Forge
             self.status.emit("Создание профиля Forge...")
-            self.create_legacy_forge_profile(extract_dir)
-            
-            # Очистка
-            shutil.rmtree(extract_dir, ignore_errors=True)
+            self.create_legacy_forge_profile(forge_lib)
             
             self.progress.emit(80)
             return True
@@ -477,48 +689,16 @@ class ForgeInstallThread(QThread):
             traceback.print_exc()
             return False
     
-    def copy_libraries(self, src_dir, dest_dir):
-        """Копирует библиотеки из installer в папку libraries"""
-        try:
-            copied_count = 0
-            for root, dirs, files in os.walk(src_dir):
-                for file in files:
-                    if file.endswith('.jar'):
-                        src_file = Path(root) / file
-                        
-                        # Получаем относительный путь
-                        try:
-                            rel_path = src_file.relative_to(src_dir)
-                        except ValueError:
-                            continue
-                        
-                        dest_file = dest_dir / rel_path
-                        
-                        if not dest_file.exists() or dest_file.stat().st_size != src_file.stat().st_size:
-                            dest_file.parent.mkdir(parents=True, exist_ok=True)
-                            shutil.copy2(src_file, dest_file)
-                            copied_count += 1
-                            print(f"Скопирована библиотека: {rel_path}")
-            
-            print(f"Скопировано библиотек: {copied_count}")
-            
-        except Exception as e:
-            print(f"Ошибка копирования библиотек: {e}")
-    
-    def create_legacy_forge_profile(self, extract_dir):
+    def create_legacy_forge_profile(self, forge_lib=None):
         """Создает JSON профиль для старых версий Forge (только для версий <= 1.12.2)"""
         try:
             version_dir = self.minecraft_dir / "versions" / self.version_name
             version_dir.mkdir(parents=True, exist_ok=True)
             
-            # Ищем библиотеку forge для нашей версии
-            forge_lib = None
-            forge_version_found = None
+            # Библиотека forge уже известна из установщика, иначе ищем ее
+            forge_version_found = forge_lib.split(":")[2] if forge_lib else None
             
-            # Поиск в разных местах
-            search_paths = [
-                extract_dir / "maven" / "net" / "minecraftforge" / "forge",
-                extract_dir / "net" / "minecraftforge" / "forge",
+            search_paths = [] if forge_lib else [
                 self.minecraft_dir / "libraries" / "net" / "minecraftforge" / "forge",
             ]
             
@@ -602,12 +782,11 @@ class ForgeInstallThread(QThread):
                 ]
             }
             
-            # Сохраняем JSON
-            json_path = version_dir / f"{self.version_name}.json"
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, indent=2)
-            
-            print(f"Создан профиль Forge для старой версии: {json_path}")
+            # JSON собирается в промежуточной папке и публикуется после библиотек
+            transaction = InstallTransaction(self.minecraft_dir, self.version_name)
+            transaction.begin("forge")
+            transaction.write_json(f"{self.version_name}.json", profile_data)
+            transaction.mark_done("profile")
             
             # Сразу скачиваем необходимые библиотеки
             self.download_required_libraries()
@@ -616,6 +795,9 @@ class ForgeInstallThread(QThread):
             if not forge_lib and forge_version_found:
                 self.download_forge_library(forge_version_found)
             
+            transaction.publish()
+            print(f"Создан профиль Forge для старой версии: {version_dir / f'{self.version_name}.json'}")
+            
         except Exception as e:
             print(f"Ошибка создания legacy Forge профиля: {e}")
             import traceback
@@ -653,14 +835,10 @@ class ForgeInstallThread(QThread):
                     self.status.emit(f"Скачивание {lib['name']}...")
                     
                     try:
-                        response = requests.get(lib["url"], timeout=30)
-                        if response.status_code == 200:
-                            dest_path.parent.mkdir(parents=True, exist_ok=True)
-                            with open(dest_path, 'wb') as f:
-                                f.write(response.content)
-                            print(f"Скачана библиотека: {lib['name']}")
-                        else:
-                            print(f"Не удалось скачать {lib['name']}: {response.status_code}")
+                        download_file(lib["url"], dest_path, cancel=self.token)
+                        print(f"Скачана библиотека: {lib['name']}")
+                    except Cancelled:
+                        return
                     except Exception as e:
                         print(f"Ошибка скачивания {lib['name']}: {e}")
                         
@@ -677,14 +855,8 @@ class ForgeInstallThread(QThread):
                 self.status.emit("Скачивание launchwrapper...")
                 launchwrapper_url = "https://libraries.minecraft.net/net/minecraft/launchwrapper/1.12/launchwrapper-1.12.jar"
                 
-                response = requests.get(launchwrapper_url, timeout=30)
-                if response.status_code == 200:
-                    launchwrapper_path.parent.mkdir(parents=True, exist_ok=True)
-                    with open(launchwrapper_path, 'wb') as f:
-                        f.write(response.content)
-                    print("Launchwrapper скачан успешно")
-                else:
-                    print(f"Не удалось скачать launchwrapper: {response.status_code}")
+                download_file(launchwrapper_url, launchwrapper_path, cancel=self.token)
+                print("Launchwrapper скачан успешно")
         except Exception as e:
             print(f"Ошибка при скачивании launchwrapper: {e}")
     
@@ -704,14 +876,12 @@ class ForgeInstallThread(QThread):
                 lib_url = f"https://maven.minecraftforge.net/{lib_path}"
                 dest_path = self.minecraft_dir / "libraries" / lib_path
                 
-                dest_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                response = requests.get(lib_url, timeout=30)
-                if response.status_code == 200:
-                    with open(dest_path, 'wb') as f:
-                        f.write(response.content)
-                    print(f"Скачана библиотека Forge: {lib_url}")
-                    return True
+                try:
+                    download_file(lib_url, dest_path, cancel=self.token)
+                except DownloadError:
+                    continue
+                print(f"Скачана библиотека Forge: {lib_url}")
+                return True
         except Exception as e:
             print(f"Ошибка скачивания библиотеки Forge: {e}")
         return False
@@ -790,8 +960,7 @@ class ForgeInstallThread(QThread):
                                 modified = True
                             
                             if modified:
-                                with open(json_path, 'w', encoding='utf-8') as f:
-                                    json.dump(data, f, indent=2)
+                                write_json_atomic(json_path, data, indent=2)
                                 print(f"Исправлен профиль Forge для старой версии: {json_path}")
                                 
                         except Exception as e:
@@ -921,8 +1090,7 @@ class ForgeInstallThread(QThread):
                 }
             
             json_path = version_dir / f"{version_name}.json"
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, indent=2)
+            write_json_atomic(json_path, profile_data, indent=2)
             
             self.version_name = version_name
             print(f"Создан отсутствующий профиль Forge для старой версии: {json_path}")
@@ -939,12 +1107,21 @@ class ForgeInstallThread(QThread):
             return False
     
     def cleanup_temp_files(self, installer_path):
-        """Удаляет временные файлы"""
+        """Удаляет временные файлы
+        
+        Установщик остается в кеше установщиков, удаляется только
+        forge_installer.jar, оставшийся от старых версий лаунчера.
+        """
         try:
-            if installer_path and installer_path.exists():
-                installer_path.unlink()
+            legacy_installer = self.minecraft_dir / "forge_installer.jar"
+            if legacy_installer.exists() and legacy_installer != installer_path:
+                legacy_installer.unlink()
         except:
             pass
     
     def stop(self):
-        self._is_running = False
\ No newline at end of file
+        self.task.cancel()
+        forge_installer = self.forge_installer
+        if forge_installer is not None:
+            forge_installer.cancel()
+        self.kill_installer()
\ No newline at end of file
@@ -0,0 +1,61 @@
+from PyQt5.QtCore import *
+from core.tasks import TaskHandle
+
+
+class JavaSearchThread(QThread):
+    """Поиск и проверка Java в фоне: запуск java -version не блокирует GUI.
+
+    С java_path только проверяется и регистрируется выбранный файл
+    (сигнал found с его мажорной версией). Без него ищется Java,
+    нужная версии Minecraft: реестр, затем обход системы; сигнал found
+    получает путь (пустой, если не найдена) и нужную мажорную версию.
+    keep_path - текущая Java: если она запускается, поиск не нужен
+    и found не отправляется.
+    """
+    status = pyqtSignal(str)
+    found = pyqtSignal(str, int)
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, java_manager, minecraft_dir, mc_version=None, java_path=None, keep_path=None):
+        super().__init__()
+        self.java_manager = java_manager
+        self.minecraft_dir = minecraft_dir
+        self.mc_version = mc_version
+        self.java_path = java_path
+        self.keep_path = keep_path
+        self.task = TaskHandle("поиск Java")
+        self.token = self.task.token
+        self.finished.connect(self.task.finish, Qt.DirectConnection)
+
+    def run(self):
+        self.task.start()
+        try:
+            if self.java_path:
+                self.found.emit(self.java_path, self.java_manager.register(self.java_path))
+                self.finished.emit(True, "")
+                return
+
+            if self.keep_path and self.java_manager.probe(self.keep_path):
+                self.finished.emit(True, "")
+                return
+
+            component, required = self.java_manager.get_requirement(self.minecraft_dir, self.mc_version)
+            self.status.emit(f"Ищем Java {required}...")
+
+            # Реестр запоминает найденные Java, повторно они не проверяются
+            java_path = self.java_manager.find_installed(required, component)
+            if not java_path and not self.token.is_cancelled:
+                self.java_manager.discover(self.minecraft_dir)
+                java_path = self.java_manager.find_installed(required, component)
+
+            if not self.token.is_cancelled:
+                self.found.emit(java_path or "", required)
+            self.finished.emit(True, "")
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.finished.emit(False, f"Ошибка поиска Java: {str(e)}")
+
+    def stop(self):
+        self.task.cancel()